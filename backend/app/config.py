@@ -8,6 +8,56 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     NAVER_API_KEY: Optional[str] = None
+    # LLM provider: "openai" or "stub" (offline, deterministic; for benchmarks and load tests)
+    LLM_PROVIDER: str = "openai"
+    LLM_MODEL: str = "gpt-4o-mini"  # Use cheaper model, can change to "gpt-4o" for better quality
+    LLM_TIMEOUT_SECONDS: float = 30.0
+    LLM_MAX_CONCURRENCY: int = 8  # Concurrent LLM requests per worker
+    LLM_MAX_CONNECTIONS: int = 20  # HTTP connection pool size of the shared client
+    LLM_MAX_STREAMS: int = 32  # Concurrent streamed chat replies per worker (not counted in LLM_MAX_CONCURRENCY)
+    # Stub provider: simulated latency (mean +/- jitter) and share of calls failing with a transient error
+    LLM_STUB_LATENCY_MS: float = 200.0
+    LLM_STUB_LATENCY_JITTER_MS: float = 50.0
+    LLM_STUB_ERROR_RATE: float = 0.0
+    LLM_STUB_SEED: int = 0
+    # Retries of transient LLM errors (full-jitter exponential backoff, honours Retry-After)
+    LLM_MAX_RETRIES: int = 3
+    LLM_RETRY_BASE_DELAY_SECONDS: float = 0.5
+    LLM_RETRY_MAX_DELAY_SECONDS: float = 20.0
+    # Per-model circuit breaker: open after N consecutive transient failures, probe again after the reset time
+    LLM_BREAKER_FAILURE_THRESHOLD: int = 5
+    LLM_BREAKER_RESET_SECONDS: float = 30.0
+    # Price of the model per 1K tokens (USD), for the per-call cost logs
+    LLM_PRICE_PER_1K_INPUT_TOKENS: float = 0.00015
+    LLM_PRICE_PER_1K_OUTPUT_TOKENS: float = 0.0006
+    # LLM response cache: "memory" (per worker), "mongo" (shared llm_cache collection) or "none"
+    LLM_CACHE_BACKEND: str = "memory"
+    LLM_CACHE_MAX_ENTRIES: int = 1000  # per-worker LRU size
+    LLM_CACHE_MONGO_MAX_ENTRIES: int = 50000
+    LLM_CACHE_LOCAL_TTL_SECONDS: int = 300  # per-worker copy of shared (mongo) entries
+    # Daily task auto-generation: concurrent children and LLM quota used by the job
+    AUTO_GENERATE_CONCURRENCY: int = 8
+    AUTO_GENERATE_REQUESTS_PER_MINUTE: int = 300
+    AUTO_GENERATE_TOKENS_PER_MINUTE: int = 200000
+    # Scheduled jobs: run once across workers via leases in the job_leases collection
+    SCHEDULER_ENABLED: bool = True  # false: this worker never runs scheduled jobs
+    SCHEDULER_LEASE_SECONDS: int = 120  # a partition is taken over this long after its last heartbeat
+    SCHEDULER_SWEEP_SECONDS: int = 60  # how often each worker looks for partitions to take over
+    SCHEDULER_MAX_ATTEMPTS: int = 3  # attempts per partition before it is marked failed
+    SCHEDULER_PARTITIONS: int = 4  # child ranges of sharded jobs
+    SCHEDULER_PAGE_SIZE: int = 200  # children loaded (and checkpointed) at a time by scheduled jobs
+    # Daily skills update: "incremental" (children whose scores can have changed since the
+    # previous completed run) or "full" (every child); both store the same scores
+    SKILLS_UPDATE_MODE: str = "incremental"
+    # Chat emotion detection: "local" (lexicon, LLM when unsure), "lexicon" or "llm".
+    # Check changes with `python manage.py benchmark-emotion` (held-out messages).
+    EMOTION_ENGINE: str = "local"
+    EMOTION_LLM_FALLBACK_THRESHOLD: float = 0.5
+    # Comma-separated emails of the accounts allowed to read operational endpoints (/llm/*)
+    ADMIN_EMAILS: str = ""
+    # Only use indexed DBRef queries for link lookups (no full-scan fallback).
+    # Enable after `python manage.py normalize-links` has completed.
+    STRICT_LINK_QUERIES: bool = False
 
     class Config:
         env_file = ".env"
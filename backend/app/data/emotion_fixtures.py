@@ -0,0 +1,178 @@
+"""
+Labelled emotion fixtures for `python manage.py benchmark-emotion`.
+- HOLDOUT_EMOTION_FIXTURES: messages written for evaluation only. Never use
+  them (or seed.py) to pick EMOTION_LEXICON entries, or the benchmark stops
+  measuring how the lexicon does on unseen messages.
+- DEV_EMOTION_FIXTURES: messages for tuning the lexicon (error analysis).
+- load_seed_emotion_fixtures(): the (user_input, detected_emotion) pairs of the
+  InteractionLog entries in seed.py, read from its source.
+"""
+
+from pathlib import Path
+from typing import List, Tuple
+import ast
+
+SEED_FILE = Path(__file__).resolve().parents[2] / "seed.py"
+
+HOLDOUT_EMOTION_FIXTURES: List[Tuple[str, str]] = [
+    ("Grandma is coming to visit and I'm really happy", "Happy"),
+    ("Yay, it's pancake day!", "Happy"),
+    ("I love my new puppy so much", "Happy"),
+    ("Today was a really good day", "Happy"),
+    ("We went to the beach and it was so much fun", "Happy"),
+    ("I'm glad you're here", "Happy"),
+    ("My cat died yesterday", "Sad"),
+    ("Nobody wanted to sit with me at lunch", "Sad"),
+    ("I miss my dad, he's on a work trip", "Sad"),
+    ("I cried at school today", "Sad"),
+    ("I feel lonely when everyone is busy", "Sad"),
+    ("I'm not happy today", "Sad"),
+    ("My brother broke my lego castle on purpose!", "Angry"),
+    ("It's not fair that she got two cookies", "Angry"),
+    ("I hate it when people take my pencils", "Angry"),
+    ("I'm so mad at my sister", "Angry"),
+    ("Stop, that's really annoying", "Angry"),
+    ("He keeps kicking my chair and I'm furious", "Angry"),
+    ("Tomorrow is my birthday party!!", "Excited"),
+    ("We're going to the zoo tomorrow, I can't wait", "Excited"),
+    ("Guess what, we're getting a trampoline!", "Excited"),
+    ("I'm so excited to see the fireworks", "Excited"),
+    ("Wow, there's snow outside!", "Excited"),
+    ("Can we go swimming this afternoon?", "Excited"),
+    ("There's a spider in my room", "Scared"),
+    ("I had a bad dream about a monster", "Scared"),
+    ("I'm afraid of the doctor's needle", "Scared"),
+    ("The loud noise outside frightened me", "Scared"),
+    ("I don't want to sleep with the lights off, it's scary", "Scared"),
+    ("I'm terrified of going on the big slide", "Scared"),
+    ("How do birds know where to fly in winter?", "Curious"),
+    ("What is inside a volcano?", "Curious"),
+    ("Why do cats purr?", "Curious"),
+    ("I wonder how far away the moon is", "Curious"),
+    ("Where does rain come from?", "Curious"),
+    ("How many stars are there?", "Curious"),
+    ("This puzzle is too hard, I give up", "Frustrated"),
+    ("I keep getting the answer wrong", "Frustrated"),
+    ("My shoelaces won't stay tied, ugh", "Frustrated"),
+    ("I tried five times and it still doesn't work", "Frustrated"),
+    ("This game is so confusing", "Frustrated"),
+    ("I'm stuck on this level", "Frustrated"),
+    ("I got a gold star for my spelling test!", "Proud"),
+    ("I rode my bike without training wheels!", "Proud"),
+    ("I tied my shoes by myself", "Proud"),
+    ("I'm proud of my drawing", "Proud"),
+    ("I scored a goal in football today", "Proud"),
+    ("I read a whole chapter book on my own", "Proud"),
+    ("What if nobody comes to my party?", "Worried"),
+    ("I feel nervous before my swimming lesson", "Worried"),
+    ("Mom is sick and I'm worried about her", "Worried"),
+    ("I think I might forget my lines in the play", "Worried"),
+    ("I'm anxious about the swimming lesson", "Worried"),
+    ("What if I get lost at the mall?", "Worried"),
+    ("I had rice for dinner", "Neutral"),
+    ("Okay", "Neutral"),
+    ("My shirt is blue", "Neutral"),
+    ("We have art class on Tuesdays", "Neutral"),
+    ("I'm going to brush my teeth now", "Neutral"),
+    ("It's fine", "Neutral"),
+]
+
+
+# Messages for tuning EMOTION_LEXICON: look at the misses on this set, then add
+# general vocabulary (not the messages' own phrases) and check the held-out set.
+DEV_EMOTION_FIXTURES: List[Tuple[str, str]] = [
+    ("I'm in such a good mood today", "Happy"),
+    ("Mom made my favourite soup and I smiled the whole dinner", "Happy"),
+    ("Playing with my cousins makes me feel so cheerful", "Happy"),
+    ("It was a wonderful afternoon at the park", "Happy"),
+    ("I laughed so much at the funny movie", "Happy"),
+    ("Hehe the baby goat was so cute", "Happy"),
+    ("Thanks for helping me, you're the best", "Happy"),
+    ("I feel really good after the picnic", "Happy"),
+    ("My best friend is moving to another city", "Sad"),
+    ("I feel sad because my toy broke", "Sad"),
+    ("Nobody came to play with me today", "Sad"),
+    ("I feel so alone in my room", "Sad"),
+    ("My goldfish is gone and I keep crying", "Sad"),
+    ("I'm sorry, I feel down today", "Sad"),
+    ("Everyone forgot about me at recess", "Sad"),
+    ("I had tears in my eyes when grandpa left", "Sad"),
+    ("My sister ripped my drawing and I'm so angry", "Angry"),
+    ("That's so unfair, I never get a turn", "Angry"),
+    ("I'm furious that he lied to me", "Angry"),
+    ("Grr, he took my ball again", "Angry"),
+    ("Leave me alone, I'm mad", "Angry"),
+    ("I hate when they laugh at me", "Angry"),
+    ("He pushed me and it made me really angry", "Angry"),
+    ("Stop it! You're so annoying", "Angry"),
+    ("We're going camping this weekend, I can't wait!", "Excited"),
+    ("OMG we're getting a kitten!!", "Excited"),
+    ("I'm so pumped for the school trip", "Excited"),
+    ("Soon it's Christmas and I'm so excited", "Excited"),
+    ("Yesss! The new game comes out today!", "Excited"),
+    ("I'm thrilled about the party on Saturday", "Excited"),
+    ("Tomorrow we go to the amusement park!", "Excited"),
+    ("Let's play the treasure hunt game now!", "Excited"),
+    ("There's a weird noise outside and I'm scared", "Scared"),
+    ("I'm afraid of big dogs", "Scared"),
+    ("The spider in the bathroom frightens me", "Scared"),
+    ("I had a bad dream about ghosts", "Scared"),
+    ("The lightning was so loud, I hid under the blanket", "Scared"),
+    ("I'm too scared to go in the basement", "Scared"),
+    ("That movie was so creepy I can't sleep", "Scared"),
+    ("I'm terrified of the dentist", "Scared"),
+    ("How do fish breathe under water?", "Curious"),
+    ("Why is the moon sometimes orange?", "Curious"),
+    ("What happens to the water when it rains?", "Curious"),
+    ("I wonder how big the ocean is", "Curious"),
+    ("Can you explain how magnets work?", "Curious"),
+    ("Where do butterflies come from?", "Curious"),
+    ("What is the biggest dinosaur ever?", "Curious"),
+    ("How many stars are there in the sky?", "Curious"),
+    ("This puzzle is too hard, I can't do it", "Frustrated"),
+    ("Ugh, I keep getting this sum wrong", "Frustrated"),
+    ("I tried again and again and it still doesn't work", "Frustrated"),
+    ("I don't get these fractions at all", "Frustrated"),
+    ("Why won't this stupid zipper close, ugh", "Frustrated"),
+    ("I'm stuck on the same level forever", "Frustrated"),
+    ("Reading is so difficult for me", "Frustrated"),
+    ("I give up, it's impossible", "Frustrated"),
+    ("I finally tied my shoes all by myself!", "Proud"),
+    ("I got a gold star from my teacher", "Proud"),
+    ("I'm proud that I finished the whole book", "Proud"),
+    ("I scored a goal in the match!", "Proud"),
+    ("I did it! I rode my bike without help", "Proud"),
+    ("I won first place in the drawing contest", "Proud"),
+    ("My teacher said my essay was the best in class", "Proud"),
+    ("I cleaned my room by myself and it looks great", "Proud"),
+    ("I'm worried I'll forget my lines in the play", "Worried"),
+    ("What if I fail the spelling quiz?", "Worried"),
+    ("I'm nervous about the first day at my new school", "Worried"),
+    ("Dad is late picking me up and I'm getting worried", "Worried"),
+    ("I'm anxious because I lost my library book", "Worried"),
+    ("I hope nobody laughs at my presentation", "Worried"),
+    ("I'm scared my friends won't like my new haircut", "Worried"),
+    ("I keep thinking about the exam tomorrow", "Worried"),
+    ("I had rice for lunch", "Neutral"),
+    ("I'm at home now", "Neutral"),
+    ("Today is Tuesday", "Neutral"),
+    ("Okay, I'll do my homework later", "Neutral"),
+    ("My pencil case is green", "Neutral"),
+    ("We have math after break", "Neutral"),
+    ("I'm watching TV", "Neutral"),
+    ("Fine, see you later", "Neutral"),
+]
+
+
+def load_seed_emotion_fixtures(seed_file: Path = SEED_FILE) -> List[Tuple[str, str]]:
+    """Return [(user_input, emotion)] for every InteractionLog literal in seed.py."""
+    tree = ast.parse(seed_file.read_text(encoding="utf-8"))
+    fixtures = []
+    for node in ast.walk(tree):
+        if not (isinstance(node, ast.Call) and getattr(node.func, "id", None) == "InteractionLog"):
+            continue
+        fields = {kw.arg: kw.value for kw in node.keywords}
+        text, label = fields.get("user_input"), fields.get("detected_emotion")
+        if isinstance(text, ast.Constant) and isinstance(label, ast.Constant):
+            fixtures.append((text.value, label.value))
+    return fixtures
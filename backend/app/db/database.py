@@ -2,9 +2,10 @@ from motor.motor_asyncio import AsyncIOMotorClient
 from beanie import init_beanie
 from app.models.beanie_models import (
     User, Child, ChildDevelopmentAssessment, Task, Reward, ChildReward, RedemptionRequest, MiniGame,
-    GameSession, InteractionLog, Report, ChildTask
+    GameSession, InteractionLog, Report, ChildTask, ChildStats, BackgroundJob
 )
 from app.config import settings
+from app.db.indexes import check_indexes
 
 client = AsyncIOMotorClient(settings.DATABASE_URL)
 db = client[settings.DATABASE_NAME]
@@ -14,6 +15,7 @@ async def init_database():
     Initialize database connection and Beanie models.
     Rebuilds User model to resolve forward reference to Child.
     Rebuilds Reward model to resolve forward reference to User.
+    Creates the declared index set and reports drift from it (see app/db/indexes.py).
     """
     
     from app.models.child_models import Child
@@ -25,7 +27,7 @@ async def init_database():
     # Rebuild Reward after User is defined to resolve forward reference
     Reward.model_rebuild()
     
-    await init_beanie(database=db, document_models=[
+    document_models = [
         User,
         Child,
         ChildDevelopmentAssessment,
@@ -37,5 +39,10 @@ async def init_database():
         GameSession,
         InteractionLog,
         Report,
-        ChildTask
-    ])
+        ChildTask,
+        ChildStats,
+        BackgroundJob
+    ]
+    await init_beanie(database=db, document_models=document_models)
+    # init_beanie creates the declared indexes; report drift from the catalog
+    await check_indexes(document_models)
@@ -0,0 +1,153 @@
+"""
+MongoDB index catalog.
+Every Beanie document declares its indexes from this catalog (Settings.indexes),
+so the full index set of the database can be reviewed in one place.
+Link fields are stored as DBRefs, so link indexes are declared on "<field>.$id".
+"""
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from typing import Any, Dict, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+INDEX_CATALOG: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_1"),
+        IndexModel([("child_profile.$id", ASCENDING)], name="child_profile_1", sparse=True),
+    ],
+    "children": [
+        IndexModel([("parent.$id", ASCENDING)], name="parent_1"),
+        IndexModel([("username", ASCENDING)], name="username_1", sparse=True),
+    ],
+    "child_development_assessments": [
+        IndexModel([("child.$id", ASCENDING), ("created_at", DESCENDING)], name="child_1_created_at_-1"),
+    ],
+    "tasks": [
+        IndexModel([("title", ASCENDING)], name="title_1"),
+        IndexModel([("category", ASCENDING)], name="category_1"),
+    ],
+    "child_tasks": [
+        IndexModel([("child.$id", ASCENDING), ("status", ASCENDING)], name="child_1_status_1"),
+        IndexModel(
+            [("child.$id", ASCENDING), ("assigned_at", DESCENDING), ("_id", DESCENDING)],
+            name="child_1_assigned_at_-1__id_-1",
+        ),
+        # Category filter of the task list (library snapshot / custom task data)
+        IndexModel(
+            [("child.$id", ASCENDING), ("task_snapshot.category", ASCENDING), ("assigned_at", DESCENDING), ("_id", DESCENDING)],
+            name="child_1_snapshot_category_1_assigned_at_-1__id_-1",
+        ),
+        IndexModel(
+            [("child.$id", ASCENDING), ("task_data.category", ASCENDING), ("assigned_at", DESCENDING), ("_id", DESCENDING)],
+            name="child_1_task_data_category_1_assigned_at_-1__id_-1",
+        ),
+        IndexModel([("task.$id", ASCENDING)], name="task_1"),
+        IndexModel([("status", ASCENDING), ("completed_at", DESCENDING)], name="status_1_completed_at_-1"),
+    ],
+    "rewards": [
+        IndexModel([("created_by.$id", ASCENDING)], name="created_by_1"),
+        IndexModel([("name", ASCENDING)], name="name_1"),
+    ],
+    "child_rewards": [
+        IndexModel([("child.$id", ASCENDING), ("reward.$id", ASCENDING)], name="child_1_reward_1"),
+    ],
+    "redemption_requests": [
+        IndexModel([("child.$id", ASCENDING), ("requested_at", DESCENDING)], name="child_1_requested_at_-1"),
+        IndexModel([("status", ASCENDING), ("requested_at", DESCENDING)], name="status_1_requested_at_-1"),
+    ],
+    "game_sessions": [
+        IndexModel([("child.$id", ASCENDING), ("start_time", DESCENDING)], name="child_1_start_time_-1"),
+    ],
+    "interaction_logs": [
+        IndexModel(
+            [("child.$id", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)],
+            name="child_1_timestamp_-1__id_-1",
+        ),
+    ],
+    "reports": [
+        IndexModel(
+            [("child.$id", ASCENDING), ("generated_at", DESCENDING), ("_id", DESCENDING)],
+            name="child_1_generated_at_-1__id_-1",
+        ),
+    ],
+    # keyed by child id (_id); updated_at is the change watermark of the skills job
+    "child_stats": [
+        IndexModel([("updated_at", ASCENDING)], name="updated_at_1"),
+    ],
+    "background_jobs": [
+        IndexModel([("owner_id", ASCENDING), ("created_at", DESCENDING)], name="owner_id_1_created_at_-1"),
+        IndexModel([("kind", ASCENDING), ("created_at", DESCENDING)], name="kind_1_created_at_-1"),
+        # unfinished jobs to resume (app.services.jobs.resume_jobs)
+        IndexModel([("status", ASCENDING), ("kind", ASCENDING)], name="status_1_kind_1"),
+    ],
+    # raw collection of app.services.llm_cache (created on first cache write)
+    "llm_cache": [
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+        IndexModel([("last_used_at", ASCENDING)], name="last_used_at_1"),
+    ],
+    # raw collection of app.services.job_coordinator: one plan document per job (_id = job
+    # name) and one lease document per partition of a run (finished ones expire after 30 days)
+    "job_leases": [
+        IndexModel([("job", ASCENDING), ("run_key", ASCENDING), ("index", ASCENDING)], name="job_1_run_key_1_index_1"),
+        IndexModel([("finished_at", ASCENDING)], name="finished_at_ttl", expireAfterSeconds=30 * 24 * 60 * 60),
+    ],
+}
+
+
+async def check_indexes(document_models: List[Any]) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Compare each collection's indexes with the catalog and log a report.
+    init_beanie has already created the declared indexes, so this only reports
+    drift; nothing is created or dropped.
+
+    Report keys:
+    - missing: catalog indexes absent from the collection
+    - mismatched: catalog names whose keys differ on the collection (an older definition)
+    - undeclared: indexes on the collection that are not in the catalog
+    - unused: indexes with no recorded accesses since the server started ($indexStats)
+    """
+    report: Dict[str, Dict[str, List[str]]] = {}
+
+    for model in document_models:
+        collection = model.get_motor_collection()
+        declared = INDEX_CATALOG.get(collection.name, [])
+        declared_names = {idx.document["name"] for idx in declared}
+
+        existing = await collection.index_information()
+        missing = [idx.document["name"] for idx in declared if idx.document["name"] not in existing]
+        mismatched = [
+            idx.document["name"]
+            for idx in declared
+            if idx.document["name"] in existing
+            and list(idx.document["key"].items()) != [tuple(key) for key in existing[idx.document["name"]]["key"]]
+        ]
+
+        unused: List[str] = []
+        try:
+            async for stat in collection.aggregate([{"$indexStats": {}}]):
+                if stat["name"] != "_id_" and stat.get("accesses", {}).get("ops", 0) == 0:
+                    unused.append(stat["name"])
+        except Exception as e:
+            # $indexStats needs clusterMonitor privileges on some deployments
+            logger.debug(f"$indexStats unavailable for {collection.name}: {e}")
+
+        report[collection.name] = {
+            "missing": sorted(missing),
+            "mismatched": sorted(mismatched),
+            "undeclared": sorted(set(existing) - declared_names - {"_id_"}),
+            "unused": sorted(unused),
+        }
+
+    for collection_name, entry in report.items():
+        if entry["missing"]:
+            logger.warning(f"Catalog indexes missing on {collection_name}: {entry['missing']}")
+        if entry["mismatched"]:
+            logger.warning(f"Indexes on {collection_name} differ from the catalog: {entry['mismatched']}")
+        if entry["undeclared"]:
+            logger.warning(f"Indexes on {collection_name} not in catalog: {entry['undeclared']}")
+        if entry["unused"]:
+            logger.info(f"Indexes on {collection_name} with no accesses since server start: {entry['unused']}")
+
+    logger.info(f"Index check finished for {len(report)} collections")
+    return report
@@ -0,0 +1,171 @@
+"""
+Data migrations.
+Run them through manage.py, e.g. `python manage.py normalize-links`.
+"""
+
+from bson import DBRef, ObjectId
+from pymongo import UpdateOne
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+MIGRATION_STATE_COLLECTION = "migration_state"
+
+# collection -> [(link field, target collection)]
+LINK_FIELDS: Dict[str, List[Tuple[str, str]]] = {
+    "users": [("child_profile", "children")],
+    "children": [("parent", "users")],
+    "child_development_assessments": [("child", "children"), ("parent", "users")],
+    "child_tasks": [("child", "children"), ("task", "tasks")],
+    "rewards": [("created_by", "users")],
+    "child_rewards": [("child", "children"), ("reward", "rewards")],
+    "redemption_requests": [("child", "children"), ("reward", "rewards")],
+    "game_sessions": [("child", "children"), ("game", "mini_games")],
+    "interaction_logs": [("child", "children")],
+    "reports": [("child", "children")],
+}
+
+
+def _legacy_link_query(field: str) -> Dict[str, Any]:
+    """Match documents whose link field is set but is not a DBRef."""
+    return {
+        field: {"$exists": True, "$ne": None},
+        f"{field}.$ref": {"$exists": False},
+    }
+
+
+def _to_dbref(value: Any, target_collection: str) -> Optional[DBRef]:
+    """
+    Convert a legacy link value to a canonical DBRef.
+    Handles embedded documents ({"_id": ...}), raw ObjectIds and ObjectId strings.
+    Returns None if the value cannot be converted.
+    """
+    if isinstance(value, DBRef):
+        return None
+    if isinstance(value, dict):
+        value = value.get("_id", value.get("id"))
+    if isinstance(value, ObjectId):
+        return DBRef(target_collection, value)
+    if isinstance(value, str) and ObjectId.is_valid(value):
+        return DBRef(target_collection, ObjectId(value))
+    return None
+
+
+def link_in_query(field: str, ids: List[ObjectId]) -> Dict[str, Any]:
+    """
+    Match documents whose link field points to any of `ids`: as a DBRef
+    ("<field>.$id", indexed) or, until normalize-links has run, in a legacy
+    format (embedded document, raw ObjectId or ObjectId string; see _to_dbref).
+    With STRICT_LINK_QUERIES only the DBRef form is matched.
+    """
+    from app.config import settings
+
+    dbref_query = {f"{field}.$id": {"$in": ids}}
+    if settings.STRICT_LINK_QUERIES:
+        return dbref_query
+    values = list(ids) + [str(obj_id) for obj_id in ids]
+    return {"$or": [
+        dbref_query,
+        {field: {"$in": values}},
+        {f"{field}._id": {"$in": values}},
+        {f"{field}.id": {"$in": values}},
+    ]}
+
+
+async def count_legacy_links(db) -> Dict[str, int]:
+    """Count documents that still store a link in a legacy format, per collection.field."""
+    counts = {}
+    for collection_name, fields in LINK_FIELDS.items():
+        for field, _ in fields:
+            counts[f"{collection_name}.{field}"] = await db[collection_name].count_documents(
+                _legacy_link_query(field)
+            )
+    return counts
+
+
+async def normalize_link_formats(
+    db,
+    batch_size: int = 500,
+    progress: Callable[[str], None] = print,
+) -> Dict[str, Dict[str, int]]:
+    """
+    Rewrite every legacy link (embedded dict / raw id) to a DBRef.
+
+    Work is done per collection.field in _id order. After each batch the last
+    processed _id is stored in the migration_state collection, so an interrupted
+    run resumes where it stopped; the state is cleared when a pass completes, so
+    the next run scans the whole collection again (e.g. for legacy links written
+    by old workers during a rollout). Values that cannot be converted are counted
+    as skipped and left untouched.
+    """
+    state_collection = db[MIGRATION_STATE_COLLECTION]
+    summary: Dict[str, Dict[str, int]] = {}
+
+    for collection_name, fields in LINK_FIELDS.items():
+        collection = db[collection_name]
+        for field, target_collection in fields:
+            key = f"{collection_name}.{field}"
+            state_id = f"normalize_links:{key}"
+            state = await state_collection.find_one({"_id": state_id}) or {}
+
+            query = _legacy_link_query(field)
+            if state.get("last_id") is not None:
+                query["_id"] = {"$gt": state["last_id"]}
+
+            remaining = await collection.count_documents(query)
+            if remaining == 0 and state:
+                # Interrupted right after its last batch: the pass is complete
+                await state_collection.delete_one({"_id": state_id})
+                state = {}
+                query = _legacy_link_query(field)
+                remaining = await collection.count_documents(query)
+
+            converted = state.get("converted", 0)
+            skipped = state.get("skipped", 0)
+            if remaining == 0:
+                summary[key] = {"converted": converted, "skipped": skipped}
+                continue
+
+            progress(f"🔧 {key}: {remaining} legacy links to normalize")
+            processed = 0
+            last_id = state.get("last_id")
+
+            while True:
+                batch = await collection.find(query, {field: 1}).sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+                if not batch:
+                    break
+
+                operations = []
+                for doc in batch:
+                    dbref = _to_dbref(doc.get(field), target_collection)
+                    if dbref is None:
+                        skipped += 1
+                        continue
+                    operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": {field: dbref}}))
+
+                if operations:
+                    await collection.bulk_write(operations, ordered=False)
+                    converted += len(operations)
+
+                processed += len(batch)
+                last_id = batch[-1]["_id"]
+                query["_id"] = {"$gt": last_id}
+                await state_collection.update_one(
+                    {"_id": state_id},
+                    {"$set": {
+                        "last_id": last_id,
+                        "converted": converted,
+                        "skipped": skipped,
+                        "updated_at": datetime.utcnow(),
+                    }},
+                    upsert=True,
+                )
+                progress(f"   {key}: {processed}/{remaining} processed ({converted} converted, {skipped} skipped)")
+
+            await state_collection.delete_one({"_id": state_id})
+            summary[key] = {"converted": converted, "skipped": skipped}
+
+    logger.info(f"Link normalization finished: {summary}")
+    return summary
@@ -0,0 +1,39 @@
+"""
+Keyset (cursor) pagination helpers.
+Lists are sorted by (<datetime field> desc, _id desc); the cursor is an opaque
+token encoding the last returned (value, _id) pair. List endpoints keep
+returning plain JSON arrays and send the next cursor in the X-Next-Cursor header.
+"""
+
+from bson import ObjectId
+from datetime import datetime
+from typing import Any, Dict, Tuple
+import base64
+import json
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort_value: datetime, doc_id: Any) -> str:
+    """Opaque cursor for the position right after (sort_value, doc_id)."""
+    payload = json.dumps({"v": sort_value.isoformat(), "id": str(doc_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    """Decode a cursor produced by encode_cursor. Raises ValueError if it is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        return datetime.fromisoformat(payload["v"]), ObjectId(payload["id"])
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def keyset_filter(field: str, cursor: str) -> Dict[str, Any]:
+    """Query matching documents after the cursor in (field desc, _id desc) order."""
+    sort_value, doc_id = decode_cursor(cursor)
+    return {"$or": [
+        {field: {"$lt": sort_value}},
+        {field: sort_value, "_id": {"$lt": doc_id}},
+    ]}
@@ -0,0 +1,116 @@
+"""
+Reusable MongoDB aggregation pipelines.
+Link fields are stored as DBRefs; "$<field>.$id" is not a valid field path in
+aggregation expressions, so dbref_id() extracts the referenced _id instead.
+"""
+
+from bson import ObjectId
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+
+def dbref_id(field: str) -> Dict[str, Any]:
+    """Aggregation expression returning the _id referenced by the DBRef in `field`."""
+    return {
+        "$arrayElemAt": [
+            {
+                "$map": {
+                    "input": {
+                        "$filter": {
+                            "input": {"$objectToArray": f"${field}"},
+                            "cond": {"$eq": ["$$this.k", {"$literal": "$id"}]},
+                        }
+                    },
+                    "in": "$$this.v",
+                }
+            },
+            0,
+        ]
+    }
+
+
+def child_task_stats_pipeline(child_id: ObjectId) -> List[Dict[str, Any]]:
+    """
+    Per-child task statistics in one round trip.
+
+    Produces a single document:
+    - by_status: [{"_id": status, "count": n}]
+    - library: [{"_id": {"category", "status", "day"}, "count": n, "difficulty": sum}]
+      for library tasks (category/difficulty come from the embedded task_snapshot,
+      or from the linked Task document for tasks without one; day is the
+      completion date "YYYY-MM-DD" for completed tasks, else None)
+    """
+    return [
+        {"$match": {"child.$id": child_id}},
+        {"$project": {
+            "status": 1,
+            "task": 1,
+            "completed_at": 1,
+            "task_snapshot.category": 1,
+            "task_snapshot.difficulty": 1,
+        }},
+        {"$facet": {
+            "by_status": [
+                {"$group": {"_id": "$status", "count": {"$sum": 1}}},
+            ],
+            "library": [
+                {"$match": {"task": {"$type": "object"}}},
+                # Only tasks without a snapshot need the lookup (null matches no Task)
+                {"$project": {
+                    "status": 1,
+                    "completed_at": 1,
+                    "task_snapshot": 1,
+                    "task_id": {"$cond": [{"$ifNull": ["$task_snapshot", False]}, None, dbref_id("task")]},
+                }},
+                {"$lookup": {
+                    "from": "tasks",
+                    "localField": "task_id",
+                    "foreignField": "_id",
+                    "as": "task_doc",
+                }},
+                {"$project": {
+                    "status": 1,
+                    "completed_at": 1,
+                    "category": {"$ifNull": ["$task_snapshot.category", {"$arrayElemAt": ["$task_doc.category", 0]}]},
+                    "difficulty": {"$ifNull": ["$task_snapshot.difficulty", {"$arrayElemAt": ["$task_doc.difficulty", 0]}]},
+                }},
+                {"$match": {"category": {"$ne": None}}},
+                {"$group": {
+                    "_id": {
+                        "category": "$category",
+                        "status": "$status",
+                        "day": {"$cond": [
+                            {"$and": [{"$eq": ["$status", "completed"]}, {"$ne": [{"$ifNull": ["$completed_at", None]}, None]}]},
+                            {"$dateToString": {"format": "%Y-%m-%d", "date": "$completed_at"}},
+                            None,
+                        ]},
+                    },
+                    "count": {"$sum": 1},
+                    "difficulty": {"$sum": {"$ifNull": ["$difficulty", 0]}},
+                }},
+            ],
+        }},
+    ]
+
+
+def completions_by_child_pipeline(
+    period_start: datetime,
+    period_end: datetime,
+    child_ids: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Completed ChildTasks per child in [period_start, period_end] (served by the
+    status/completed_at index), optionally restricted by a condition on the child
+    _id (e.g. a range). Produces {"_id": child_id, "count": n} per child with at
+    least one completion.
+    """
+    match: Dict[str, Any] = {
+        "status": "completed",
+        "completed_at": {"$gte": period_start, "$lte": period_end},
+    }
+    if child_ids:
+        match["child.$id"] = child_ids
+    return [
+        {"$match": match},
+        {"$group": {"_id": dbref_id("child"), "count": {"$sum": 1}}},
+    ]
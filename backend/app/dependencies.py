@@ -3,9 +3,12 @@ from app.models.child_models import Child
 from app.models.user_models import User, UserRole
 from app.models.childtask_models import ChildTask
 from app.services.auth import get_current_user
-from typing import List, Optional
+from app.config import settings
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 import logging
 
+logger = logging.getLogger(__name__)
+
 async def verify_child_ownership(
     child_id: str,
     current_user: User = Depends(get_current_user)
@@ -18,7 +21,7 @@ async def verify_child_ownership(
     child_id = child_id.strip()
     
     child = await Child.get(child_id)
-    if not child:
+    if not child or child.deleted_at:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Child not found."
@@ -141,6 +144,18 @@ async def verify_parent_token(
         )
     return current_user
 
+async def verify_admin_token(
+    current_user: User = Depends(get_current_user)
+) -> User:
+    """Verify that the current user is an operator (email listed in ADMIN_EMAILS)"""
+    admin_emails = {email.strip().lower() for email in settings.ADMIN_EMAILS.split(",") if email.strip()}
+    if current_user.email.lower() not in admin_emails:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Forbidden: This endpoint requires admin access."
+        )
+    return current_user
+
 async def verify_child_token(
     current_user: User = Depends(get_current_user),
     allowed_paths: Optional[List[str]] = None
@@ -206,31 +221,35 @@ async def get_child_from_token(
         if child_id:
             child = await Child.get(child_id)
     
-    if not child:
+    if not child or child.deleted_at:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Child profile not found."
         )
     return child
 
-async def get_user_children(user: User) -> List[Child]:
+async def get_user_children(user: User, include_deleted: bool = False) -> List[Child]:
     """
     Get all children belonging to a user.
     Handles both Link references and nested object formats.
+    With STRICT_LINK_QUERIES enabled only the indexed DBRef query is used
+    (run `python manage.py normalize-links` first).
+    Children being deleted (deleted_at set) are left out unless include_deleted.
     """
     from app.models.child_models import Child
-    from beanie import Link
     
     
+    visible = {} if include_deleted else {"deleted_at": None}
     try:
-        children = await Child.find(Child.parent == Link(user, User)).to_list()
-        if children:
+        children = await Child.find({"parent.$id": user.id, **visible}).to_list()
+        if children or settings.STRICT_LINK_QUERIES:
             return children
     except Exception:
-        pass
+        if settings.STRICT_LINK_QUERIES:
+            raise
     
     
-    all_children = await Child.find_all().to_list()
+    all_children = await Child.find(visible).to_list()
     user_children = []
     user_id_str = str(user.id)
     
@@ -255,22 +274,26 @@ async def get_user_children(user: User) -> List[Child]:
         if parent_id == user_id_str:
             user_children.append(child)
     
+    if user_children:
+        logger.warning(
+            f"Found {len(user_children)} children of user {user.id} via full scan; run `python manage.py normalize-links`"
+        )
     return user_children
 
 async def get_child_tasks_by_child(child: Child) -> List[ChildTask]:
     """
     Get all ChildTasks belonging to a child.
     Handles both Link references and nested object formats.
+    With STRICT_LINK_QUERIES enabled only the indexed DBRef query is used
+    (run `python manage.py normalize-links` first).
     """
-    from beanie import Link
-    
-    
     try:
-        tasks = await ChildTask.find(ChildTask.child == Link(child, Child)).to_list()
-        if tasks:
+        tasks = await ChildTask.find({"child.$id": child.id}).to_list()
+        if tasks or settings.STRICT_LINK_QUERIES:
             return tasks
     except Exception:
-        pass
+        if settings.STRICT_LINK_QUERIES:
+            raise
     
     
     all_tasks = await ChildTask.find_all().to_list()
@@ -298,6 +321,10 @@ async def get_child_tasks_by_child(child: Child) -> List[ChildTask]:
         if task_child_id == child_id_str:
             child_tasks.append(task)
     
+    if child_tasks:
+        logger.warning(
+            f"Found {len(child_tasks)} tasks of child {child.id} via full scan; run `python manage.py normalize-links`"
+        )
     return child_tasks
 
 def extract_id_from_link(link_ref) -> Optional[str]:
@@ -371,6 +398,72 @@ async def fetch_link_or_get_object(link_ref, model_class):
     
     return None
 
+class LinkLoader:
+    """
+    Request-scoped batching loader for Link references (DataLoader style).
+    load_many() collects the referenced ids and resolves all uncached ones with a
+    single `$in` query per model; results are cached for the rest of the request.
+    """
+
+    def __init__(self):
+        self._cache: Dict[Tuple[type, str], Any] = {}
+
+    async def load_many(self, link_refs: Iterable[Any], model_class) -> List[Optional[Any]]:
+        """Resolve link references to documents, preserving order (None if missing)."""
+        from bson import ObjectId
+
+        keys: List[Optional[str]] = []
+        missing: Dict[str, ObjectId] = {}
+        for link_ref in link_refs:
+            if link_ref is None:
+                keys.append(None)
+                continue
+            if isinstance(link_ref, model_class):
+                obj_id = str(link_ref.id)
+                self._cache[(model_class, obj_id)] = link_ref
+                keys.append(obj_id)
+                continue
+            obj_id = extract_id_from_link(link_ref)
+            if not obj_id or not ObjectId.is_valid(obj_id):
+                keys.append(None)
+                continue
+            keys.append(obj_id)
+            if (model_class, obj_id) not in self._cache:
+                missing[obj_id] = ObjectId(obj_id)
+
+        if missing:
+            docs = await model_class.find({"_id": {"$in": list(missing.values())}}).to_list()
+            for doc in docs:
+                self._cache[(model_class, str(doc.id))] = doc
+            for obj_id in missing:
+                self._cache.setdefault((model_class, obj_id), None)
+
+        return [self._cache.get((model_class, key)) if key else None for key in keys]
+
+    async def load(self, link_ref, model_class) -> Optional[Any]:
+        """Resolve a single link reference (served from the cache when possible)."""
+        return (await self.load_many([link_ref], model_class))[0]
+
+    async def load_task_templates(self, child_tasks: Iterable[Any]) -> List[Optional[Any]]:
+        """
+        Library task fields for each ChildTask: its embedded task_snapshot, or the
+        linked Task for tasks assigned before snapshots existed (None for custom tasks).
+        Only tasks without a snapshot are fetched.
+        """
+        from app.models.task_models import Task
+
+        child_tasks = list(child_tasks)
+        to_fetch = [ct.task if ct.task and not ct.task_snapshot else None for ct in child_tasks]
+        fetched = await self.load_many(to_fetch, Task)
+        return [
+            (ct.task_snapshot or task) if ct.task else None
+            for ct, task in zip(child_tasks, fetched)
+        ]
+
+def get_link_loader() -> LinkLoader:
+    """FastAPI dependency: one LinkLoader per request."""
+    return LinkLoader()
+
 async def ensure_link_references_for_save(child_task, child):
     """
     Ensure Link references are properly set before saving ChildTask.
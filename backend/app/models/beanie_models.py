@@ -7,6 +7,8 @@ from app.models.gamesession_models import GameSession
 from app.models.interactionlog_models import InteractionLog
 from app.models.report_models import Report
 from app.models.childtask_models import ChildTask, UnityType as ChildTaskUnityType
+from app.models.childstats_models import ChildStats
+from app.models.job_models import BackgroundJob, JobStatus
 
 __all__ = [
     "User",
@@ -24,4 +26,7 @@ __all__ = [
     "Report",
     "ChildTask",
     "ChildTaskUnityType",
+    "ChildStats",
+    "BackgroundJob",
+    "JobStatus",
 ]
\ No newline at end of file
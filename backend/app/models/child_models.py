@@ -3,6 +3,7 @@ from datetime import datetime
 from typing import Optional, Dict, List
 from pydantic import Field
 from app.models.user_models import User
+from app.db.indexes import INDEX_CATALOG
 
 class Child(Document):
     parent: Link[User]
@@ -23,9 +24,11 @@ class Child(Document):
     current_coins: int = 0
     level: int = 1
     last_auto_generated_at: Optional[datetime] = None  # Track last auto-generation time
+    deleted_at: Optional[datetime] = None  # Set when a delete job is started; hidden until the job removes it
 
     class Settings:
         name = "children"
+        indexes = INDEX_CATALOG["children"]
 
 class ChildDevelopmentAssessment(Document):
     child: Link[Child]
@@ -37,3 +40,4 @@ class ChildDevelopmentAssessment(Document):
 
     class Settings:
         name = "child_development_assessments"
+        indexes = INDEX_CATALOG["child_development_assessments"]
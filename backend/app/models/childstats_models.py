@@ -0,0 +1,24 @@
+from beanie import Document
+from pydantic import Field
+from datetime import datetime
+from typing import Dict
+from app.db.indexes import INDEX_CATALOG
+
+class ChildStats(Document):
+    """
+    Precomputed counters for one child; the document _id is the child's id.
+    Maintained with $inc by app/services/child_stats.py on every ChildTask /
+    ChildReward state change. Category counters only cover library tasks.
+    """
+    status_counts: Dict[str, int] = {}                          # status -> n
+    category_status_counts: Dict[str, Dict[str, int]] = {}      # category -> status -> n
+    category_completed_difficulty: Dict[str, int] = {}          # category -> sum of difficulty (completed)
+    completions_by_day: Dict[str, Dict[str, int]] = {}          # "YYYY-MM-DD" -> category -> n (recent days only)
+    badges_earned: int = 0                                      # ChildReward documents
+    redemptions_approved: int = 0
+    version: int = 0                                            # bumped by every $inc (rebuilds check it)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "child_stats"
+        indexes = INDEX_CATALOG["child_stats"]
@@ -3,8 +3,9 @@ from datetime import datetime
 from typing import Optional, Union
 from pydantic import BaseModel
 from app.models.child_models import Child
-from app.models.task_models import Task, TaskCategory, TaskType
+from app.models.task_models import Task, TaskCategory, TaskType, UnityType as TaskUnityType
 import enum
+from app.db.indexes import INDEX_CATALOG
 
 class UnityType(str, enum.Enum):
     LIFE = "life"           
@@ -36,11 +37,40 @@ class TaskData(BaseModel):
     reward_coins: int = 50
     reward_badge_name: Optional[str] = None
 
+# Copy of the library Task's fields taken when the task is assigned, so reads
+# don't have to join the tasks collection. Kept in sync with library edits by
+# app.services.task_snapshots.
+class TaskSnapshot(BaseModel):
+    title: str
+    description: str
+    category: TaskCategory
+    type: TaskType
+    difficulty: int
+    suggested_age_range: str
+    reward_coins: int = 50
+    reward_badge_name: Optional[str] = None
+    unity_type: Optional[TaskUnityType] = None
+
+    @classmethod
+    def from_task(cls, task: Task) -> "TaskSnapshot":
+        return cls(
+            title=task.title,
+            description=task.description,
+            category=task.category,
+            type=task.type,
+            difficulty=task.difficulty,
+            suggested_age_range=task.suggested_age_range,
+            reward_coins=task.reward_coins,
+            reward_badge_name=task.reward_badge_name,
+            unity_type=task.unity_type,
+        )
+
 class ChildTask(Document):
     child: Link[Child]
     # Support both library tasks (Link) and custom tasks (embedded)
     task: Optional[Link[Task]] = None
     task_data: Optional[TaskData] = None  # For custom tasks not in library
+    task_snapshot: Optional[TaskSnapshot] = None  # Library task fields at assignment (see TaskSnapshot)
     status: ChildTaskStatus = ChildTaskStatus.ASSIGNED
     assigned_at: datetime = datetime.utcnow()
     completed_at: Optional[datetime] = None
@@ -61,3 +91,4 @@ class ChildTask(Document):
 
     class Settings:
         name = "child_tasks"
+        indexes = INDEX_CATALOG["child_tasks"]
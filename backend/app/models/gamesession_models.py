@@ -3,6 +3,7 @@ from datetime import datetime
 from typing import Optional, Dict
 from app.models.child_models import Child
 from app.models.minigame_models import MiniGame
+from app.db.indexes import INDEX_CATALOG
 
 class GameSession(Document):
     child: Link[Child]
@@ -13,4 +14,5 @@ class GameSession(Document):
     behavior_data: Optional[Dict] = None
 
     class Settings:
-        name = "game_sessions"
\ No newline at end of file
+        name = "game_sessions"
+        indexes = INDEX_CATALOG["game_sessions"]
\ No newline at end of file
@@ -2,6 +2,7 @@ from beanie import Document, Link
 from datetime import datetime
 from app.models.child_models import Child
 from typing import Optional
+from app.db.indexes import INDEX_CATALOG
 
 class InteractionLog(Document):
     child: Link[Child]
@@ -11,4 +12,5 @@ class InteractionLog(Document):
     detected_emotion: Optional[str] = None
 
     class Settings:
-        name = "interaction_logs"
\ No newline at end of file
+        name = "interaction_logs"
+        indexes = INDEX_CATALOG["interaction_logs"]
\ No newline at end of file
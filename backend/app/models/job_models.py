@@ -0,0 +1,41 @@
+from beanie import Document, PydanticObjectId
+from pydantic import Field
+from datetime import datetime
+from typing import Any, Dict, Optional
+import enum
+from app.db.indexes import INDEX_CATALOG
+
+class JobStatus(str, enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class BackgroundJob(Document):
+    """
+    A long-running operation started by a request (e.g. cascade delete).
+    The job runs after the response is sent; clients poll GET /jobs/{id}.
+    While running, the worker holds a lease on it (lease_owner / lease_expires_at)
+    so the job is resumed elsewhere if that worker stops (app.services.jobs).
+    Runs of scheduled jobs are recorded too (kind "scheduled:<job>", no owner;
+    progress holds the run's counters).
+    """
+    kind: str
+    owner_id: Optional[PydanticObjectId] = None     # user who started the job
+    params: Dict[str, Any] = {}
+    status: JobStatus = JobStatus.PENDING
+    total_steps: int = 0
+    completed_steps: int = 0
+    progress: Dict[str, int] = {}                   # step name -> documents processed
+    error: Optional[str] = None
+    attempts: int = 0
+    lease_owner: Optional[str] = None               # worker id running the job
+    lease_expires_at: Optional[datetime] = None
+    status_token_hash: Optional[str] = None         # lets the holder of the token read the status without an account
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Settings:
+        name = "background_jobs"
+        indexes = INDEX_CATALOG["background_jobs"]
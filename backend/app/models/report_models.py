@@ -2,6 +2,7 @@ from beanie import Document, Link
 from datetime import datetime
 from typing import Optional, Dict
 from app.models.child_models import Child
+from app.db.indexes import INDEX_CATALOG
 
 class Report(Document):
     child: Link[Child]
@@ -13,4 +14,5 @@ class Report(Document):
     suggestions: Optional[Dict]
 
     class Settings:
-        name = "reports"
\ No newline at end of file
+        name = "reports"
+        indexes = INDEX_CATALOG["reports"]
\ No newline at end of file
@@ -3,6 +3,7 @@ from typing import Optional, TYPE_CHECKING
 import enum
 from datetime import datetime
 from app.models.child_models import Child
+from app.db.indexes import INDEX_CATALOG
 
 if TYPE_CHECKING:
     from app.models.user_models import User
@@ -28,6 +29,7 @@ class Reward(Document):
 
     class Settings:
         name = "rewards"
+        indexes = INDEX_CATALOG["rewards"]
 
 class ChildReward(Document):
     """Rewards owned by a child (either earned from tasks or redeemed from shop)"""
@@ -38,6 +40,7 @@ class ChildReward(Document):
 
     class Settings:
         name = "child_rewards"
+        indexes = INDEX_CATALOG["child_rewards"]
 
 class RedemptionRequest(Document):
     """Request from child to redeem a reward using coins"""
@@ -50,4 +53,5 @@ class RedemptionRequest(Document):
     processed_by: Optional[str] = None  
 
     class Settings:
-        name = "redemption_requests"
\ No newline at end of file
+        name = "redemption_requests"
+        indexes = INDEX_CATALOG["redemption_requests"]
\ No newline at end of file
@@ -1,6 +1,7 @@
 from beanie import Document
 from typing import Optional
 import enum
+from app.db.indexes import INDEX_CATALOG
 
 class UnityType(str, enum.Enum):
     LIFE = "life"           
@@ -34,4 +35,5 @@ class Task(Document):
     unity_type: Optional[UnityType] = None  
 
     class Settings:
-        name = "tasks"  
\ No newline at end of file
+        name = "tasks"
+        indexes = INDEX_CATALOG["tasks"]
\ No newline at end of file
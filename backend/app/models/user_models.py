@@ -3,6 +3,7 @@ from pydantic import EmailStr
 from datetime import datetime
 from typing import Optional, TYPE_CHECKING
 import enum
+from app.db.indexes import INDEX_CATALOG
 
 if TYPE_CHECKING:
     from app.models.child_models import Child
@@ -24,4 +25,5 @@ class User(Document):
     updated_at: datetime | None = None
 
     class Settings:
-        name = "users"
\ No newline at end of file
+        name = "users"
+        indexes = INDEX_CATALOG["users"]
\ No newline at end of file
@@ -130,7 +130,7 @@ async def register_child(
     
     
     child = await Child.get(request.child_id)
-    if not child:
+    if not child or child.deleted_at:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Child profile not found."
@@ -302,33 +302,21 @@ async def delete_account(
         )
     
     
-    from app.models.child_models import Child
     from app.dependencies import get_user_children
-    children = await get_user_children(current_user)
+    from app.services.cascade_delete import start_account_delete
+    # Including children whose own delete job is still running
+    children = await get_user_children(current_user, include_deleted=True)
     
-    for child in children:
-        
-        from app.models.childtask_models import ChildTask
-        from app.models.reward_models import ChildReward
-        from app.models.child_models import ChildDevelopmentAssessment
-        from app.models.gamesession_models import GameSession
-        from app.models.interactionlog_models import InteractionLog
-        
-        await ChildTask.find(ChildTask.child.id == child.id).delete()  # type: ignore
-        await ChildReward.find(ChildReward.child.id == child.id).delete()  # type: ignore
-        await ChildDevelopmentAssessment.find(
-            ChildDevelopmentAssessment.child.id == child.id  # type: ignore
-        ).delete()
-        await GameSession.find(GameSession.child.id == child.id).delete()  # type: ignore
-        await InteractionLog.find(InteractionLog.child.id == child.id).delete()  # type: ignore
-        
-        
-        await child.delete()
+    # Children, their data and finally the account are removed by a background job.
+    # The account will be gone, so the job status is read with the status token
+    # (X-Job-Token header of GET /jobs/{job_id}).
+    job, status_token = await start_account_delete(current_user.id, [child.id for child in children])
     
-    
-    await current_user.delete()
-    
-    return {"message": "Account and all associated data deleted successfully"}
+    return {
+        "message": "Account and all associated data are being deleted",
+        "job_id": str(job.id),
+        "status_token": status_token,
+    }
 
 @router.get("/me/notification-settings", response_model=dict)
 async def get_notification_settings(
@@ -21,7 +21,7 @@ class TokenResponse(BaseModel):
 async def authenticate_child(username: str, password: str) -> Child:
     """Authenticate child by username and password."""
     child = await Child.find_one(Child.username == username)
-    if not child or not child.password_hash or not verify_password(password, child.password_hash):
+    if not child or child.deleted_at or not child.password_hash or not verify_password(password, child.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid username or password."
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException, status, Depends
 from beanie import Link
+from bson import ObjectId
 from app.models.child_models import Child, ChildDevelopmentAssessment
 from app.models.user_models import User
 from app.schemas.schemas import ChildCreate, ChildPublic, ChildUpdate
@@ -103,7 +104,7 @@ async def create_child(
         else:
             try:
                 logging.info(f"🔍 Calling OpenAI API to analyze assessment for {child.name}...")
-                openai_result = analyze_assessment_with_chatgpt(
+                openai_result = await analyze_assessment_with_chatgpt(
                     child_info=child_info,
                     assessment_answers=assessment_answers,
                     questions_data=ASSESSMENT_QUESTIONS
@@ -248,43 +249,13 @@ async def delete_child(
     child_id: str,
     child: Child = Depends(verify_child_ownership)
 ):
-    """Delete a child and all associated data (tasks, rewards, assessments)."""
-    from app.models.childtask_models import ChildTask
-    from app.models.reward_models import ChildReward
-    from app.models.child_models import ChildDevelopmentAssessment
-    from app.models.gamesession_models import GameSession
-    from app.models.interactionlog_models import InteractionLog
-    
-    # Delete all related data using child.id directly
-    child_id_str = str(child.id)
-    
-    # Get all records and filter by child_id
-    all_tasks = await ChildTask.find_all().to_list()
-    for task in all_tasks:
-        if extract_id_from_link(task.child) == child_id_str:
-            await task.delete()
-    
-    all_rewards = await ChildReward.find_all().to_list()
-    for reward in all_rewards:
-        if extract_id_from_link(reward.child) == child_id_str:
-            await reward.delete()
-    
-    all_assessments = await ChildDevelopmentAssessment.find_all().to_list()
-    for assessment in all_assessments:
-        if extract_id_from_link(assessment.child) == child_id_str:
-            await assessment.delete()
-    
-    all_sessions = await GameSession.find_all().to_list()
-    for session in all_sessions:
-        if extract_id_from_link(session.child) == child_id_str:
-            await session.delete()
-    
-    all_logs = await InteractionLog.find_all().to_list()
-    for log in all_logs:
-        if extract_id_from_link(log.child) == child_id_str:
-            await log.delete()
+    """
+    Delete a child and all associated data (tasks, rewards, redemptions, assessments,
+    sessions, chat logs, reports). The data is removed by a background job; poll
+    GET /jobs/{job_id} for progress.
+    """
+    from app.services.cascade_delete import start_child_delete
     
-    # Delete the child
-    await child.delete()
+    job = await start_child_delete(child.id, ObjectId(extract_id_from_link(child.parent)))
     
-    return {"message": f"Child {child_id} and all associated data deleted successfully."}
\ No newline at end of file
+    return {"message": f"Child {child_id} is being deleted.", "job_id": str(job.id)}
\ No newline at end of file
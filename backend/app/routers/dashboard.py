@@ -1,15 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from beanie import Link
 from app.models.child_models import Child
-from app.models.childtask_models import ChildTask, ChildTaskStatus, ChildTaskPriority
+from app.models.childtask_models import ChildTask, ChildTaskStatus, ChildTaskPriority, TaskSnapshot
 from app.models.reward_models import ChildReward
 from app.models.task_models import Task, TaskCategory, TaskType, UnityType as TaskUnityType
 from app.models.report_models import Report
 from app.models.childtask_models import UnityType as ChildTaskUnityType
-from app.dependencies import verify_child_ownership, get_child_tasks_by_child, fetch_link_or_get_object, extract_id_from_link, verify_parent_token
+from app.dependencies import verify_child_ownership, get_child_tasks_by_child, extract_id_from_link, verify_parent_token, LinkLoader, get_link_loader
 from app.services.llm import generate_openai_response
+from app.services.prompt_budget import compact_json
+from app.services.child_stats import get_child_stats, rebuild_child_stats, record_task_transition, completions_window_start
+from app.services.job_coordinator import ChildPartition, iterate_child_pages
+from app.config import settings
 from app.models.user_models import User
 from app.schemas.schemas import ChildTaskWithDetails, TaskPublic
+from pymongo import DESCENDING, UpdateOne
 from typing import Dict, List, Optional, Any
 from pydantic import BaseModel
 from datetime import datetime, timedelta
@@ -26,6 +31,8 @@ class CategoryProgressItem(BaseModel):
     total: int
     percentage: int
 
+DASHBOARD_CATEGORIES = ['Independence', 'Logic', 'Physical', 'Creativity', 'Social', 'Academic']
+
 @router.get("/{child_id}", response_model=Dict)
 async def get_dashboard(
     child: Child = Depends(verify_child_ownership)
@@ -38,28 +45,19 @@ async def get_dashboard(
         - Task completion metrics (completed, total, rate)
         - Badge/reward count
         
-    All counts are calculated in real-time from database.
+    Counts come from the child's precomputed ChildStats document.
     Frontend should use child.coins directly.
     """
-    # Get all child tasks using optimized helper
-    tasks_for_child = await get_child_tasks_by_child(child)
+    stats = await get_child_stats(child.id)
     
     # Count completed tasks
-    tasks_completed = sum(
-        1 for t in tasks_for_child 
-        if t.status == ChildTaskStatus.COMPLETED
-    )
+    tasks_completed = stats.status_counts.get(ChildTaskStatus.COMPLETED.value, 0)
 
     # Count badges earned
-    child_id_str = str(child.id)
-    all_rewards = await ChildReward.find_all().to_list()
-    badges_earned = sum(
-        1 for r in all_rewards 
-        if extract_id_from_link(r.child) == child_id_str
-    )
+    badges_earned = stats.badges_earned
 
     # Total tasks
-    total_tasks = len(tasks_for_child)
+    total_tasks = sum(stats.status_counts.values())
 
     # Calculate completion rate
     completion_rate = round((tasks_completed / total_tasks * 100), 1) if total_tasks > 0 else 0
@@ -89,44 +87,18 @@ async def get_category_progress(
     - percentage: Completion percentage (0-100)
     
     Categories are normalized: IQ -> Logic, EQ -> Social
+    Only library tasks (linked Task documents) are counted.
     """
-    # Get all child tasks
-    child_tasks = await get_child_tasks_by_child(child)
+    stats = await get_child_stats(child.id)
     
-    # Initialize category map with all standard categories
-    categories = ['Independence', 'Logic', 'Physical', 'Creativity', 'Social', 'Academic']
+    # Only report standard categories
     category_map: Dict[str, Dict[str, int]] = {}
-    
-    for cat in categories:
-        category_map[cat] = {'completed': 0, 'total': 0}
-    
-    # Process tasks and normalize category names
-    for ct in child_tasks:
-        if not ct.task:
-            continue
-            
-        # Fetch task if it's a Link reference
-        task = await fetch_link_or_get_object(ct.task, Task)
-        
-        # Ensure task is actually a Task instance
-        if not task or not isinstance(task, Task):
-            continue
-            
-        if not hasattr(task, 'category') or not task.category:
-            continue
-        
-        # Normalize legacy categories (IQ -> Logic, EQ -> Social)
-        category = task.category
-        if category == 'IQ':
-            category = 'Logic'
-        elif category == 'EQ':
-            category = 'Social'
-        
-        # Only process known categories
-        if category in category_map:
-            category_map[category]['total'] += 1
-            if ct.status == ChildTaskStatus.COMPLETED:
-                category_map[category]['completed'] += 1
+    for cat in DASHBOARD_CATEGORIES:
+        status_counts = stats.category_status_counts.get(cat, {})
+        category_map[cat] = {
+            'completed': status_counts.get(ChildTaskStatus.COMPLETED.value, 0),
+            'total': sum(status_counts.values())
+        }
     
     # Build response with percentages
     result = []
@@ -194,31 +166,13 @@ async def get_emotion_analytics(
                     detail="Report does not belong to this child."
                 )
         else:
-            # Get most recent report for this child
+            # Most recent report for this child (child_1_generated_at_-1__id_-1 index)
             child_id_str = str(child.id)
-            logger.info(f"Looking for most recent report for child_id: {child_id_str}")
-            
-            # Try Beanie query first
-            try:
-                from beanie.operators import In
-                child_id_obj = child.id
-                child_reports = await Report.find(Report.child.id == child_id_obj).to_list()
-                logger.info(f"Found {len(child_reports)} reports using Beanie query")
-            except Exception as e:
-                logger.warning(f"Beanie query failed, falling back to manual filter: {e}")
-                child_reports = []
+            report = await Report.find({"child.$id": child.id}).sort(
+                [("generated_at", DESCENDING), ("_id", DESCENDING)]
+            ).first_or_none()
             
-            # Fallback: fetch all and filter manually
-            if not child_reports:
-                all_reports = await Report.find_all().to_list()
-                child_reports = []
-                for r in all_reports:
-                    r_child_id = extract_id_from_link(r.child) if hasattr(r, 'child') else None
-                    if r_child_id == child_id_str:
-                        child_reports.append(r)
-                logger.info(f"Found {len(child_reports)} reports using manual filter")
-            
-            if not child_reports:
+            if not report:
                 # No reports found - return empty analytics
                 logger.info(f"No reports found for child {child_id_str}. Returning empty analytics.")
                 return EmotionAnalyticsResponse(
@@ -230,11 +184,7 @@ async def get_emotion_analytics(
                     period_end=None,
                     report_id=None
                 )
-            else:
-                # Sort by generated_at descending and get most recent
-                child_reports.sort(key=lambda x: x.generated_at, reverse=True)
-                report = child_reports[0]
-                logger.info(f"Using most recent report: {report.id}, generated at: {report.generated_at}")
+            logger.info(f"Using most recent report: {report.id}, generated at: {report.generated_at}")
         
         # Extract emotion data from report
         insights = report.insights or {}
@@ -282,7 +232,8 @@ async def analyze_emotion_report_and_generate_tasks(
     child_id: str,
     request: AnalyzeEmotionReportRequest = AnalyzeEmotionReportRequest(),
     child: Child = Depends(verify_child_ownership),
-    current_user: User = Depends(verify_parent_token)
+    current_user: User = Depends(verify_parent_token),
+    loader: LinkLoader = Depends(get_link_loader)
 ):
     """
     Analyze emotion report and generate new tasks based on the analysis.
@@ -379,9 +330,9 @@ async def analyze_emotion_report_and_generate_tasks(
         # Get existing tasks to avoid duplicates
         all_child_tasks = await get_child_tasks_by_child(child)
         existing_task_titles = set()
-        for ct in all_child_tasks:
+        existing_tasks = await loader.load_task_templates(all_child_tasks)
+        for ct, task in zip(all_child_tasks, existing_tasks):
             if ct.task:
-                task = await fetch_link_or_get_object(ct.task, Task)
                 if task:
                     existing_task_titles.add(task.title.lower())
             elif ct.task_data:
@@ -406,14 +357,14 @@ CHILD INFORMATION:
 
 EMOTION ANALYSIS FROM REPORT:
 - Most Common Emotion: {most_common_emotion}
-- Emotion Trends: {json.dumps(emotion_trends, ensure_ascii=False)}
+- Emotion Trends: {compact_json(emotion_trends)}
 - Emotional Analysis: {emotional_analysis}
 
 REPORT SUMMARY:
 {report.summary_text}
 
 REPORT SUGGESTIONS:
-{json.dumps(report.suggestions, ensure_ascii=False, indent=2) if report.suggestions else 'None'}
+{compact_json(report.suggestions) if report.suggestions else 'None'}
 
 EXISTING TASK TITLES (avoid duplicates):
 {', '.join(list(existing_task_titles)[:20]) or 'None'}
@@ -444,7 +395,7 @@ Generate up to 20 tasks. Focus on emotional development and addressing the insig
         
         # Call LLM
         logger.info(f"Analyzing emotion report and generating tasks for child {child.name}")
-        llm_response = generate_openai_response(prompt, system_instruction, max_tokens=4000)
+        llm_response = await generate_openai_response(prompt, system_instruction, max_tokens=4000, call_site="report_tasks")
         
         # Parse JSON response
         try:
@@ -584,12 +535,14 @@ Generate up to 20 tasks. Focus on emotional development and addressing the insig
                 child_task = ChildTask(
                     child=child,  # type: ignore
                     task=task,  # type: ignore
+                    task_snapshot=TaskSnapshot.from_task(task),
                     status=ChildTaskStatus.UNASSIGNED,
                     unity_type=ChildTaskUnityType(unity_type_str),
                     assigned_at=datetime.utcnow(),
                     priority=ChildTaskPriority.MEDIUM
                 )
                 await child_task.insert()
+                await record_task_transition(child_task, None, ChildTaskStatus.UNASSIGNED, library_task=task)
                 inserted_count += 1  # Track successful insertions
                 
                 # Add to existing titles to avoid duplicates in this batch
@@ -657,8 +610,9 @@ Generate up to 20 tasks. Focus on emotional development and addressing the insig
                 recent_unassigned.sort(key=lambda x: x.assigned_at, reverse=True)
                 
                 # Build response from recent tasks
-                for ct in recent_unassigned[:inserted_count]:
-                    task = await fetch_link_or_get_object(ct.task, Task) if ct.task else None
+                recent_unassigned = recent_unassigned[:inserted_count]
+                recent_tasks = await loader.load_task_templates(recent_unassigned)
+                for ct, task in zip(recent_unassigned, recent_tasks):
                     if task:
                         try:
                             created_tasks.append(
@@ -676,7 +630,7 @@ Generate up to 20 tasks. Focus on emotional development and addressing the insig
                                     custom_category=ct.custom_category,
                                     unity_type=ct.unity_type.value if ct.unity_type else None,
                                     task=TaskPublic(
-                                        id=str(task.id),
+                                        id=extract_id_from_link(ct.task),
                                         title=task.title,
                                         description=task.description or "",
                                         category=task.category,
@@ -724,8 +678,9 @@ Generate up to 20 tasks. Focus on emotional development and addressing the insig
                 
                 # Build simplified response from recent tasks
                 simplified_tasks = []
-                for ct in recent_unassigned[:len(created_tasks)]:
-                    task = await fetch_link_or_get_object(ct.task, Task) if ct.task else None
+                recent_unassigned = recent_unassigned[:len(created_tasks)]
+                recent_tasks = await loader.load_task_templates(recent_unassigned)
+                for ct, task in zip(recent_unassigned, recent_tasks):
                     if task:
                         simplified_tasks.append(
                             ChildTaskWithDetails(
@@ -742,7 +697,7 @@ Generate up to 20 tasks. Focus on emotional development and addressing the insig
                                 custom_category=ct.custom_category,
                                 unity_type=ct.unity_type.value if ct.unity_type else None,
                                 task=TaskPublic(
-                                    id=str(task.id),
+                                    id=extract_id_from_link(ct.task),
                                     title=task.title,
                                     description=task.description or "",
                                     category=task.category,
@@ -779,7 +734,98 @@ Generate up to 20 tasks. Focus on emotional development and addressing the insig
 
 # ============== SKILLS DEVELOPMENT UPDATE ==============
 
-async def calculate_skills_from_task_history(child: Child, child_tasks: List[ChildTask]) -> Dict[str, int]:
+SKILL_NAMES = ["independence", "discipline", "emotional", "social", "logic"]
+
+def current_skill_scores(initial_traits: Optional[Dict[str, Any]]) -> Dict[str, int]:
+    """Current scores from initial_traits.overall_traits (50 for missing skills)."""
+    traits = (initial_traits or {}).get("overall_traits") or {}
+    return {skill: traits.get(skill, 50) for skill in SKILL_NAMES}
+
+def base_skill_scores(initial_traits: Optional[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Scores the task-history improvement is added to: initial_traits.baseline_traits
+    (the scores before the first skills update, stored by it), else the current scores.
+    Updates never build on their own output, so recomputing from the same task
+    history gives the same scores.
+    """
+    baseline = (initial_traits or {}).get("baseline_traits")
+    if baseline:
+        return {skill: baseline.get(skill, 50) for skill in SKILL_NAMES}
+    return current_skill_scores(initial_traits)
+
+def skill_scores(base_scores: Dict[str, int], category_stats: Dict[str, Dict[str, float]]) -> Dict[str, int]:
+    """
+    Apply the task-history improvement to the base scores.
+    category_stats: category -> {'total', 'completed', 'completed_difficulty', 'recent_completed'}
+    (library tasks; recent = completed in the last 7 days).
+    """
+    scores = dict(base_scores)
+    
+    # Calculate skill improvements based on task completion
+    # Independence and Discipline: from Independence category
+    if 'Independence' in category_stats:
+        stats = category_stats['Independence']
+        if stats['total'] > 0:
+            completion_rate = (stats['completed'] / stats['total']) * 100
+            avg_difficulty = stats['completed_difficulty'] / stats['completed'] if stats['completed'] > 0 else 0
+            recent_bonus = min(stats['recent_completed'] * 2, 10)  # Up to 10 points bonus for recent completions
+            
+            # Improvement = completion_rate * 0.5 + difficulty_bonus + recent_bonus
+            improvement = (completion_rate * 0.5) + (avg_difficulty * 2) + recent_bonus
+            scores["independence"] = min(100, int(scores["independence"] + improvement))
+            scores["discipline"] = min(100, int(scores["discipline"] + improvement))
+    
+    # Social and Emotional: from Social category
+    if 'Social' in category_stats:
+        stats = category_stats['Social']
+        if stats['total'] > 0:
+            completion_rate = (stats['completed'] / stats['total']) * 100
+            avg_difficulty = stats['completed_difficulty'] / stats['completed'] if stats['completed'] > 0 else 0
+            recent_bonus = min(stats['recent_completed'] * 2, 10)
+            
+            improvement = (completion_rate * 0.5) + (avg_difficulty * 2) + recent_bonus
+            scores["social"] = min(100, int(scores["social"] + improvement))
+            scores["emotional"] = min(100, int(scores["emotional"] + improvement))
+    
+    # Logic: from Logic category
+    if 'Logic' in category_stats:
+        stats = category_stats['Logic']
+        if stats['total'] > 0:
+            completion_rate = (stats['completed'] / stats['total']) * 100
+            avg_difficulty = stats['completed_difficulty'] / stats['completed'] if stats['completed'] > 0 else 0
+            recent_bonus = min(stats['recent_completed'] * 2, 10)
+            
+            improvement = (completion_rate * 0.5) + (avg_difficulty * 2) + recent_bonus
+            scores["logic"] = min(100, int(scores["logic"] + improvement))
+    
+    return scores
+
+def category_stats_from_child_stats(stats: Dict[str, Any], now: Optional[datetime] = None) -> Dict[str, Dict[str, float]]:
+    """
+    skill_scores() input from a ChildStats document (the running per-category
+    counters), without reading the child's tasks. Recent completions are
+    counted per calendar day: today and the 7 days before.
+    """
+    recent_from = completions_window_start(now)
+    completions_by_day = stats.get("completions_by_day") or {}
+    category_stats: Dict[str, Dict[str, float]] = {}
+    for category, counts in (stats.get("category_status_counts") or {}).items():
+        completed = counts.get(ChildTaskStatus.COMPLETED.value, 0)
+        category_stats[category] = {
+            'total': sum(counts.values()),
+            'completed': completed,
+            'completed_difficulty': (stats.get("category_completed_difficulty") or {}).get(category, 0),
+            'recent_completed': sum(
+                day.get(category, 0) for day_key, day in completions_by_day.items() if day_key >= recent_from
+            ),
+        }
+    return category_stats
+
+async def calculate_skills_from_task_history(
+    child: Child,
+    child_tasks: List[ChildTask],
+    loader: Optional[LinkLoader] = None
+) -> Dict[str, int]:
     """
     Calculate skill scores based on task completion history.
     
@@ -795,35 +841,19 @@ async def calculate_skills_from_task_history(child: Child, child_tasks: List[Chi
     
     Returns: Dict with skill scores (0-100)
     """
-    # Initialize skill scores with base values from initial_traits
-    base_scores = {
-        "independence": 50,
-        "discipline": 50,
-        "emotional": 50,
-        "social": 50,
-        "logic": 50
-    }
-    
-    # Get base scores from initial_traits if available
-    if child.initial_traits and "overall_traits" in child.initial_traits:
-        traits = child.initial_traits["overall_traits"]
-        base_scores = {
-            "independence": traits.get("independence", 50),
-            "discipline": traits.get("discipline", 50),
-            "emotional": traits.get("emotional", 50),
-            "social": traits.get("social", 50),
-            "logic": traits.get("logic", 50)
-        }
+    base_scores = base_skill_scores(child.initial_traits)
     
     # Group tasks by category
     category_stats: Dict[str, Dict[str, float]] = {}
     
-    for ct in child_tasks:
+    loader = loader or LinkLoader()
+    tasks = await loader.load_task_templates(child_tasks)
+    
+    for ct, task in zip(child_tasks, tasks):
         if not ct.task:
             continue
         
-        task = await fetch_link_or_get_object(ct.task, Task)
-        if not task or not isinstance(task, Task):
+        if not task:
             continue
         
         # Normalize category
@@ -856,46 +886,9 @@ async def calculate_skills_from_task_history(child: Child, child_tasks: List[Chi
                 if days_ago <= 7:
                     category_stats[category]['recent_completed'] += 1
     
-    # Calculate skill improvements based on task completion
-    # Independence and Discipline: from Independence category
-    if 'Independence' in category_stats:
-        stats = category_stats['Independence']
-        if stats['total'] > 0:
-            completion_rate = (stats['completed'] / stats['total']) * 100
-            avg_difficulty = stats['completed_difficulty'] / stats['completed'] if stats['completed'] > 0 else 0
-            recent_bonus = min(stats['recent_completed'] * 2, 10)  # Up to 10 points bonus for recent completions
-            
-            # Improvement = completion_rate * 0.5 + difficulty_bonus + recent_bonus
-            improvement = (completion_rate * 0.5) + (avg_difficulty * 2) + recent_bonus
-            base_scores["independence"] = min(100, int(base_scores["independence"] + improvement))
-            base_scores["discipline"] = min(100, int(base_scores["discipline"] + improvement))
-    
-    # Social and Emotional: from Social category
-    if 'Social' in category_stats:
-        stats = category_stats['Social']
-        if stats['total'] > 0:
-            completion_rate = (stats['completed'] / stats['total']) * 100
-            avg_difficulty = stats['completed_difficulty'] / stats['completed'] if stats['completed'] > 0 else 0
-            recent_bonus = min(stats['recent_completed'] * 2, 10)
-            
-            improvement = (completion_rate * 0.5) + (avg_difficulty * 2) + recent_bonus
-            base_scores["social"] = min(100, int(base_scores["social"] + improvement))
-            base_scores["emotional"] = min(100, int(base_scores["emotional"] + improvement))
-    
-    # Logic: from Logic category
-    if 'Logic' in category_stats:
-        stats = category_stats['Logic']
-        if stats['total'] > 0:
-            completion_rate = (stats['completed'] / stats['total']) * 100
-            avg_difficulty = stats['completed_difficulty'] / stats['completed'] if stats['completed'] > 0 else 0
-            recent_bonus = min(stats['recent_completed'] * 2, 10)
-            
-            improvement = (completion_rate * 0.5) + (avg_difficulty * 2) + recent_bonus
-            base_scores["logic"] = min(100, int(base_scores["logic"] + improvement))
-    
-    return base_scores
+    return skill_scores(base_scores, category_stats)
 
-async def update_child_skills(child: Child) -> bool:
+async def update_child_skills(child: Child, loader: Optional[LinkLoader] = None) -> bool:
     """
     Update child's skills based on task completion history.
     Updates initial_traits.overall_traits with new calculated scores.
@@ -907,7 +900,7 @@ async def update_child_skills(child: Child) -> bool:
         child_tasks = await get_child_tasks_by_child(child)
         
         # Calculate new skill scores
-        new_scores = await calculate_skills_from_task_history(child, child_tasks)
+        new_scores = await calculate_skills_from_task_history(child, child_tasks, loader)
         
         # Get current scores for comparison
         current_scores = {}
@@ -922,7 +915,8 @@ async def update_child_skills(child: Child) -> bool:
                 has_changes = True
                 break
         
-        if not has_changes:
+        has_baseline = bool(child.initial_traits and child.initial_traits.get("baseline_traits"))
+        if not has_changes and has_baseline:
             logger.debug(f"No significant skill changes for {child.name}, skipping update")
             return False
         
@@ -930,6 +924,10 @@ async def update_child_skills(child: Child) -> bool:
         if not child.initial_traits:
             child.initial_traits = {}
         
+        # Keep the scores the improvement is computed from
+        if not has_baseline:
+            child.initial_traits["baseline_traits"] = base_skill_scores(child.initial_traits)
+        
         if "overall_traits" not in child.initial_traits:
             child.initial_traits["overall_traits"] = {}
         
@@ -979,34 +977,118 @@ async def manual_update_skills(
             detail=f"Failed to update skills: {str(e)}"
         )
 
-async def update_skills_for_all_children():
+def skills_update(child_doc: Dict[str, Any], new_scores: Dict[str, int]) -> Optional[UpdateOne]:
     """
-    Update skills for all children based on their task completion history.
-    Called by scheduler daily.
+    Bulk-write operation storing new_scores on a raw child document (same rules
+    as update_child_skills), or None without a change of at least 1 point
+    (and a baseline already stored).
     """
-    from app.models.child_models import Child
+    initial_traits = child_doc.get("initial_traits")
+    current_scores = current_skill_scores(initial_traits)
+    has_baseline = bool(initial_traits and initial_traits.get("baseline_traits"))
+    if has_baseline and not any(abs(new_scores[skill] - current_scores[skill]) >= 1 for skill in SKILL_NAMES):
+        return None
     
-    logger.info("🔄 Starting skills update for all children...")
+    if not initial_traits:
+        update = {"initial_traits": {
+            "overall_traits": new_scores,
+            "baseline_traits": current_scores,
+            "explanations": {},
+            "recommended_focus": [],
+        }}
+    else:
+        update = {"initial_traits.overall_traits": {**(initial_traits.get("overall_traits") or {}), **new_scores}}
+        if not has_baseline:
+            update["initial_traits.baseline_traits"] = current_scores
+        if "explanations" not in initial_traits:
+            update["initial_traits.explanations"] = {}
+        if "recommended_focus" not in initial_traits:
+            update["initial_traits.recommended_focus"] = []
+    return UpdateOne({"_id": child_doc["_id"]}, {"$set": update})
+
+def skills_inputs_changed(stats: Dict[str, Any], since: datetime, now: datetime) -> bool:
+    """
+    Whether a child's scores computed at `now` can differ from the ones computed at
+    `since` (the previous run): its counters changed, or a completion day left the
+    recent window in between.
+    """
+    updated_at = stats.get("updated_at")
+    if updated_at is None or updated_at > since:
+        return True
+    left_from, left_until = completions_window_start(since), completions_window_start(now)
+    return any(left_from <= day_key < left_until for day_key in stats.get("completions_by_day") or {})
+
+async def update_skills_for_all_children(partition: Optional[ChildPartition] = None):
+    """
+    Update skills for all children (or the children of one partition) based on
+    their task completion history.
+    Called by scheduler daily. Scores come from the running per-category counters
+    in ChildStats, so no tasks are read; children without stats get them rebuilt.
+    Children are processed in pages of SCHEDULER_PAGE_SIZE: one bulk write per
+    page, then the partition is checkpointed.
+    
+    Scores are baseline_traits + the improvement (see base_skill_scores), so
+    SKILLS_UPDATE_MODE only changes the work done, not the result:
+    - "full": every child is recomputed
+    - "incremental": only children whose scores can have changed since the previous
+      completed run (skills_inputs_changed, no stats or no baseline yet) are
+    """
+    from app.models.childstats_models import ChildStats
+
+    partition = partition or ChildPartition()
+    since = partition.since if settings.SKILLS_UPDATE_MODE == "incremental" else None
+    logger.info(f"🔄 Starting skills update for {'children changed since ' + since.isoformat() if since else 'all children'}...")
     
     try:
-        all_children = await Child.find_all().to_list()
-        logger.info(f"Found {len(all_children)} children to process")
-        
         updated_count = 0
         skipped_count = 0
         error_count = 0
+        now = datetime.utcnow()
+        children_collection = Child.get_motor_collection()
+        stats_projection = {
+            "category_status_counts": 1, "category_completed_difficulty": 1, "completions_by_day": 1, "updated_at": 1,
+        }
         
-        for child in all_children:
-            try:
-                updated = await update_child_skills(child)
-                if updated:
-                    updated_count += 1
+        async for children in iterate_child_pages(
+            partition, {"deleted_at": None}, settings.SCHEDULER_PAGE_SIZE, projection={"name": 1, "initial_traits": 1}
+        ):
+            child_ids = [child["_id"] for child in children]
+            stats_by_child = {
+                stats["_id"]: stats
+                async for stats in ChildStats.get_motor_collection().find({"_id": {"$in": child_ids}}, stats_projection)
+            }
+            operations = []
+            page_skipped = page_errors = 0
+            for child in children:
+                stats = stats_by_child.get(child["_id"])
+                has_baseline = bool((child.get("initial_traits") or {}).get("baseline_traits"))
+                if since and stats is not None and has_baseline and not skills_inputs_changed(stats, since, now):
+                    page_skipped += 1
+                    continue
+                try:
+                    if stats is None:
+                        stats = (await rebuild_child_stats(child["_id"])).model_dump(by_alias=True)
+                    new_scores = skill_scores(
+                        base_skill_scores(child.get("initial_traits")),
+                        category_stats_from_child_stats(stats, now),
+                    )
+                    operation = skills_update(child, new_scores)
+                except Exception as e:
+                    logger.error(f"Error updating skills for {child.get('name')}: {e}")
+                    partition.record_error(child["_id"], e)
+                    page_errors += 1
+                    continue
+                if operation is None:
+                    page_skipped += 1
                 else:
-                    skipped_count += 1
-            except Exception as e:
-                logger.error(f"Error updating skills for {child.name}: {e}")
-                error_count += 1
-                continue
+                    operations.append(operation)
+            
+            if operations:
+                await children_collection.bulk_write(operations, ordered=False)
+            await partition.checkpoint(child_ids[-1], updated=len(operations), skipped=page_skipped, errors=page_errors)
+            updated_count += len(operations)
+            skipped_count += page_skipped
+            error_count += page_errors
         
         logger.info(f"✅ Skills update completed: {updated_count} updated, {skipped_count} skipped, {error_count} errors")
         
@@ -5,24 +5,32 @@ Handles task generation and scoring using LLM with context from child data.
 
 from fastapi import APIRouter, HTTPException, status, Depends
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any, Union
+from typing import List, Optional, Dict, Any, Tuple, Union
 from app.models.child_models import Child, ChildDevelopmentAssessment
-from app.models.childtask_models import ChildTask, ChildTaskStatus, UnityType as ChildTaskUnityType
+from app.models.childtask_models import ChildTask, ChildTaskStatus, TaskSnapshot, UnityType as ChildTaskUnityType
 from app.models.task_models import Task, TaskCategory, TaskType, UnityType as TaskUnityType
-from app.dependencies import verify_parent_token, verify_child_ownership, get_child_tasks_by_child, extract_id_from_link, fetch_link_or_get_object
+from app.dependencies import verify_parent_token, verify_child_ownership, get_child_tasks_by_child, extract_id_from_link, LinkLoader, get_link_loader
 from app.services.auth import get_current_user
 from app.models.user_models import User
 from app.services.llm import generate_gemini_response
+from app.services.child_stats import record_task_transition, record_tasks_inserted
+from app.services.prompt_budget import PromptBuilder, compact_json, summarize_task_history
+from app.services.job_coordinator import ChildPartition
 from app.schemas.schemas import ChildTaskPublic, TaskPublic, ChildTaskWithDetails
 from datetime import datetime
+from app.config import settings
+import asyncio
 import json
 import logging
 import re
+import time
 
 router = APIRouter()
 
 logger = logging.getLogger(__name__)
 
+SCORE_CACHE_TTL = 60 * 60  # seconds
+
 class GenerateTasksRequest(BaseModel):
     prompt: str = Field(..., description="Prompt for LLM to generate tasks")
 
@@ -36,6 +44,22 @@ class ScoreResponse(BaseModel):
     discipline: int = Field(..., ge=0, le=100, description="Discipline score (0-100)")
     social: int = Field(..., ge=0, le=100, description="Social score (0-100)")
 
+def _parse_score_response(response_text: str) -> ScoreResponse:
+    """Scores from the LLM's JSON answer; ValueError if it is not valid JSON or a score is missing / out of range."""
+    parsed_response = _parse_llm_json_response(response_text)
+    if not isinstance(parsed_response, dict):
+        raise ValueError("Expected a JSON object")
+    try:
+        return ScoreResponse(
+            logic=int(parsed_response.get("logic", 50)),
+            independence=int(parsed_response.get("independence", 50)),
+            emotional=int(parsed_response.get("emotional", 50)),
+            discipline=int(parsed_response.get("discipline", 50)),
+            social=int(parsed_response.get("social", 50))
+        )
+    except TypeError as e:
+        raise ValueError(str(e)) from e
+
 class GeneratedTaskSchema(BaseModel):
     """Schema for validating LLM-generated task JSON"""
     title: str
@@ -48,7 +72,7 @@ class GeneratedTaskSchema(BaseModel):
     reward_badge_name: Optional[str] = None
     unity_type: str
 
-async def build_child_context(child_id: str) -> Dict[str, Any]:
+async def build_child_context(child_id: str, loader: Optional[LinkLoader] = None) -> Dict[str, Any]:
     """
     Build comprehensive context for LLM from:
     1. Assessment data
@@ -104,9 +128,15 @@ async def build_child_context(child_id: str) -> Dict[str, Any]:
     all_child_tasks = await get_child_tasks_by_child(child)
     completed_tasks = [ct for ct in all_child_tasks if ct.status == ChildTaskStatus.COMPLETED]
     completed_tasks = sorted(completed_tasks, key=lambda x: x.completed_at if x.completed_at else datetime.min, reverse=True)[:10]
+    giveup_tasks = [ct for ct in all_child_tasks if ct.status == ChildTaskStatus.GIVEUP]
+    giveup_tasks = sorted(giveup_tasks, key=lambda x: x.assigned_at, reverse=True)[:10]
+    
+    # Task details come from the embedded snapshots (legacy links in one query)
+    loader = loader or LinkLoader()
+    completed_sources = await loader.load_task_templates(completed_tasks)
+    giveup_sources = await loader.load_task_templates(giveup_tasks)
     
-    for ct in completed_tasks:
-        task = await fetch_link_or_get_object(ct.task, Task) if ct.task else None
+    for ct, task in zip(completed_tasks, completed_sources):
         if task:
             context["completed_tasks"].append({
                 "title": task.title,
@@ -115,11 +145,7 @@ async def build_child_context(child_id: str) -> Dict[str, Any]:
                 "completed_at": ct.completed_at.isoformat() if ct.completed_at else None
             })
     
-    giveup_tasks = [ct for ct in all_child_tasks if ct.status == ChildTaskStatus.GIVEUP]
-    giveup_tasks = sorted(giveup_tasks, key=lambda x: x.assigned_at, reverse=True)[:10]
-    
-    for ct in giveup_tasks:
-        task = await fetch_link_or_get_object(ct.task, Task) if ct.task else None
+    for ct, task in zip(giveup_tasks, giveup_sources):
         if task:
             context["giveup_tasks"].append({
                 "title": task.title,
@@ -157,6 +183,8 @@ MIN_TASKS_PER_GENERATION = 2
 MAX_TASKS_PER_GENERATION = 8
 TASKS_PER_CATEGORY = 2
 PRIORITY_THRESHOLD = 50
+BATCH_TOKENS_PER_TASK = 350  # max_tokens budget per task of a batch call
+BATCH_MAX_TOKENS = 4000
 
 def calculate_category_priority(child: Child) -> Dict[str, float]:
     """
@@ -191,7 +219,7 @@ def calculate_category_priority(child: Child) -> Dict[str, float]:
     
     return priorities
 
-async def get_active_tasks_by_category(child: Child) -> Dict[str, int]:
+async def get_active_tasks_by_category(child: Child, loader: Optional[LinkLoader] = None) -> Dict[str, int]:
     """
     Đếm số active tasks theo category.
     Active tasks = ASSIGNED, IN_PROGRESS, NEED_VERIFY, UNASSIGNED
@@ -208,13 +236,14 @@ async def get_active_tasks_by_category(child: Child) -> Dict[str, int]:
     
     # Count by category
     category_count = {category: 0 for category in ALL_CATEGORIES}
+    loader = loader or LinkLoader()
+    tasks = await loader.load_task_templates(active_tasks)
     
-    for ct in active_tasks:
+    for ct, task in zip(active_tasks, tasks):
         category = None
         
         # Get category from task
         if ct.task:
-            task = await fetch_link_or_get_object(ct.task, Task)
             if task and hasattr(task, 'category'):
                 category = task.category.value if hasattr(task.category, 'value') else str(task.category)
         elif ct.task_data:
@@ -233,7 +262,7 @@ async def get_active_tasks_by_category(child: Child) -> Dict[str, int]:
     
     return category_count
 
-async def determine_categories_to_generate(child: Child) -> Dict[str, int]:
+async def determine_categories_to_generate(child: Child, loader: Optional[LinkLoader] = None) -> Dict[str, int]:
     """
     Xác định categories cần gen và số lượng tasks cho mỗi category.
     Returns: Dict[category, number_of_tasks]
@@ -242,7 +271,7 @@ async def determine_categories_to_generate(child: Child) -> Dict[str, int]:
     priorities = calculate_category_priority(child)
     
     # 2. Phân tích active tasks hiện tại
-    active_tasks = await get_active_tasks_by_category(child)
+    active_tasks = await get_active_tasks_by_category(child, loader)
     
     # 3. Xác định categories cần gen
     categories_to_generate = {}
@@ -308,6 +337,18 @@ async def determine_categories_to_generate(child: Child) -> Dict[str, int]:
     
     return categories_to_generate
 
+def _category_focus(priority_score: float) -> str:
+    """Generation focus for a category, based on its priority score."""
+    if priority_score < 40:
+        return "This is a weak area that needs significant improvement. Create tasks that are engaging and build foundational skills. Make them easier and more encouraging."
+    elif priority_score < 60:
+        return "This area needs moderate improvement. Create tasks that challenge but are achievable. Balance difficulty appropriately."
+    return "This is a strength area. Create tasks that maintain and further develop these skills. Can be slightly more challenging."
+
+def _format_task_history(tasks: Optional[List[Dict[str, Any]]], empty_text: str) -> str:
+    """Completed / given up tasks as prompt lines: newest 5 in detail, older ones counted per category."""
+    return "\n".join(summarize_task_history(tasks or [], empty_text))
+
 def build_category_specific_prompt(
     child_context: Dict[str, Any],
     category: str,
@@ -316,31 +357,14 @@ def build_category_specific_prompt(
     """
     Build prompt tối ưu cho từng category.
     """
-    # Determine focus based on priority
-    if priority_score < 40:
-        focus = "This is a weak area that needs significant improvement. Create tasks that are engaging and build foundational skills. Make them easier and more encouraging."
-    elif priority_score < 60:
-        focus = "This area needs moderate improvement. Create tasks that challenge but are achievable. Balance difficulty appropriately."
-    else:
-        focus = "This is a strength area. Create tasks that maintain and further develop these skills. Can be slightly more challenging."
+    focus = _category_focus(priority_score)
     
     child_info = child_context.get('child_info', {})
     interests = child_info.get('interests', [])
     interests_text = ', '.join(interests) if interests else 'Not specified'
     
-    completed_tasks_text = "No completed tasks yet."
-    if child_context.get('completed_tasks'):
-        completed_tasks_text = "\n".join([
-            f"- {task.get('title', 'N/A')} (Category: {task.get('category', 'N/A')}, Difficulty: {task.get('difficulty', 'N/A')})"
-            for task in child_context['completed_tasks'][:5]  # Last 5 completed
-        ])
-    
-    giveup_tasks_text = "No tasks given up yet."
-    if child_context.get('giveup_tasks'):
-        giveup_tasks_text = "\n".join([
-            f"- {task.get('title', 'N/A')} (Category: {task.get('category', 'N/A')}, Difficulty: {task.get('difficulty', 'N/A')})"
-            for task in child_context['giveup_tasks'][:5]  # Last 5 given up
-        ])
+    completed_tasks_text = _format_task_history(child_context.get('completed_tasks'), "No completed tasks yet.")
+    giveup_tasks_text = _format_task_history(child_context.get('giveup_tasks'), "No tasks given up yet.")
     
     prompt = f"""
 CHILD INFORMATION:
@@ -386,6 +410,72 @@ Return ONLY a JSON object (not array) with these exact fields:
     
     return prompt
 
+def build_batch_generation_prompt(
+    child_context: Dict[str, Any],
+    categories_to_generate: Dict[str, int],
+    priorities: Dict[str, float]
+) -> str:
+    """
+    Build prompt for generating tasks of several categories in one LLM call.
+    """
+    child_info = child_context.get('child_info', {})
+    interests = child_info.get('interests', [])
+    interests_text = ', '.join(interests) if interests else 'Not specified'
+    total = sum(categories_to_generate.values())
+    
+    categories_text = "\n".join([
+        f"- {category}: EXACTLY {count} task(s). Priority score {priorities.get(category, 50):.1f}/100. "
+        f"Focus: {_category_focus(priorities.get(category, 50))}"
+        for category, count in categories_to_generate.items()
+    ])
+    
+    prompt = f"""
+CHILD INFORMATION:
+Name: {child_info.get('name', 'N/A')}
+Nickname: {child_info.get('nickname', 'N/A')}
+Age: {child_info.get('age', 'N/A')}
+Interests: {interests_text}
+Personality: {', '.join(child_info.get('personality', [])) or 'Not specified'}
+Strengths: {', '.join(child_info.get('strengths', [])) or 'Not specified'}
+Challenges: {', '.join(child_info.get('challenges', [])) or 'Not specified'}
+
+COMPLETED TASKS (to build upon):
+{_format_task_history(child_context.get('completed_tasks'), "No completed tasks yet.")}
+
+GIVEN UP TASKS (to avoid similar difficulty/style):
+{_format_task_history(child_context.get('giveup_tasks'), "No tasks given up yet.")}
+
+TASKS TO CREATE ({total} in total):
+{categories_text}
+
+REQUIREMENT:
+Create EXACTLY {total} tasks with the category counts above. Every task must:
+1. Be appropriate for this child's age ({child_info.get('age', 'N/A')}) and current skill level
+2. Follow the focus of its category
+3. Be engaging and match the child's interests: {interests_text}
+4. Avoid repeating tasks the child has given up on (check the list above)
+5. Build on tasks the child has successfully completed (check the list above)
+6. Have a unique title (no two tasks with the same title)
+
+Return ONLY a JSON object with a "tasks" array, each element with these exact fields:
+{{
+  "tasks": [
+    {{
+      "title": "Task title",
+      "description": "Detailed description",
+      "category": "One of the categories above",
+      "type": "logic" or "emotion",
+      "difficulty": 1-5,
+      "suggested_age_range": "e.g., 6-10",
+      "reward_coins": 0-1000,
+      "unity_type": "life" or "choice" or "talk"
+    }}
+  ]
+}}
+"""
+    
+    return prompt
+
 async def generate_single_task_for_category(
     child: Child,
     category: str,
@@ -409,7 +499,7 @@ async def generate_single_task_for_category(
     # Call LLM
     max_tokens = 1024  # Enough for 1 task
     logger.info(f"Generating task for category '{category}' (priority: {priority_score:.1f})")
-    llm_response = generate_gemini_response(user_prompt, system_instruction, max_tokens=max_tokens)
+    llm_response = await generate_gemini_response(user_prompt, system_instruction, max_tokens=max_tokens, call_site="task_single")
     
     # Parse JSON (expecting single object, not array)
     try:
@@ -441,17 +531,7 @@ async def generate_single_task_for_category(
         task = await Task.find_one(Task.title == validated_task.title)
         if not task:
             # Create new task
-            task = Task(
-                title=validated_task.title,
-                description=validated_task.description,
-                category=TaskCategory(validated_task.category),
-                type=TaskType(validated_task.type),
-                difficulty=validated_task.difficulty,
-                suggested_age_range=validated_task.suggested_age_range,
-                reward_coins=validated_task.reward_coins,
-                reward_badge_name=validated_task.reward_badge_name,
-                unity_type=TaskUnityType(validated_task.unity_type)
-            )
+            task = _new_library_task(validated_task)
             await task.insert()
         else:
             # Update unity_type if not set
@@ -464,11 +544,13 @@ async def generate_single_task_for_category(
         child_task = ChildTask(
             child=child,  # type: ignore
             task=task,  # type: ignore
+            task_snapshot=TaskSnapshot.from_task(task),
             status=ChildTaskStatus.UNASSIGNED,
             unity_type=ChildTaskUnityType(validated_task.unity_type),
             assigned_at=datetime.utcnow()
         )
         await child_task.insert()
+        await record_task_transition(child_task, None, ChildTaskStatus.UNASSIGNED, library_task=task)
         
         logger.info(f"✅ Generated task '{validated_task.title}' for category '{category}'")
         return child_task
@@ -477,6 +559,149 @@ async def generate_single_task_for_category(
         logger.error(f"Failed to generate task for category {category}: {e}")
         raise
 
+def _new_library_task(validated_task: GeneratedTaskSchema) -> Task:
+    return Task(
+        title=validated_task.title,
+        description=validated_task.description,
+        category=TaskCategory(validated_task.category),
+        type=TaskType(validated_task.type),
+        difficulty=validated_task.difficulty,
+        suggested_age_range=validated_task.suggested_age_range,
+        reward_coins=validated_task.reward_coins,
+        reward_badge_name=validated_task.reward_badge_name,
+        unity_type=TaskUnityType(validated_task.unity_type)
+    )
+
+def _batch_task_items(parsed_response: Any) -> List[Any]:
+    """Task items of a batch response ({"tasks": [...]} or a bare array)."""
+    if isinstance(parsed_response, list):
+        return parsed_response
+    if isinstance(parsed_response, dict):
+        if isinstance(parsed_response.get("tasks"), list):
+            return parsed_response["tasks"]
+        if "title" in parsed_response:
+            return [parsed_response]
+    raise ValueError(f"Unexpected response type: {type(parsed_response)}")
+
+async def generate_tasks_batch(
+    child: Child,
+    categories_to_generate: Dict[str, int],
+    context: Dict[str, Any],
+    priorities: Dict[str, float]
+) -> List[ChildTask]:
+    """
+    Generate all tasks of categories_to_generate ({category: count}) with one LLM call.
+    Every item is validated with _validate_task_schema; valid items are inserted with
+    one insert_many for new library Tasks and one for the ChildTasks. Missing or
+    invalid items are retried one by one with generate_single_task_for_category.
+    Returns the created ChildTask objects.
+    """
+    total = sum(categories_to_generate.values())
+    if total == 0:
+        return []
+    
+    user_prompt = build_batch_generation_prompt(context, categories_to_generate, priorities)
+    system_instruction = (
+        "You are a child education expert. "
+        "Your task is to create appropriate tasks for children based on assessment information and task completion history. "
+        "\n\nIMPORTANT: You MUST return ONLY a valid JSON object with a \"tasks\" array, no explanations, no markdown code blocks, no additional text. "
+        "Every task must have the exact fields specified in the prompt.\n\n"
+    )
+    
+    # Slots still to fill per category
+    remaining = dict(categories_to_generate)
+    validated_tasks: List[GeneratedTaskSchema] = []
+    
+    logger.info(f"Generating {total} tasks for {child.name} in one call: {categories_to_generate}")
+    try:
+        llm_response = await generate_gemini_response(
+            user_prompt,
+            system_instruction,
+            max_tokens=min(BATCH_TOKENS_PER_TASK * total + 256, BATCH_MAX_TOKENS),
+            call_site="task_batch",
+        )
+        items = _batch_task_items(_parse_llm_json_response(llm_response))
+    except Exception as e:
+        logger.error(f"Batch generation failed for {child.name}, retrying tasks one by one: {e}")
+        items = []
+    
+    seen_titles = set()
+    for item in items:
+        try:
+            if not isinstance(item, dict):
+                raise ValueError(f"Unexpected item type: {type(item)}")
+            validated_task = _validate_task_schema(item)
+        except ValueError as e:
+            logger.warning(f"Skipping invalid batch item for {child.name}: {e}")
+            continue
+        if remaining.get(validated_task.category, 0) <= 0:
+            logger.warning(f"Skipping batch item '{validated_task.title}': category '{validated_task.category}' not requested or already filled")
+            continue
+        if validated_task.title in seen_titles:
+            logger.warning(f"Skipping duplicate batch item '{validated_task.title}'")
+            continue
+        seen_titles.add(validated_task.title)
+        remaining[validated_task.category] -= 1
+        validated_tasks.append(validated_task)
+    
+    created: List[ChildTask] = []
+    if validated_tasks:
+        # Library tasks: reuse existing titles, insert the new ones in one call
+        titles = [validated_task.title for validated_task in validated_tasks]
+        library = {task.title: task for task in await Task.find({"title": {"$in": titles}}).to_list()}
+        new_tasks = []
+        for validated_task in validated_tasks:
+            task = library.get(validated_task.title)
+            if task is None:
+                task = _new_library_task(validated_task)
+                library[task.title] = task
+                new_tasks.append(task)
+            elif not task.unity_type:
+                # Update unity_type if not set
+                task.unity_type = TaskUnityType(validated_task.unity_type)
+                await task.save()
+        if new_tasks:
+            result = await Task.insert_many(new_tasks)
+            for task, inserted_id in zip(new_tasks, result.inserted_ids):
+                task.id = inserted_id
+        
+        now = datetime.utcnow()
+        child_tasks = []
+        for validated_task in validated_tasks:
+            task = library[validated_task.title]
+            child_tasks.append(ChildTask(
+                child=child,  # type: ignore
+                task=task,  # type: ignore
+                task_snapshot=TaskSnapshot.from_task(task),
+                status=ChildTaskStatus.UNASSIGNED,
+                unity_type=ChildTaskUnityType(validated_task.unity_type),
+                assigned_at=now
+            ))
+        result = await ChildTask.insert_many(child_tasks)
+        for child_task, inserted_id in zip(child_tasks, result.inserted_ids):
+            child_task.id = inserted_id
+        await record_tasks_inserted(
+            child.id,
+            [(child_task, library[validated_task.title]) for child_task, validated_task in zip(child_tasks, validated_tasks)]
+        )
+        created.extend(child_tasks)
+        logger.info(f"✅ Generated {len(child_tasks)}/{total} tasks for {child.name} in one call")
+    
+    # Retry missing / invalid items individually
+    for category, count in remaining.items():
+        for _ in range(count):
+            try:
+                created.append(await generate_single_task_for_category(
+                    child=child,
+                    category=category,
+                    context=context,
+                    priority_score=priorities.get(category, 50)
+                ))
+            except Exception as e:
+                logger.error(f"❌ Retry failed for {child.name}, category {category}: {e}")
+    
+    return created
+
 def _parse_llm_json_response(response_text: str) -> Any:
     """
     Parse LLM JSON response, handling various formats.
@@ -669,7 +894,8 @@ async def generate_tasks(
     child_id: str,
     request: GenerateTasksRequest,
     child: Child = Depends(verify_child_ownership),
-    current_user: User = Depends(verify_parent_token)
+    current_user: User = Depends(verify_parent_token),
+    loader: LinkLoader = Depends(get_link_loader)
 ):
     """
     Generate tasks for a child using LLM with context.
@@ -683,7 +909,7 @@ async def generate_tasks(
     """
     try:
         # 1. Build context
-        context = await build_child_context(child_id)
+        context = await build_child_context(child_id, loader)
         
         # 2. Prepare LLM prompt
         system_instruction = (
@@ -718,24 +944,13 @@ Challenges: {', '.join(context['child_info'].get('challenges', [])) or 'Not set'
         assessment_text = "No development assessment available."
         if context['assessment']:
             assessment_text = f"""
-Discipline and Autonomy: {json.dumps(context['assessment'].get('discipline_autonomy', {}), ensure_ascii=False)}
-Emotional Intelligence: {json.dumps(context['assessment'].get('emotional_intelligence', {}), ensure_ascii=False)}
-Social Interaction: {json.dumps(context['assessment'].get('social_interaction', {}), ensure_ascii=False)}
+Discipline and Autonomy: {compact_json(context['assessment'].get('discipline_autonomy', {}))}
+Emotional Intelligence: {compact_json(context['assessment'].get('emotional_intelligence', {}))}
+Social Interaction: {compact_json(context['assessment'].get('social_interaction', {}))}
 """
         
-        completed_tasks_text = "No completed tasks yet."
-        if context['completed_tasks']:
-            completed_tasks_text = "\n".join([
-                f"- {task.get('title', 'N/A')} (Difficulty: {task.get('difficulty', 'N/A')}, Category: {task.get('category', 'N/A')})"
-                for task in context['completed_tasks']
-            ])
-        
-        giveup_tasks_text = "No tasks given up yet."
-        if context['giveup_tasks']:
-            giveup_tasks_text = "\n".join([
-                f"- {task.get('title', 'N/A')} (Difficulty: {task.get('difficulty', 'N/A')}, Category: {task.get('category', 'N/A')})"
-                for task in context['giveup_tasks']
-            ])
+        completed_tasks_text = _format_task_history(context['completed_tasks'], "No completed tasks yet.")
+        giveup_tasks_text = _format_task_history(context['giveup_tasks'], "No tasks given up yet.")
         
         user_prompt = f"""
 CHILD INFORMATION:
@@ -766,7 +981,7 @@ IMPORTANT - READ CAREFULLY:
         # Since we only generate 1 task at a time, 2048 tokens should be more than enough
         max_tokens = 2048
         logger.info(f"Calling LLM with max_tokens={max_tokens} for 1 task")
-        llm_response = generate_gemini_response(user_prompt, system_instruction, max_tokens=max_tokens)
+        llm_response = await generate_gemini_response(user_prompt, system_instruction, max_tokens=max_tokens, call_site="task_chat")
         logger.info(f"LLM raw response length: {len(llm_response)} chars")
         logger.debug(f"LLM raw response (first 2000 chars): {llm_response[:2000]}")
         
@@ -833,11 +1048,13 @@ IMPORTANT - READ CAREFULLY:
                 child_task = ChildTask(
                     child=child,  # type: ignore
                     task=task,  # type: ignore
+                    task_snapshot=TaskSnapshot.from_task(task),
                     status=ChildTaskStatus.UNASSIGNED,
                     unity_type=ChildTaskUnityType(validated_task.unity_type),
                     assigned_at=datetime.utcnow()
                 )
                 await child_task.insert()
+                await record_task_transition(child_task, None, ChildTaskStatus.UNASSIGNED, library_task=task)
                 
                 # Fetch task details for response (task is already available, no need to fetch)
                 created_child_tasks.append(
@@ -905,7 +1122,8 @@ async def score_child(
     child_id: str,
     request: ScoreRequest,
     child: Child = Depends(verify_child_ownership),
-    current_user: User = Depends(verify_parent_token)
+    current_user: User = Depends(verify_parent_token),
+    loader: LinkLoader = Depends(get_link_loader)
 ):
     """
     Generate score/grade for a child using LLM with context.
@@ -919,7 +1137,7 @@ async def score_child(
     """
     try:
         # 1. Build context
-        context = await build_child_context(child_id)
+        context = await build_child_context(child_id, loader)
         
         system_instruction = (
             "You are a child development assessment expert. "
@@ -928,48 +1146,48 @@ async def score_child(
             "Each score from 0-100."
         )
         
-        user_prompt = f"""
+        user_prompt = (
+            PromptBuilder("score")
+            .add(f"""
 Child Context:
-- Information: {json.dumps(context['child_info'], ensure_ascii=False, indent=2)}
-- Development Assessment: {json.dumps(context['assessment'], ensure_ascii=False, indent=2)}
-- Completed Tasks: {json.dumps(context['completed_tasks'], ensure_ascii=False, indent=2)}
-- Given Up Tasks: {json.dumps(context['giveup_tasks'], ensure_ascii=False, indent=2)}
+- Information: {compact_json(context['child_info'])}
+- Development Assessment: {compact_json(context['assessment'])}
+- Completed Tasks (newest first):
+""")
+            .add_items(context['completed_tasks'], empty_text="None")
+            .add("\n- Given Up Tasks (newest first):\n")
+            .add_items(context['giveup_tasks'], empty_text="None")
+            .add(f"""
 
 Request: {request.prompt}
 
 Evaluate and score 5 aspects (0-100): logic, independence, emotional, discipline, social.
 Return JSON object with these fields.
-"""
+""")
+            .build()
+        )
         
         # 3. Call LLM
-        llm_response = generate_gemini_response(user_prompt, system_instruction)
-        
-        # 4. Parse JSON
-        try:
-            parsed_response = _parse_llm_json_response(llm_response)
-        except Exception as e:
-            logger.error(f"Failed to parse LLM response: {e}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to parse LLM response: {str(e)}"
-            )
-        
-        # 5. Validate and extract scores
+        # Same context and request -> same scores; reuse them for an hour
+        # (only responses that parse into valid scores are cached)
         try:
-            scores = ScoreResponse(
-                logic=int(parsed_response.get("logic", 50)),
-                independence=int(parsed_response.get("independence", 50)),
-                emotional=int(parsed_response.get("emotional", 50)),
-                discipline=int(parsed_response.get("discipline", 50)),
-                social=int(parsed_response.get("social", 50))
+            llm_response = await generate_gemini_response(
+                user_prompt,
+                system_instruction,
+                cache_ttl=SCORE_CACHE_TTL,
+                call_site="score",
+                validate=_parse_score_response,
             )
-        except Exception as e:
-            logger.error(f"Failed to validate score response: {e}")
+        except ValueError as e:
+            logger.error(f"Invalid score response from LLM: {e}")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Invalid score data from LLM: {str(e)}"
             )
         
+        # 4. Parse and validate scores
+        scores = _parse_score_response(llm_response)
+        
         return scores
         
     except HTTPException:
@@ -1033,28 +1251,9 @@ async def generate_initial_tasks_for_child(child_id: str):
                 else:
                     break
         
-        # Generate tasks for each category
-        generated_count = 0
-        for category, count in categories_to_generate.items():
-            priority_score = priorities.get(category, 50)
-            
-            for _ in range(count):
-                try:
-                    await generate_single_task_for_category(
-                        child=child,
-                        category=category,
-                        context=context,
-                        priority_score=priority_score
-                    )
-                    generated_count += 1
-                    
-                    # Small delay to avoid rate limiting
-                    import asyncio
-                    await asyncio.sleep(0.3)
-                    
-                except Exception as e:
-                    logger.error(f"❌ Failed to generate initial task for {child.name}, category {category}: {e}")
-                    continue
+        # Generate all tasks in one LLM call (failed items are retried individually)
+        generated = await generate_tasks_batch(child, categories_to_generate, context, priorities)
+        generated_count = len(generated)
         
         # Update last_auto_generated_at
         child.last_auto_generated_at = datetime.utcnow()
@@ -1068,115 +1267,211 @@ async def generate_initial_tasks_for_child(child_id: str):
 
 # ============== AUTO-GENERATION SCHEDULER FUNCTION ==============
 
-async def generate_auto_tasks_for_all_children():
+MIN_ACTIVE_TASKS = 3  # auto-generation only tops up children below this many active tasks
+ACTIVE_STATUSES = ["assigned", "in_progress", "need_verify", "unassigned"]
+PROGRESS_LOG_INTERVAL = 30  # seconds between auto-generation progress logs
+
+class _AutoGenerationProgress:
+    """Counters and throughput / ETA logging of an auto-generation run."""
+    
+    def __init__(self, total: int):
+        self.total = total
+        self.processed = 0
+        self.generated = 0
+        self.skipped = 0
+        self.errors = 0
+        self.started_at = time.monotonic()
+        self._logged_at = self.started_at
+    
+    def child_done(self, generated: int = 0, skipped: bool = False, error: bool = False):
+        self.processed += 1
+        self.generated += generated
+        self.skipped += int(skipped)
+        self.errors += int(error)
+        now = time.monotonic()
+        if now - self._logged_at >= PROGRESS_LOG_INTERVAL:
+            self._logged_at = now
+            self.log()
+    
+    def log(self):
+        elapsed = max(time.monotonic() - self.started_at, 1e-6)
+        rate = self.processed / elapsed
+        eta = (self.total - self.processed) / rate if rate else 0
+        logger.info(
+            f"📊 Auto-generation: {self.processed}/{self.total} children "
+            f"({self.processed * 100 / max(self.total, 1):.1f}%), {rate * 60:.1f} children/min, "
+            f"{self.generated} tasks, {self.skipped} skipped, {self.errors} errors, ETA {eta / 60:.1f} min"
+        )
+
+async def _auto_generation_candidates(query: Dict[str, Any], partition: ChildPartition) -> List[Tuple[int, Any]]:
+    """
+    (active task count, child _id) of the partition's children matching `query` that are
+    below MIN_ACTIVE_TASKS, fewest active tasks first (then by _id), past the partition's
+    checkpoint. Counts are read from ChildStats in one aggregation (no stats: 0).
+    """
+    from app.models.child_models import Child
+    from app.models.childstats_models import ChildStats
+    
+    pipeline = [
+        {"$match": {**query, **partition.query()}},
+        {"$project": {"_id": 1}},
+        {"$lookup": {
+            "from": ChildStats.get_motor_collection().name,
+            "localField": "_id",
+            "foreignField": "_id",
+            "as": "stats",
+        }},
+        {"$unwind": {"path": "$stats", "preserveNullAndEmptyArrays": True}},
+        {"$project": {"active": {"$add": [
+            {"$ifNull": [f"$stats.status_counts.{task_status}", 0]} for task_status in ACTIVE_STATUSES
+        ]}}},
+        {"$match": {"active": {"$lt": MIN_ACTIVE_TASKS}}},
+        {"$sort": {"active": 1, "_id": 1}},
+    ]
+    candidates = [
+        (doc["active"], doc["_id"])
+        async for doc in Child.get_motor_collection().aggregate(pipeline, allowDiskUse=True)
+    ]
+    if partition.cursor is not None:
+        done = (partition.cursor_key or 0, partition.cursor)
+        candidates = [candidate for candidate in candidates if candidate > done]
+    return candidates
+
+async def _auto_generate_for_child(
+    child: Child,
+    loader: LinkLoader,
+    progress: _AutoGenerationProgress,
+    partition: ChildPartition,
+):
+    try:
+        # Count active tasks (only generate if active tasks < threshold)
+        active_tasks = await get_active_tasks_by_category(child, loader)
+        total_active = sum(active_tasks.values())
+        if total_active >= MIN_ACTIVE_TASKS:
+            logger.debug(f"⏭️  Skipping {child.name}: has {total_active} active tasks (threshold: {MIN_ACTIVE_TASKS})")
+            progress.child_done(skipped=True)
+            return
+        
+        # Determine categories to generate
+        categories_to_generate = await determine_categories_to_generate(child, loader)
+        if not categories_to_generate:
+            logger.debug(f"⏭️  Skipping {child.name}: no categories to generate")
+            progress.child_done(skipped=True)
+            return
+        
+        logger.info(f"📝 Generating tasks for {child.name}: {categories_to_generate}")
+        
+        # Build context once (reuse for all categories)
+        context = await build_child_context(str(child.id), loader)
+        priorities = calculate_category_priority(child)
+        
+        # Generate all tasks in one LLM call (failed items are retried individually)
+        generated = await generate_tasks_batch(child, categories_to_generate, context, priorities)
+        
+        if generated:
+            # Update last_auto_generated_at
+            child.last_auto_generated_at = datetime.utcnow()
+            await child.save()
+            logger.info(f"✅ Generated {len(generated)} tasks for {child.name}")
+            progress.child_done(generated=len(generated))
+        else:
+            partition.record_error(child.id, "No tasks generated")
+            progress.child_done(error=True)
+    except Exception as e:
+        logger.error(f"❌ Error processing child {child.name}: {e}", exc_info=True)
+        partition.record_error(child.id, e)
+        progress.child_done(error=True)
+
+async def generate_auto_tasks_for_all_children(partition: Optional[ChildPartition] = None):
     """
-    Auto-generate tasks for all children that meet criteria.
+    Auto-generate tasks for all children that meet criteria (or the children of one partition).
     Called by scheduler at 8:00 AM daily.
     
     Logic:
-    1. Check if child already generated today
-    2. Count active tasks
-    3. Determine categories to generate
-    4. Generate tasks for each category
+    1. Order the children not generated today below the active task threshold by their
+       active task count (fewest first), across the whole partition
+    2. Walk them in pages of SCHEDULER_PAGE_SIZE
+    3. A pool of AUTO_GENERATE_CONCURRENCY workers generates tasks per child; all LLM
+       calls share a token-bucket limiter (AUTO_GENERATE_REQUESTS/TOKENS_PER_MINUTE)
+    4. After each page the partition is checkpointed (child _id and its active count), so a
+       restarted run resumes there; the ordering is recomputed, children generated meanwhile drop out
+    5. Throughput and ETA are logged every PROGRESS_LOG_INTERVAL seconds
+    
+    Partitions may run at the same time on different workers, so each one gets
+    an equal share of the LLM quota.
     """
     from app.models.child_models import Child
+    from app.services.rate_limit import LLMRateLimiter, use_llm_rate_limiter
     
+    partition = partition or ChildPartition()
     logger.info("🔄 Starting auto-task generation for all children...")
     
     try:
-        # Get all children
-        all_children = await Child.find_all().to_list()
-        logger.info(f"Found {len(all_children)} children to process")
-        
-        today = datetime.utcnow().date()
-        total_generated = 0
-        total_skipped = 0
-        total_errors = 0
-        
-        # Process children in batches to avoid overwhelming the system
-        batch_size = 5
-        for i in range(0, len(all_children), batch_size):
-            batch = all_children[i:i + batch_size]
-            
-            # Process batch concurrently but with limit
-            for child in batch:
-                try:
-                    # Check if already generated today
-                    if child.last_auto_generated_at:
-                        last_gen_date = child.last_auto_generated_at.date()
-                        if last_gen_date >= today:
-                            logger.debug(f"⏭️  Skipping {child.name}: already generated today")
-                            total_skipped += 1
-                            continue
-                    
-                    # Count active tasks
-                    active_tasks = await get_active_tasks_by_category(child)
-                    total_active = sum(active_tasks.values())
-                    
-                    # Check threshold (only generate if active tasks < threshold)
-                    MIN_ACTIVE_TASKS = 3
-                    if total_active >= MIN_ACTIVE_TASKS:
-                        logger.debug(f"⏭️  Skipping {child.name}: has {total_active} active tasks (threshold: {MIN_ACTIVE_TASKS})")
-                        total_skipped += 1
-                        continue
-                    
-                    # Determine categories to generate
-                    categories_to_generate = await determine_categories_to_generate(child)
-                    
-                    if not categories_to_generate:
-                        logger.debug(f"⏭️  Skipping {child.name}: no categories to generate")
-                        total_skipped += 1
-                        continue
-                    
-                    logger.info(f"📝 Generating tasks for {child.name}: {categories_to_generate}")
-                    
-                    # Build context once (reuse for all categories)
-                    context = await build_child_context(str(child.id))
-                    priorities = calculate_category_priority(child)
-                    
-                    # Generate tasks for each category
-                    generated_count = 0
-                    for category, count in categories_to_generate.items():
-                        priority_score = priorities.get(category, 50)
-                        
-                        for _ in range(count):
-                            try:
-                                await generate_single_task_for_category(
-                                    child=child,
-                                    category=category,
-                                    context=context,
-                                    priority_score=priority_score
-                                )
-                                generated_count += 1
-                                
-                                # Small delay between generations to avoid rate limiting
-                                import asyncio
-                                await asyncio.sleep(0.5)
-                                
-                            except Exception as e:
-                                logger.error(f"❌ Failed to generate task for {child.name}, category {category}: {e}")
-                                continue
-                    
-                    if generated_count > 0:
-                        # Update last_auto_generated_at
-                        child.last_auto_generated_at = datetime.utcnow()
-                        await child.save()
-                        total_generated += generated_count
-                        logger.info(f"✅ Generated {generated_count} tasks for {child.name}")
-                    else:
-                        total_errors += 1
-                        
-                except Exception as e:
-                    logger.error(f"❌ Error processing child {child.name}: {e}", exc_info=True)
-                    total_errors += 1
-                    continue
-            
-            # Delay between batches to avoid overwhelming the system
-            if i + batch_size < len(all_children):
-                import asyncio
-                await asyncio.sleep(1)
+        # Children not generated today
+        start_of_today = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+        query = {
+            "deleted_at": None,
+            "$or": [
+                {"last_auto_generated_at": None},
+                {"last_auto_generated_at": {"$lt": start_of_today}},
+            ],
+        }
+        candidates = await _auto_generation_candidates(query, partition)
+        logger.info(f"Found {len(candidates)} children not generated today below {MIN_ACTIVE_TASKS} active tasks")
+        
+        progress = _AutoGenerationProgress(len(candidates))
+        limiter = LLMRateLimiter(
+            settings.AUTO_GENERATE_REQUESTS_PER_MINUTE / partition.count,
+            settings.AUTO_GENERATE_TOKENS_PER_MINUTE / partition.count,
+        )
+        
+        with use_llm_rate_limiter(limiter):
+            page_size = settings.SCHEDULER_PAGE_SIZE
+            for start in range(0, len(candidates), page_size):
+                page = candidates[start:start + page_size]
+                before = (progress.generated, progress.skipped, progress.errors)
+                # Shared by the page's children (each library task is loaded once per page);
+                # a new one per page keeps its cache bounded by the page size
+                loader = LinkLoader()
+                
+                # Keep the global order (fewest active tasks first) within the page
+                children_by_id = {
+                    child.id: child
+                    for child in await Child.find({**query, "_id": {"$in": [child_id for _, child_id in page]}}).to_list()
+                }
+                children = [children_by_id[child_id] for _, child_id in page if child_id in children_by_id]
+                for _ in range(len(page) - len(children)):
+                    # Generated or deleted since the ordering was computed
+                    progress.child_done(skipped=True)
+                
+                queue: asyncio.Queue = asyncio.Queue()
+                for child in children:
+                    queue.put_nowait(child)
+                
+                async def worker():
+                    while True:
+                        try:
+                            child = queue.get_nowait()
+                        except asyncio.QueueEmpty:
+                            return
+                        await _auto_generate_for_child(child, loader, progress, partition)
+                
+                workers = max(1, min(settings.AUTO_GENERATE_CONCURRENCY, len(children)))
+                await asyncio.gather(*(worker() for _ in range(workers)))
+                
+                await partition.checkpoint(
+                    page[-1][1],
+                    cursor_key=page[-1][0],
+                    generated=progress.generated - before[0],
+                    skipped=progress.skipped - before[1],
+                    errors=progress.errors - before[2],
+                )
         
-        logger.info(f"✅ Auto-generation completed: {total_generated} tasks generated, {total_skipped} skipped, {total_errors} errors")
+        progress.log()
+        logger.info(
+            f"✅ Auto-generation completed: {progress.generated} tasks generated, "
+            f"{progress.skipped} skipped, {progress.errors} errors"
+        )
         
     except Exception as e:
         logger.error(f"❌ Critical error in auto-generation: {e}", exc_info=True)
@@ -1186,7 +1481,8 @@ async def generate_auto_tasks_for_all_children():
 async def manual_trigger_auto_generate(
     child_id: str,
     child: Child = Depends(verify_child_ownership),
-    current_user: User = Depends(verify_parent_token)
+    current_user: User = Depends(verify_parent_token),
+    loader: LinkLoader = Depends(get_link_loader)
 ):
     """
     Manually trigger auto-generation for a specific child.
@@ -1195,11 +1491,11 @@ async def manual_trigger_auto_generate(
     """
     try:
         # Count active tasks
-        active_tasks = await get_active_tasks_by_category(child)
+        active_tasks = await get_active_tasks_by_category(child, loader)
         total_active = sum(active_tasks.values())
         
         # Determine categories to generate
-        categories_to_generate = await determine_categories_to_generate(child)
+        categories_to_generate = await determine_categories_to_generate(child, loader)
         
         if not categories_to_generate:
             return {
@@ -1209,29 +1505,18 @@ async def manual_trigger_auto_generate(
             }
         
         # Build context
-        context = await build_child_context(child_id)
+        context = await build_child_context(child_id, loader)
         priorities = calculate_category_priority(child)
         
-        # Generate tasks
-        generated_tasks = []
-        for category, count in categories_to_generate.items():
-            priority_score = priorities.get(category, 50)
-            
-            for _ in range(count):
-                try:
-                    task = await generate_single_task_for_category(
-                        child=child,
-                        category=category,
-                        context=context,
-                        priority_score=priority_score
-                    )
-                    generated_tasks.append({
-                        "id": str(task.id),
-                        "category": category
-                    })
-                except Exception as e:
-                    logger.error(f"Failed to generate task for category {category}: {e}")
-                    continue
+        # Generate tasks (one LLM call, failed items retried individually)
+        generated = await generate_tasks_batch(child, categories_to_generate, context, priorities)
+        generated_tasks = [
+            {
+                "id": str(child_task.id),
+                "category": child_task.task_snapshot.category.value if child_task.task_snapshot else None
+            }
+            for child_task in generated
+        ]
         
         # Update last_auto_generated_at
         child.last_auto_generated_at = datetime.utcnow()
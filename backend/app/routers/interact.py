@@ -1,11 +1,18 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from beanie import Link
 from pydantic import BaseModel
 from app.dependencies import verify_child_ownership
 from app.models.interactionlog_models import InteractionLog
 from app.models.child_models import Child
-from app.services.llm import generate_gemini_response, generate_openai_response
+from app.db.pagination import NEXT_CURSOR_HEADER, encode_cursor, keyset_filter
+from pymongo import DESCENDING
+from app.services.llm import generate_gemini_response, stream_openai_response
+from app.services.emotion import get_emotion_engine
 from typing import List, Dict, Any, Optional
+from datetime import datetime
+from contextlib import aclosing
+import asyncio
 import logging
 import json
 
@@ -13,36 +20,18 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-def detect_emotion_from_text(user_input: str) -> str:
+HISTORY_MAX_LIMIT = 100
+HISTORY_PROJECTION = {"timestamp": 1, "user_input": 1, "avatar_response": 1, "detected_emotion": 1}
+
+async def detect_emotion_from_text(user_input: str) -> str:
     """
-    Detect emotion from user input using LLM.
+    Detect emotion from user input with the configured engine (see app/services/emotion.py).
     Returns one of: Happy, Sad, Angry, Excited, Scared, Neutral, Curious, Frustrated, Proud, Worried
     """
     try:
-        system_instruction = (
-            "You are an emotion detection expert. "
-            "Analyze the text and return ONLY the primary emotion as a single word. "
-            "Choose from: Happy, Sad, Angry, Excited, Scared, Neutral, Curious, Frustrated, Proud, Worried. "
-            "Return ONLY the emotion word, no explanations, no punctuation, no extra text."
-        )
-        
-        prompt = f"""
-Analyze this child's message and detect the primary emotion:
-"{user_input}"
-
-Return ONLY one word: Happy, Sad, Angry, Excited, Scared, Neutral, Curious, Frustrated, Proud, or Worried.
-"""
-        
-        emotion = generate_openai_response(prompt, system_instruction, max_tokens=20)
-        emotion = emotion.strip().capitalize()
-        
-        # Validate emotion is in the list
-        valid_emotions = ["Happy", "Sad", "Angry", "Excited", "Scared", "Neutral", "Curious", "Frustrated", "Proud", "Worried"]
-        if emotion not in valid_emotions:
-            logger.warning(f"Invalid emotion detected: {emotion}, defaulting to Neutral")
-            return "Neutral"
-        
-        return emotion
+        result = await get_emotion_engine().detect(user_input)
+        logger.debug(f"Emotion {result.label} ({result.engine}, confidence {result.confidence})")
+        return result.label
     except Exception as e:
         logger.error(f"Failed to detect emotion: {e}")
         return "Neutral"
@@ -60,10 +49,30 @@ class ChatRequest(BaseModel):
             return self.message
         raise ValueError("Either 'user_input' or 'message' field is required")
 
+async def save_interaction_log(
+    child: Child,
+    user_input: str,
+    avatar_response: str,
+    detected_emotion: Optional[str],
+    timestamp: datetime,
+):
+    """Persist one chat exchange (runs as a background task after the reply is sent)."""
+    try:
+        await InteractionLog(
+            child=child,  # type: ignore
+            timestamp=timestamp,
+            user_input=user_input,
+            avatar_response=avatar_response,
+            detected_emotion=detected_emotion
+        ).insert()
+    except Exception as e:
+        logger.error(f"Failed to save interaction log for child {child.id}: {e}", exc_info=True)
+
 @router.post("/{child_id}/interact/chat", response_model=dict)
 async def interact_with_child(
     child_id: str,
     request: ChatRequest,
+    background_tasks: BackgroundTasks,
     child: Child = Depends(verify_child_ownership)
 ):
     try:
@@ -80,31 +89,108 @@ async def interact_with_child(
     else:
         prompt = f"User asks: {user_input}"
     
-    try:
-        avatar_response = generate_gemini_response(prompt)
-    except Exception as e:
-        logger.error(f"Error generating avatar response: {e}")
+    # Reply and emotion detection are independent LLM calls: run them concurrently
+    avatar_response, detected_emotion = await asyncio.gather(
+        generate_gemini_response(prompt, call_site="chat"),
+        detect_emotion_from_text(user_input),
+        return_exceptions=True,
+    )
+    if isinstance(avatar_response, BaseException):
+        logger.error(f"Error generating avatar response: {avatar_response}")
         avatar_response = "Sorry, I'm currently busy. Please ask again later!"
-
-    # Detect emotion from user input
-    detected_emotion = None
-    try:
-        detected_emotion = detect_emotion_from_text(user_input)
-        logger.info(f"Detected emotion: {detected_emotion} from input: {user_input[:50]}")
-    except Exception as e:
-        logger.error(f"Failed to detect emotion: {e}")
+    if isinstance(detected_emotion, BaseException):
+        logger.error(f"Failed to detect emotion: {detected_emotion}")
         detected_emotion = "Neutral"
+    logger.info(f"Detected emotion: {detected_emotion} from input: {user_input[:50]}")
 
-    interaction_log = InteractionLog(
-        child=child,  # type: ignore
-        user_input=user_input,
-        avatar_response=avatar_response,
-        detected_emotion=detected_emotion
+    # The log is written after the response has been sent
+    background_tasks.add_task(
+        save_interaction_log,
+        child,
+        user_input,
+        avatar_response,
+        detected_emotion,
+        datetime.utcnow(),
     )
-    await interaction_log.insert()
 
     return {"message": "Interaction recorded successfully.", "avatar_response": avatar_response}
 
+def _sse_event(data: Dict[str, Any]) -> str:
+    return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@router.post("/{child_id}/interact/chat/stream")
+async def interact_with_child_stream(
+    child_id: str,
+    request: ChatRequest,
+    http_request: Request,
+    child: Child = Depends(verify_child_ownership)
+):
+    """
+    Streaming variant of /interact/chat (Server-Sent Events).
+    Events: {"type": "token", "text": ...} per chunk, then
+    {"type": "done", "avatar_response": ..., "detected_emotion": ...} once the
+    reply is complete and the interaction has been saved, or {"type": "error"}
+    (also after some tokens if the reply broke off; nothing is saved then).
+    Tokens are pulled from the LLM only as fast as the client reads them; if the
+    client disconnects, the upstream request is closed and nothing is saved.
+    """
+    try:
+        user_input = request.get_user_input()
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    
+    if request.context:
+        prompt = f"Context: {request.context}\nUser asks: {user_input}"
+    else:
+        prompt = f"User asks: {user_input}"
+    
+    timestamp = datetime.utcnow()
+
+    async def event_stream():
+        # Emotion detection runs while the reply streams
+        emotion_task = asyncio.create_task(detect_emotion_from_text(user_input))
+        parts: List[str] = []
+        deltas = stream_openai_response(prompt, call_site="chat")
+        try:
+            try:
+                async with aclosing(deltas):
+                    async for delta in deltas:
+                        if await http_request.is_disconnected():
+                            logger.info(f"Chat stream for child {child_id} aborted by client")
+                            return
+                        parts.append(delta)
+                        yield _sse_event({"type": "token", "text": delta})
+            except RuntimeError as e:
+                # A reply cut off mid-stream is not saved as a complete interaction
+                logger.error(f"Error streaming avatar response: {e}")
+                yield _sse_event({
+                    "type": "error",
+                    "detail": "Sorry, I'm currently busy. Please ask again later!",
+                    "partial": bool(parts),
+                })
+                return
+            
+            avatar_response = "".join(parts).strip()
+            detected_emotion = await emotion_task
+            await save_interaction_log(child, user_input, avatar_response, detected_emotion, timestamp)
+            yield _sse_event({
+                "type": "done",
+                "avatar_response": avatar_response,
+                "detected_emotion": detected_emotion,
+            })
+        finally:
+            if not emotion_task.done():
+                emotion_task.cancel()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.get("/{child_id}/interact/logs", response_model=Dict[str, List[Dict[str, Any]]])
 async def get_interaction_logs(
     child_id: str,
@@ -138,44 +224,41 @@ async def get_interaction_logs(
 @router.get("/{child_id}/interact/history", response_model=List[Dict[str, Any]])
 async def get_interaction_history(
     child_id: str,
-    limit: Optional[int] = 20,
+    response: Response,
+    limit: int = Query(20, ge=1, le=HISTORY_MAX_LIMIT, description="Page size"),
+    before: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
     child: Child = Depends(verify_child_ownership)
 ):
     """
-    Get full interaction history (chat logs) for a child.
+    Get interaction history (chat logs) for a child, newest first.
     Returns list of interactions with user_input, avatar_response, timestamp, and detected_emotion.
+    Older pages are fetched with before=<X-Next-Cursor header of the previous page>.
     """
-    from app.dependencies import extract_id_from_link
-    
-    logger.info(f"Fetching interaction history for child_id: {child_id}, child.id: {child.id}")
-    
-    # Fetch all logs and filter by child ID (more reliable than query with Link)
-    all_logs = await InteractionLog.find_all().to_list()
-    child_id_str = str(child.id)
-    
-    # Filter logs for this child
-    child_logs = []
-    for log in all_logs:
-        log_child_id = extract_id_from_link(log.child) if hasattr(log, 'child') else None
-        if log_child_id == child_id_str:
-            child_logs.append(log)
-    
-    # Sort by timestamp descending and limit
-    child_logs.sort(key=lambda x: x.timestamp, reverse=True)
-    child_logs = child_logs[:limit or 20]
-    
-    logger.info(f"Found {len(child_logs)} interaction logs for child {child_id} (from {len(all_logs)} total logs)")
-    
-    result = [
+    query: Dict[str, Any] = {"child.$id": child.id}
+    if before:
+        try:
+            query = {"$and": [query, keyset_filter("timestamp", before)]}
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+
+    logs = await InteractionLog.get_motor_collection().find(query, HISTORY_PROJECTION).sort(
+        [("timestamp", DESCENDING), ("_id", DESCENDING)]
+    ).limit(limit + 1).to_list(length=limit + 1)
+
+    if len(logs) > limit:
+        logs = logs[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(logs[-1]["timestamp"], logs[-1]["_id"])
+
+    return [
         {
-            "id": str(log.id),
-            "timestamp": log.timestamp.isoformat(),
-            "user_input": log.user_input,
-            "avatar_response": log.avatar_response,
-            "detected_emotion": log.detected_emotion or "Neutral"
+            "id": str(log["_id"]),
+            "timestamp": log["timestamp"].isoformat(),
+            "user_input": log.get("user_input"),
+            "avatar_response": log.get("avatar_response"),
+            "detected_emotion": log.get("detected_emotion") or "Neutral"
         }
-        for log in child_logs
+        for log in logs
     ]
-    
-    logger.info(f"Returning {len(result)} interaction logs")
-    return result
\ No newline at end of file
@@ -0,0 +1,63 @@
+"""
+Jobs Router
+Progress of background jobs started by other endpoints (e.g. child / account deletion)
+"""
+
+from fastapi import APIRouter, HTTPException, status, Depends, Header
+from fastapi.security import OAuth2PasswordBearer
+from beanie import PydanticObjectId
+from typing import Optional
+from app.models.job_models import BackgroundJob
+from app.schemas.schemas import JobPublic
+from app.services.auth import get_current_user
+from app.services.jobs import status_token_matches
+
+router = APIRouter()
+
+# Jobs that delete the account are read with their status token instead of a login
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token", auto_error=False)
+
+
+@router.get("/{job_id}", response_model=JobPublic)
+async def get_job(
+    job_id: str,
+    job_token: Optional[str] = Header(None, alias="X-Job-Token", description="Status token returned when the job was started"),
+    access_token: Optional[str] = Depends(optional_oauth2_scheme),
+):
+    """
+    Get the status and progress of a background job started by the current user,
+    or of the job the X-Job-Token status token belongs to (account deletion).
+    """
+    if not PydanticObjectId.is_valid(job_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid job id format."
+        )
+    if not job_token and not access_token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    job = await BackgroundJob.get(job_id)
+    allowed = job is not None and status_token_matches(job, job_token)
+    if job is not None and not allowed and access_token:
+        current_user = await get_current_user(access_token)
+        allowed = job.owner_id == current_user.id
+    if not allowed:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found."
+        )
+    return JobPublic(
+        id=str(job.id),
+        kind=job.kind,
+        status=job.status,
+        total_steps=job.total_steps,
+        completed_steps=job.completed_steps,
+        progress=job.progress,
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
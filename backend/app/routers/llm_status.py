@@ -0,0 +1,28 @@
+"""
+LLM Status Router
+Operational metrics of the LLM layer (response cache, circuit breakers),
+readable by the accounts listed in ADMIN_EMAILS only
+"""
+
+from fastapi import APIRouter, Depends
+from app.models.user_models import User
+from app.dependencies import verify_admin_token
+from app.services.llm_cache import get_llm_cache
+from app.services.llm_resilience import circuit_breaker_states
+
+router = APIRouter()
+
+
+@router.get("/cache", response_model=dict)
+async def get_llm_cache_stats(current_user: User = Depends(verify_admin_token)):
+    """Hit / miss counters of this worker's LLM response cache, per call site."""
+    cache = get_llm_cache()
+    if cache is None:
+        return {"backend": "none"}
+    return cache.stats()
+
+
+@router.get("/breakers", response_model=dict)
+async def get_llm_breakers(current_user: User = Depends(verify_admin_token)):
+    """Circuit breaker state per "<provider>:<model>" in this worker (models not called yet are not listed)."""
+    return circuit_breaker_states()
@@ -216,7 +216,7 @@ async def complete_onboarding(
         else:
             try:
                 logging.info(f"🔍 Calling OpenAI API to analyze assessment for {child_data.full_name}...")
-                openai_result = analyze_assessment_with_chatgpt(
+                openai_result = await analyze_assessment_with_chatgpt(
                     child_info=child_info,
                     assessment_answers=assessment_answers,
                     questions_data=ASSESSMENT_QUESTIONS
@@ -1,16 +1,22 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
 from beanie import Link
 from app.models.report_models import Report
 from app.models.childtask_models import ChildTask, ChildTaskStatus
 from app.models.task_models import Task
 from app.models.interactionlog_models import InteractionLog
-from app.schemas.schemas import ReportPublic
-from app.dependencies import verify_child_ownership, extract_id_from_link, get_child_tasks_by_child, fetch_link_or_get_object
+from app.schemas.schemas import ReportPublic, ReportSummary
+from app.db.pagination import NEXT_CURSOR_HEADER, encode_cursor, keyset_filter
+from bson import DBRef
+from pymongo import DESCENDING
+from app.dependencies import verify_child_ownership, extract_id_from_link, get_child_tasks_by_child, LinkLoader, get_link_loader
 from app.models.child_models import Child
 from app.services.llm import generate_openai_response
+from app.services.prompt_budget import PromptBuilder, compact_json
+from app.services.job_coordinator import ChildPartition, iterate_child_pages
+from app.db.pipelines import completions_by_child_pipeline
 from app.models.user_models import User
 from app.dependencies import verify_parent_token
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 import logging
 import json
@@ -19,38 +25,105 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-@router.get("/{child_id}", response_model=List[ReportPublic])
+# Reports written per insert_many (and per checkpoint) by the weekly job
+WEEKLY_REPORT_CHUNK_SIZE = 1000
+
+# Interactions sent to the report prompt (newest first; trimmed further to the token budget)
+REPORT_MAX_INTERACTIONS = 30
+
+# Static instructions go in the system message so every report call shares the same prefix
+REPORT_SYSTEM_INSTRUCTION = """You are an expert child development analyst specializing in emotional intelligence and behavioral patterns. Analyze the provided child data and generate a comprehensive report with insights and suggestions.
+IMPORTANT: Even if there are no recorded emotions from interactions, you MUST infer emotional state from:
+1. Task completion patterns (high completion = positive emotions, giveups = frustration)
+2. Task categories (Social/Creativity tasks suggest positive engagement, Academic difficulty may indicate stress)
+3. Completion rate trends (improving = confidence, declining = discouragement)
+4. Child's personality, interests, and strengths
+Always provide emotion_trends with at least 2-3 emotions inferred from task patterns, even if no direct emotion data exists.
+
+EMOTION INFERENCE GUIDELINES:
+1. If recorded emotions exist: Use them as primary source, but also consider task patterns for context
+2. If NO recorded emotions: Infer emotions from task patterns:
+   - High completion rate (>70%) + mostly Social/Creativity tasks → Happy, Excited, Confident
+   - High completion rate + Academic/Logic tasks → Proud, Satisfied, Determined
+   - Low completion rate (<50%) or many giveups → Frustrated, Discouraged, but also check if tasks are too difficult
+   - Improving completion rate over time → Growing confidence, Positive
+   - Many in-progress tasks → Engaged, Curious, Motivated
+   - Mix of categories completed → Balanced, Well-rounded, Content
+3. Consider child's personality: Active child completing Physical tasks → Energetic, Happy
+4. Consider age-appropriateness: Age-appropriate tasks completed → Confident, Successful
+5. ALWAYS provide at least 2-3 emotions with estimated percentages, even if inferred
+
+Generate a report with the following structure (JSON only):
+{
+  "summary_text": "A comprehensive summary of the child's progress and emotional state (2-3 paragraphs). If no direct emotion data, infer from task patterns.",
+  "insights": {
+    "emotion_trends": {"<emotion>": <estimated percentage>, ...} (at least 2-3 emotions, e.g. {"Happy": 40, "Confident": 30, "Engaged": 20}; inferred from task completion patterns if no recorded emotions; percentages add up to roughly 100),
+    "most_common_emotion": "The most frequently detected emotion OR the most likely inferred emotion from task patterns. NEVER return 'N/A' or 'None'.",
+    "emotional_analysis": "Detailed analysis of emotional patterns. If no recorded emotions, analyze inferred emotions from task completion patterns, categories, and completion rates. Explain what the task patterns suggest about the child's emotional state. NEVER say 'lack of recorded emotions' - instead, explain what the task data indicates about their feelings.",
+    "task_performance": "Analysis of task completion patterns, including which categories show strength and which need support",
+    "strengths": ["List of observed strengths based on task completion and patterns"],
+    "areas_for_improvement": ["List of areas that need attention"]
+  },
+  "suggestions": {
+    "focus": "Main focus area for next period",
+    "recommended_activities": ["List of recommended activities"],
+    "parenting_tips": ["List of parenting tips based on the analysis"],
+    "emotional_support": "Specific suggestions for emotional support based on inferred or recorded emotions"
+  }
+}
+Return ONLY valid JSON, no markdown, no extra text."""
+
+REPORT_PREVIEW_LENGTH = 120
+
+# List projection: the summary_text / insights bodies stay on the server
+REPORT_SUMMARY_PROJECTION = {
+    "period_start": 1,
+    "period_end": 1,
+    "generated_at": 1,
+    "summary_preview": {"$substrCP": [{"$ifNull": ["$summary_text", ""]}, 0, REPORT_PREVIEW_LENGTH]},
+    "tasks_completed": "$insights.tasks_completed",
+}
+
+@router.get("/{child_id}", response_model=List[ReportSummary])
 async def get_reports(
-    child: Child = Depends(verify_child_ownership)
+    response: Response,
+    child: Child = Depends(verify_child_ownership),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of reports to return"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
 ):
-    """Get all reports for a child"""
-    child_id_str = str(child.id)
-    logger.info(f"Fetching reports for child_id: {child_id_str}")
-    
-    # Fetch all reports and filter by child_id
-    all_reports = await Report.find_all().to_list()
-    logger.info(f"Total reports in database: {len(all_reports)}")
-    child_reports = []
-    
-    for report in all_reports:
-        report_child_id = extract_id_from_link(report.child) if hasattr(report, 'child') else None
-        logger.debug(f"Report {report.id}: child_id={report_child_id}, target={child_id_str}")
-        if report_child_id == child_id_str:
-            child_reports.append(report)
-    
-    logger.info(f"Found {len(child_reports)} reports for child {child_id_str}")
-    
+    """
+    Get a child's reports, newest first.
+    List items carry a short summary preview; fetch a report by id for its full
+    text and insights. The next page's cursor is sent in the X-Next-Cursor header.
+    """
+    query: Dict[str, Any] = {"child.$id": child.id}
+    if cursor:
+        try:
+            query = {"$and": [query, keyset_filter("generated_at", cursor)]}
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+
+    rows = await Report.get_motor_collection().find(query, REPORT_SUMMARY_PROJECTION).sort(
+        [("generated_at", DESCENDING), ("_id", DESCENDING)]
+    ).limit(limit + 1).to_list(length=limit + 1)
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1]["generated_at"], rows[-1]["_id"])
+
     return [
-        ReportPublic(
-            id=str(r.id),
-            period_start=r.period_start,
-            period_end=r.period_end,
-            generated_at=r.generated_at,
-            summary_text=r.summary_text,
-            insights=r.insights,
-            suggestions=r.suggestions,
+        ReportSummary(
+            id=str(row["_id"]),
+            period_start=row["period_start"],
+            period_end=row["period_end"],
+            generated_at=row["generated_at"],
+            summary_preview=row.get("summary_preview") or "",
+            tasks_completed=row.get("tasks_completed"),
         )
-        for r in child_reports
+        for row in rows
     ]
 
 @router.get("/{child_id}/{report_id}", response_model=ReportPublic)
@@ -83,48 +156,77 @@ async def get_report(
         suggestions=report.suggestions,
     )
 
-async def generate_weekly_reports():
-    """Generate weekly reports for all children"""
-    from datetime import timedelta
+def weekly_report_period(now: Optional[datetime] = None):
+    """The 7 days before the start of today (UTC): the same window for a whole run, including resumed ones."""
+    now = now or datetime.utcnow()
+    period_end = datetime.combine(now.date(), datetime.min.time())
+    return period_end - timedelta(days=7), period_end
+
+async def generate_weekly_reports(partition: Optional[ChildPartition] = None):
+    """
+    Generate weekly reports for all children (or the children of one partition).
+    Completion counts of all children come from one aggregation grouped by child;
+    children are then read (name only) and their reports written with insert_many,
+    WEEKLY_REPORT_CHUNK_SIZE at a time, checkpointing the partition after each
+    chunk. Children that already have a report for the period are skipped, so
+    resumed or repeated runs do not create duplicates.
+    """
+    partition = partition or ChildPartition()
+    period_start, period_end = weekly_report_period()
     
-    children = await Child.find_all().to_list()
-    for child in children:
-        period_end = datetime.utcnow()
-        period_start = period_end - timedelta(days=7)
-        
-        # Get all tasks and filter
-        all_tasks = await ChildTask.find_all().to_list()
-        child_id_str = str(child.id)
-        tasks_completed = sum(
-            1 for t in all_tasks
-            if (extract_id_from_link(t.child) == child_id_str and
-                t.status == ChildTaskStatus.COMPLETED and
-                t.completed_at is not None and
-                t.completed_at >= period_start and
-                t.completed_at <= period_end)
-        )
+    rows = await ChildTask.get_motor_collection().aggregate(
+        completions_by_child_pipeline(period_start, period_end, partition.query(partition.cursor).get("_id"))
+    ).to_list(length=None)
+    completed = {row["_id"]: row["count"] for row in rows}
+    
+    reports_collection = Report.get_motor_collection()
+    async for children in iterate_child_pages(partition, {"deleted_at": None}, WEEKLY_REPORT_CHUNK_SIZE, projection={"name": 1}):
+        child_ids = [child["_id"] for child in children]
+        existing = {
+            extract_id_from_link(doc["child"])
+            for doc in await reports_collection.find(
+                {"child.$id": {"$in": child_ids}, "period_end": period_end},
+                {"child": 1},
+            ).to_list(length=None)
+        }
         
-        new_report = Report(
-            child=child,  # type: ignore
-            period_start=period_start,
-            period_end=period_end,
-            summary_text=f"Weekly report for {child.name}. Completed {tasks_completed} tasks.",
-            insights={"tasks_completed": tasks_completed},
-            suggestions={"focus": "Continue practicing daily tasks"}
-        )
-        await new_report.insert()
+        # Raw documents (same fields as Report): model validation and encoding
+        # would cost more than the database work at this volume
+        now = datetime.utcnow()
+        reports = []
+        for child in children:
+            if str(child["_id"]) in existing:
+                continue
+            tasks_completed = completed.get(child["_id"], 0)
+            reports.append({
+                "child": DBRef("children", child["_id"]),
+                "period_start": period_start,
+                "period_end": period_end,
+                "generated_at": now,
+                "summary_text": f"Weekly report for {child.get('name')}. Completed {tasks_completed} tasks.",
+                "insights": {"tasks_completed": tasks_completed},
+                "suggestions": {"focus": "Continue practicing daily tasks"},
+            })
+        if reports:
+            await reports_collection.insert_many(reports, ordered=False)
+        await partition.checkpoint(child_ids[-1], reports=len(reports), skipped=len(existing))
+    
+    logger.info(f"✅ Weekly reports generated: {partition.counts}")
 
-async def _generate_report_internal(child: Child) -> Report:
+async def _generate_report_internal(child: Child, loader: Optional[LinkLoader] = None) -> Report:
     """
     Internal helper function to generate a report for a child.
     Can be called from other routers.
     """
+    loader = loader or LinkLoader()
     # Set period (last 7 days by default)
     period_end = datetime.utcnow()
     period_start = period_end - timedelta(days=7)
     
-    # Collect task data
+    # Collect task data (library task details come from the embedded snapshots)
     all_child_tasks = await get_child_tasks_by_child(child)
+    task_templates = await loader.load_task_templates(all_child_tasks)
+    task_sources = {ct.id: source for ct, source in zip(all_child_tasks, task_templates)}
     tasks_completed = [
         ct for ct in all_child_tasks 
         if ct.status == ChildTaskStatus.COMPLETED 
@@ -142,23 +244,23 @@ async def _generate_report_internal(child: Child) -> Report:
         and period_start <= ct.assigned_at <= period_end
     ]
     
-    # Collect interaction logs and emotions
-    all_logs = await InteractionLog.find_all().to_list()
-    child_id_str = str(child.id)
+    # Collect interaction logs (newest first) and emotions of the period
+    period_logs = await InteractionLog.find({
+        "child.$id": child.id,
+        "timestamp": {"$gte": period_start, "$lte": period_end},
+    }).sort("-timestamp").to_list()
     interaction_logs = []
     emotion_counts = {}
     
-    for log in all_logs:
-        log_child_id = extract_id_from_link(log.child) if hasattr(log, 'child') else None
-        if log_child_id == child_id_str and period_start <= log.timestamp <= period_end:
-            interaction_logs.append({
-                "timestamp": log.timestamp.isoformat(),
-                "user_input": log.user_input,
-                "avatar_response": log.avatar_response,
-                "detected_emotion": log.detected_emotion or "Neutral"
-            })
-            emotion = log.detected_emotion or "Neutral"
-            emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
+    for log in period_logs:
+        emotion = log.detected_emotion or "Neutral"
+        # The child's own words carry the emotional signal; avatar replies are left out of the prompt
+        interaction_logs.append({
+            "time": log.timestamp.strftime("%m-%d %H:%M"),
+            "child": log.user_input,
+            "emotion": emotion
+        })
+        emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
     
     # Analyze task patterns for emotion inference
     # Group tasks by category and status to infer emotional state
@@ -166,7 +268,7 @@ async def _generate_report_internal(child: Child) -> Report:
     for task in all_child_tasks:
         if task.assigned_at and period_start <= task.assigned_at <= period_end:
             # Get task category
-            task_obj = await fetch_link_or_get_object(task.task, Task) if task.task else None
+            task_obj = task_sources.get(task.id)
             category = task_obj.category.value if task_obj else (task.custom_category.value if task.custom_category else "Other")
             
             if category not in task_category_breakdown:
@@ -198,50 +300,10 @@ async def _generate_report_internal(child: Child) -> Report:
     ):
         age -= 1
     
-    # Build context for LLM
-    context_data = {
-        "child_info": {
-            "name": child.name,
-            "nickname": child.nickname,
-            "age": age,
-            "personality": child.personality or [],
-            "interests": child.interests or [],
-            "strengths": child.strengths or [],
-            "challenges": child.challenges or []
-        },
-        "period": {
-            "start": period_start.isoformat(),
-            "end": period_end.isoformat()
-        },
-        "tasks": {
-            "completed": len(tasks_completed),
-            "in_progress": len(tasks_in_progress),
-            "given_up": len(tasks_given_up)
-        },
-        "emotions": emotion_counts,
-        "interactions": {
-            "total": len(interaction_logs),
-            "recent_logs": interaction_logs[-10:] if len(interaction_logs) > 10 else interaction_logs
-        }
-    }
-    
-    # Use LLM to generate report
-    system_instruction = (
-        "You are an expert child development analyst specializing in emotional intelligence and behavioral patterns. "
-        "Analyze the provided child data and generate a comprehensive report with insights and suggestions. "
-        "IMPORTANT: Even if there are no recorded emotions from interactions, you MUST infer emotional state from: "
-        "1. Task completion patterns (high completion = positive emotions, giveups = frustration) "
-        "2. Task categories (Social/Creativity tasks suggest positive engagement, Academic difficulty may indicate stress) "
-        "3. Completion rate trends (improving = confidence, declining = discouragement) "
-        "4. Child's personality, interests, and strengths "
-        "Always provide emotion_trends with at least 2-3 emotions inferred from task patterns, even if no direct emotion data exists. "
-        "Return ONLY valid JSON, no markdown, no extra text."
-    )
-    
     # Build task details for emotion inference (only completed tasks in period)
     task_details = []
     for task in tasks_completed[:10]:  # Show up to 10 completed tasks
-        task_obj = await fetch_link_or_get_object(task.task, Task) if task.task else None
+        task_obj = task_sources.get(task.id)
         if task_obj:
             task_details.append({
                 "title": task_obj.title,
@@ -255,7 +317,7 @@ async def _generate_report_internal(child: Child) -> Report:
         # Use all tasks for broader context
         all_tasks_for_context = [ct for ct in all_child_tasks if ct.status == ChildTaskStatus.COMPLETED]
         for task in all_tasks_for_context[:5]:  # Show up to 5 most recent completed tasks
-            task_obj = await fetch_link_or_get_object(task.task, Task) if task.task else None
+            task_obj = task_sources.get(task.id)
             if task_obj:
                 task_details.append({
                     "title": task_obj.title,
@@ -265,7 +327,9 @@ async def _generate_report_internal(child: Child) -> Report:
                     "note": "Completed outside this period"
                 })
     
-    prompt = f"""
+    prompt = (
+        PromptBuilder("report")
+        .add(f"""
 Analyze the following child data and generate a comprehensive report:
 
 CHILD INFORMATION:
@@ -284,60 +348,26 @@ TASK STATISTICS:
 - Given Up: {len(tasks_given_up)}
 
 TASK BREAKDOWN BY CATEGORY:
-{json.dumps(task_category_breakdown, ensure_ascii=False, indent=2)}
+{compact_json(task_category_breakdown)}
 
-RECENT COMPLETED TASKS (for emotion inference):
-{json.dumps(task_details, ensure_ascii=False, indent=2)}
+RECENT COMPLETED TASKS (for emotion inference, newest first):
+""")
+        .add_items(task_details, empty_text="[]", min_items=1)
+        .add(f"""
 
 RECORDED EMOTIONS FROM INTERACTIONS:
-{json.dumps(emotion_counts, ensure_ascii=False, indent=2) if emotion_counts else "No recorded emotions from interactions in this period."}
+{compact_json(emotion_counts) if emotion_counts else "No recorded emotions from interactions in this period."}
 
-RECENT INTERACTIONS (last 10):
-{json.dumps(interaction_logs[-10:] if len(interaction_logs) > 10 else interaction_logs, ensure_ascii=False, indent=2) if interaction_logs else "No interactions recorded in this period."}
-
-EMOTION INFERENCE GUIDELINES:
-1. If recorded emotions exist: Use them as primary source, but also consider task patterns for context
-2. If NO recorded emotions: Infer emotions from task patterns:
-   - High completion rate (>70%) + mostly Social/Creativity tasks → Happy, Excited, Confident
-   - High completion rate + Academic/Logic tasks → Proud, Satisfied, Determined
-   - Low completion rate (<50%) or many giveups → Frustrated, Discouraged, but also check if tasks are too difficult
-   - Improving completion rate over time → Growing confidence, Positive
-   - Many in-progress tasks → Engaged, Curious, Motivated
-   - Mix of categories completed → Balanced, Well-rounded, Content
-3. Consider child's personality: Active child completing Physical tasks → Energetic, Happy
-4. Consider age-appropriateness: Age-appropriate tasks completed → Confident, Successful
-5. ALWAYS provide at least 2-3 emotions with estimated percentages, even if inferred
-
-Generate a report with the following structure (JSON only):
-{{
-  "summary_text": "A comprehensive summary of the child's progress and emotional state (2-3 paragraphs). If no direct emotion data, infer from task patterns.",
-  "insights": {{
-    "tasks_completed": {len(tasks_completed)},
-    "tasks_verified": {len([t for t in tasks_completed if t.completed_at])},
-    "emotion_trends": {{
-      "MUST provide a dictionary with at least 2-3 emotions and their estimated counts/percentages. "
-      "If no recorded emotions, infer from task completion patterns. "
-      "Example: {{'Happy': 40, 'Confident': 30, 'Engaged': 20}} or {{'Frustrated': 30, 'Determined': 25, 'Neutral': 20}} "
-      "based on task patterns. Use percentages that add up to roughly 100."
-    }},
-    "most_common_emotion": "The most frequently detected emotion OR the most likely inferred emotion from task patterns. NEVER return 'N/A' or 'None'.",
-    "emotional_analysis": "Detailed analysis of emotional patterns. If no recorded emotions, analyze inferred emotions from task completion patterns, categories, and completion rates. Explain what the task patterns suggest about the child's emotional state. NEVER say 'lack of recorded emotions' - instead, explain what the task data indicates about their feelings.",
-    "task_performance": "Analysis of task completion patterns, including which categories show strength and which need support",
-    "strengths": ["List of observed strengths based on task completion and patterns"],
-    "areas_for_improvement": ["List of areas that need attention"]
-  }},
-  "suggestions": {{
-    "focus": "Main focus area for next period",
-    "recommended_activities": ["List of recommended activities"],
-    "parenting_tips": ["List of parenting tips based on the analysis"],
-    "emotional_support": "Specific suggestions for emotional support based on inferred or recorded emotions"
-  }}
-}}
-"""
+RECENT INTERACTIONS (newest first):
+""")
+        .add_items(interaction_logs[:REPORT_MAX_INTERACTIONS], empty_text="No interactions recorded in this period.")
+        .add("\n")
+        .build()
+    )
     
     # Call LLM
     try:
-        llm_response = generate_openai_response(prompt, system_instruction, max_tokens=2000)
+        llm_response = await generate_openai_response(prompt, REPORT_SYSTEM_INSTRUCTION, max_tokens=2000, call_site="report")
     except RuntimeError as e:
         error_msg = str(e)
         logger.error(f"LLM API error: {error_msg}")
@@ -385,8 +415,10 @@ Generate a report with the following structure (JSON only):
             detail=f"Failed to parse report data: {str(e)}"
         )
     
-    # Ensure insights exist
+    # Ensure insights exist; counts come from the data, not the model
     insights = report_data.get("insights", {})
+    insights["tasks_completed"] = len(tasks_completed)
+    insights["tasks_verified"] = len([t for t in tasks_completed if t.completed_at])
     
     # Fallback: If no emotion_trends or empty, infer from task patterns
     emotion_trends = insights.get("emotion_trends", {})
@@ -493,14 +525,15 @@ Generate a report with the following structure (JSON only):
 async def generate_report(
     child_id: str,
     child: Child = Depends(verify_child_ownership),
-    current_user: User = Depends(verify_parent_token)
+    current_user: User = Depends(verify_parent_token),
+    loader: LinkLoader = Depends(get_link_loader)
 ):
     """
     Generate a comprehensive report about a child.
     Collects data from tasks, interactions, and emotions, then uses LLM to analyze and create insights.
     """
     try:
-        new_report = await _generate_report_internal(child)
+        new_report = await _generate_report_internal(child, loader)
         
         logger.info(f"✅ Generated report for child {child.name} (ID: {child_id})")
         
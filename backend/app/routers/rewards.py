@@ -3,7 +3,8 @@ from beanie import Link
 from app.models.reward_models import Reward, RewardType, ChildReward, RedemptionRequest
 from app.models.child_models import Child
 from app.models.user_models import User
-from app.dependencies import verify_child_ownership, get_current_user, verify_reward_ownership, get_user_children, extract_id_from_link, fetch_link_or_get_object
+from app.dependencies import verify_child_ownership, get_current_user, verify_reward_ownership, get_user_children, extract_id_from_link, fetch_link_or_get_object, LinkLoader, get_link_loader
+from app.services.child_stats import record_reward_granted
 from typing import List, Optional
 from datetime import datetime
 from pydantic import BaseModel
@@ -238,7 +239,8 @@ async def request_redemption(
 @shop_router.get("/redemption-requests", response_model=List[dict])
 async def get_redemption_requests(
     status_filter: Optional[str] = Query(None, alias="status"),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    loader: LinkLoader = Depends(get_link_loader)
 ):
     """Get all redemption requests for children owned by current user (parent only)"""
     query_dict = {}
@@ -247,38 +249,35 @@ async def get_redemption_requests(
     
     # Get all children owned by current user
     user_children = await get_user_children(current_user)
-    user_children_ids = {str(child.id) for child in user_children}
+    children_by_id = {str(child.id): child for child in user_children}
     
     # Get all redemption requests
     all_requests = await RedemptionRequest.find(query_dict).sort("-requested_at").to_list()
     
     # Filter requests to only include those from user's children
+    user_requests = [req for req in all_requests if extract_id_from_link(req.child) in children_by_id]
+    
+    # Resolve all rewards with a single query
+    rewards = await loader.load_many([req.reward for req in user_requests], Reward)
+    
     results = []
-    for req in all_requests:
-        # Safely fetch child from Link
-        child = await fetch_link_or_get_object(req.child, Child)
-        if not child:
-            continue  # Skip if child not found
-        
+    for req, reward in zip(user_requests, rewards):
+        child = children_by_id[extract_id_from_link(req.child)]
         child_id = str(child.id)
         
-        # Only include if child belongs to current user
-        if child_id in user_children_ids:
-            # Safely fetch reward from Link
-            reward = await fetch_link_or_get_object(req.reward, Reward)
-            if not reward:
-                continue  # Skip if reward not found
-            
-            results.append({
-                "id": str(req.id),
-                "child": child.name,
-                "childId": child_id,
-                "rewardName": reward.name,
-                "rewardId": str(reward.id),
-                "dateCreated": req.requested_at.strftime("%Y-%m-%d"),
-                "cost": req.cost_coins,
-                "status": req.status,
-            })
+        if not reward:
+            continue  # Skip if reward not found
+        
+        results.append({
+            "id": str(req.id),
+            "child": child.name,
+            "childId": child_id,
+            "rewardName": reward.name,
+            "rewardId": str(reward.id),
+            "dateCreated": req.requested_at.strftime("%Y-%m-%d"),
+            "cost": req.cost_coins,
+            "status": req.status,
+        })
     
     return results
 
@@ -356,6 +355,7 @@ async def approve_redemption(
         reward=reward,  # type: ignore
     )
     await child_reward.insert()
+    await record_reward_granted(child.id, redemption=True)
     
     # Use set() to update only specific fields without serializing Links
     # This avoids the "Can not create dbref without id" error
@@ -428,13 +428,16 @@ async def reject_redemption(
 @router.get("/{child_id}/inventory", response_model=List[dict])
 async def get_inventory(
     child_id: str,
-    child: Child = Depends(verify_child_ownership)
+    child: Child = Depends(verify_child_ownership),
+    loader: LinkLoader = Depends(get_link_loader)
 ):
     """Get child's reward inventory"""
     child_rewards = await ChildReward.find(ChildReward.child.id == child.id).to_list()  # type: ignore
+    rewards = await loader.load_many([cr.reward for cr in child_rewards], Reward)
     results: list[dict] = []
-    for cr in child_rewards:
-        reward = await cr.reward.fetch()
+    for cr, reward in zip(child_rewards, rewards):
+        if not reward:
+            continue
         results.append({
             "id": str(cr.id),
             "earned_at": cr.earned_at.isoformat(),
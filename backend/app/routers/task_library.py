@@ -12,6 +12,7 @@ from typing import List, Optional
 from app.services.auth import get_current_user
 from app.models.user_models import User
 from app.dependencies import extract_id_from_link
+from app.services.task_snapshots import start_task_snapshot_propagation
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -128,6 +129,8 @@ async def update_task(
         task.unity_type = task_update.unity_type
     
     await task.save()
+    # Assigned copies of this task carry a snapshot of it; update them in a background job
+    await start_task_snapshot_propagation(task, current_user.id)
     
     return TaskPublic(
         id=str(task.id),
@@ -149,6 +152,7 @@ async def delete_task(
 ):
     """Delete a task from the library. Also removes it from any child's assigned tasks."""
     from app.models.childtask_models import ChildTask
+    from app.services.child_stats import rebuild_child_stats
     
     task = await Task.get(task_id)
     if not task:
@@ -158,9 +162,13 @@ async def delete_task(
         )
     
     
-    await ChildTask.find(ChildTask.task.id == task_id).delete()  # type: ignore
+    query = {"task.$id": task.id}
+    affected_children = await ChildTask.get_motor_collection().distinct("child.$id", query)
+    await ChildTask.find(query).delete()
     
     
     await task.delete()
+    for child_id in affected_children:
+        await rebuild_child_stats(child_id)
     
     return {"message": f"Task {task_id} deleted successfully."}
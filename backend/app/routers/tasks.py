@@ -1,13 +1,16 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
 from app.models.task_models import Task, TaskCategory, TaskType
 from app.models.child_models import Child
-from app.models.childtask_models import ChildTask, ChildTaskStatus, ChildTaskPriority, TaskData
+from app.models.childtask_models import ChildTask, ChildTaskStatus, ChildTaskPriority, TaskData, TaskSnapshot, UnityType as ChildTaskUnityType
 from app.schemas.schemas import TaskPublic, TaskCreate, ChildTaskPublic, ChildTaskWithDetails
 from typing import List, Optional
 from datetime import datetime, time
-from app.dependencies import verify_child_ownership, verify_parent_token, verify_child_token, get_child_from_token, get_child_tasks_by_child, extract_id_from_link, fetch_link_or_get_object, ensure_link_references_for_save
+from app.dependencies import verify_child_ownership, verify_parent_token, verify_child_token, get_child_from_token, get_child_tasks_by_child, extract_id_from_link, fetch_link_or_get_object, ensure_link_references_for_save, LinkLoader, get_link_loader
 from app.models.reward_models import ChildReward, Reward
 from app.services.auth import get_current_user
+from app.services.child_stats import record_task_transition, transition_child_task, record_reward_granted
+from app.db.pagination import NEXT_CURSOR_HEADER, encode_cursor, keyset_filter
+from pymongo import DESCENDING
 from app.models.user_models import User
 from pydantic import ValidationError, BaseModel
 import logging
@@ -17,6 +20,10 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Page size of the assigned task list when the client does not pass one
+CHILD_TASKS_DEFAULT_LIMIT = 50
+CHILD_TASKS_MAX_LIMIT = 500
+
 # Helper function to parse date string (YYYY-MM-DD) to datetime
 def parse_date_string(date_str: Optional[str]) -> Optional[datetime]:
     """Parse date string in YYYY-MM-DD format to datetime at midnight UTC."""
@@ -126,40 +133,74 @@ async def get_suggested_tasks(
 @router.get("/{child_id}/tasks", response_model=List[ChildTaskWithDetails])
 async def get_child_tasks(
     child_id: str,
+    response: Response,
     child: Child = Depends(verify_child_ownership),
-    limit: Optional[int] = Query(None, description="Limit number of results"),
+    limit: int = Query(CHILD_TASKS_DEFAULT_LIMIT, ge=1, le=CHILD_TASKS_MAX_LIMIT, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
     category: Optional[str] = Query(None, description="Filter by task category"),
-    status_filter: Optional[ChildTaskStatus] = Query(None, alias="status", description="Filter by task status")
+    status_filter: Optional[ChildTaskStatus] = Query(None, alias="status", description="Filter by task status"),
+    unity_type: Optional[ChildTaskUnityType] = Query(None, description="Filter by Unity task type"),
+    loader: LinkLoader = Depends(get_link_loader)
 ):
     """
-    Get child's assigned tasks with full task details populated.
-    Supports filtering by category and status, and limiting results.
+    Get child's assigned tasks with full task details populated, newest first.
+    Filters and limit are applied in the database query. Pages are ordered by
+    (assigned_at, _id) and hold at most `limit` tasks (50 by default); when more
+    tasks exist the next page's cursor is returned in the X-Next-Cursor response header.
     """
-    all_child_tasks = await get_child_tasks_by_child(child)
-    
+    conditions: List[dict] = [{"child.$id": child.id}]
     if status_filter:
-        child_tasks = [ct for ct in all_child_tasks if ct.status == status_filter]
-    else:
-        child_tasks = all_child_tasks
+        conditions.append({"status": status_filter.value})
+    if unity_type:
+        conditions.append({"unity_type": unity_type.value})
+    if category:
+        # Library tasks match on their embedded snapshot, custom tasks on task_data
+        category_conditions: List[dict] = [
+            {"task_snapshot.category": category},
+            {"task_data.category": category},
+        ]
+        # Tasks assigned before snapshots existed (until `manage.py backfill-snapshots`
+        # has run) match on the category of their linked library task
+        legacy_query = {"child.$id": child.id, "task_snapshot": None, "task": {"$ne": None}}
+        legacy_task_ids = await ChildTask.get_motor_collection().distinct("task.$id", legacy_query)
+        if legacy_task_ids:
+            matching_ids = await Task.get_motor_collection().distinct(
+                "_id", {"_id": {"$in": legacy_task_ids}, "category": category}
+            )
+            if matching_ids:
+                category_conditions.append({"task_snapshot": None, "task.$id": {"$in": matching_ids}})
+        conditions.append({"$or": category_conditions})
+    if cursor:
+        try:
+            conditions.append(keyset_filter("assigned_at", cursor))
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
     
-    child_tasks = sorted(child_tasks, key=lambda x: x.assigned_at, reverse=True)
+    # One extra document tells whether another page exists
+    child_tasks = await ChildTask.find({"$and": conditions}).sort(
+        [("assigned_at", DESCENDING), ("_id", DESCENDING)]
+    ).limit(limit + 1).to_list()
+    
+    if len(child_tasks) > limit:
+        child_tasks = child_tasks[:limit]
+        last = child_tasks[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.assigned_at, last.id)
+    
+    # Task details come from the embedded snapshots; only legacy tasks without
+    # one are resolved (with a single query)
+    library_tasks = await loader.load_task_templates(child_tasks)
     
     results = []
-    for ct in child_tasks:
-        # Get task details (either from Link or embedded)
+    for ct, library_task in zip(child_tasks, library_tasks):
+        # Get task details (either from the library task or embedded)
         if ct.task:
-            task_source = await fetch_link_or_get_object(ct.task, Task)
-            # Get task ID - handle both Link and already-fetched Task
-            if task_source:
-                task_id = str(task_source.id)
-            else:
-                # Fallback: try to get ID from link
-                if hasattr(ct.task, 'ref') and ct.task.ref:
-                    task_id = str(ct.task.ref.id)  # type: ignore
-                elif hasattr(ct.task, 'id'):
-                    task_id = str(ct.task.id)
-                else:
-                    continue
+            task_source = library_task
+            task_id = extract_id_from_link(ct.task)
+            if not task_id:
+                continue
         elif ct.task_data:
             task_source = ct.task_data
             task_id = f"custom-{ct.id}"  # Custom tasks don't have separate Task ID
@@ -169,10 +210,6 @@ async def get_child_tasks(
         if not task_source:
             continue
 
-        # Apply category filter if specified
-        if category and task_source.category != category:  # type: ignore
-            continue
-
         # Merge custom fields with task template/embedded data
         merged_details = merge_task_details(ct, task_source)
 
@@ -212,10 +249,6 @@ async def get_child_tasks(
             )
         )
     
-    # Apply limit after processing all tasks
-    if limit:
-        results = results[:limit]
-    
     return results
 
 @router.post("/{child_id}/tasks/{task_id}/start", response_model=ChildTaskPublic)
@@ -259,6 +292,7 @@ async def start_task(
     new_child_task = ChildTask(
         child=child,  # type: ignore
         task=task,  # type: ignore
+        task_snapshot=TaskSnapshot.from_task(task),
         status=ChildTaskStatus.ASSIGNED,
         assigned_at=datetime.utcnow(),
         due_date=parse_date_string(request.due_date),
@@ -266,6 +300,7 @@ async def start_task(
         notes=request.notes
     )
     await new_child_task.insert()
+    await record_task_transition(new_child_task, None, ChildTaskStatus.ASSIGNED, library_task=task)
     return ChildTaskPublic(
         id=str(new_child_task.id),
         status=new_child_task.status,
@@ -350,7 +385,9 @@ async def assign_task_to_child(
             existing.due_date = parse_date_string(request.due_date)
             existing.priority = priority
             existing.notes = request.notes
+            existing.task_snapshot = TaskSnapshot.from_task(task)
             await existing.save()
+            await record_task_transition(existing, ChildTaskStatus.UNASSIGNED, ChildTaskStatus.ASSIGNED, library_task=task)
             
             # Return updated task
             merged = merge_task_details(existing, task)
@@ -403,6 +440,7 @@ async def assign_task_to_child(
         new_child_task = ChildTask(
             child=child,  # type: ignore
             task=task,  # type: ignore
+            task_snapshot=TaskSnapshot.from_task(task),
             status=ChildTaskStatus.ASSIGNED,
             assigned_at=datetime.utcnow(),
             due_date=parse_date_string(request.due_date),
@@ -413,6 +451,7 @@ async def assign_task_to_child(
             custom_category=custom_category_enum
         )
         await new_child_task.insert()
+        await record_task_transition(new_child_task, None, ChildTaskStatus.ASSIGNED, library_task=task)
         logger.info(f"Successfully assigned task {task_id} to child {child_id}, child_task_id={new_child_task.id}")
     except ValidationError as e:
         logger.error(f"Validation error creating child task assignment: {e}", exc_info=True)
@@ -572,14 +611,16 @@ async def complete_task(
             detail=f"Cannot complete task with status '{status_value}'. Task must be in 'assigned' or 'in_progress' status."
         )
     
-    if current_status == ChildTaskStatus.ASSIGNED:
-        await child_task.set({"status": ChildTaskStatus.IN_PROGRESS})
-
-    await child_task.set({
-        "status": ChildTaskStatus.NEED_VERIFY,
+    # Conditional on the status checked above, so a double submit is not counted twice
+    completed = await transition_child_task(child_task, ChildTaskStatus.NEED_VERIFY, {
         "progress": 100,
         "completed_at": datetime.utcnow()
     })
+    if not completed:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Task status changed in the meantime. Please refresh and try again."
+        )
     
     return {"message": "Task completed successfully! Waiting for parent verification."}
 
@@ -633,14 +674,11 @@ async def verify_task(
             detail="Task must be waiting for verification."
         )
 
-    child_task.status = ChildTaskStatus.COMPLETED
-    child_task.completed_at = datetime.utcnow()
-
     # Award coins and badges - handle both Link and embedded task_data
     # Use the same reliable method as other endpoints
     if child_task.task:
-        # Task from library - fetch using the same method as get_child_tasks
-        task_source = await fetch_link_or_get_object(child_task.task, Task)
+        # Task from library - embedded snapshot, or the linked Task for older assignments
+        task_source = child_task.task_snapshot or await fetch_link_or_get_object(child_task.task, Task)
         if not task_source:
             logger.error(f"Failed to fetch task from link for child_task {child_task_id}")
             raise HTTPException(
@@ -657,6 +695,19 @@ async def verify_task(
             detail="Task data not found."
         )
 
+    # Mark completed first (conditional on NEED_VERIFY) so rewards are awarded only once
+    verified = await transition_child_task(
+        child_task,
+        ChildTaskStatus.COMPLETED,
+        {"completed_at": datetime.utcnow()},
+        library_task=task_source if child_task.task else None
+    )
+    if not verified:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Task status changed in the meantime. Please refresh and try again."
+        )
+
     # Use custom_reward_coins if set, otherwise use task's reward_coins
     reward_coins = child_task.custom_reward_coins if child_task.custom_reward_coins is not None else task_source.reward_coins
     child.current_coins += reward_coins
@@ -674,11 +725,8 @@ async def verify_task(
                     reward=reward  # type: ignore
                 )
                 await new_reward.insert()
+                await record_reward_granted(child.id)
 
-    await child_task.set({
-        "status": ChildTaskStatus.COMPLETED,
-        "completed_at": datetime.utcnow()
-    })
     await child.save()
     
     # Trigger skills update in background (non-blocking)
@@ -727,11 +775,15 @@ async def reject_task_verification(
 
     # Reject verification: return task to in-progress status
     # Reset progress to allow child to redo the task
-    await child_task.set({
-        "status": ChildTaskStatus.IN_PROGRESS,
+    rejected = await transition_child_task(child_task, ChildTaskStatus.IN_PROGRESS, {
         "progress": 0,  # Reset progress so child can redo
         "completed_at": None  # Clear completed_at
     })
+    if not rejected:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Task status changed in the meantime. Please refresh and try again."
+        )
     
     return {"message": "Task verification rejected. Task returned to in-progress status."}
 
@@ -801,9 +853,9 @@ async def update_assigned_task(
 
     # Fetch task details for response (handle both Link and embedded)
     if child_task.task:  # type: ignore
-        task_source = await fetch_link_or_get_object(child_task.task, Task)
+        task_source = child_task.task_snapshot or await fetch_link_or_get_object(child_task.task, Task)  # type: ignore
         if task_source:
-            task_id = str(task_source.id)
+            task_id = extract_id_from_link(child_task.task)  # type: ignore
         else:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -879,6 +931,7 @@ async def create_and_assign_task(
         notes=request.notes,
     )
     await child_task.insert()
+    await record_task_transition(child_task, None, ChildTaskStatus.ASSIGNED)
     
     # Return full details
     return ChildTaskWithDetails(
@@ -936,6 +989,7 @@ async def delete_assigned_task(
         )
     
     await child_task.delete()
+    await record_task_transition(child_task, child_task.status, None, from_completed_at=child_task.completed_at)
     
     return {"message": f"Task {child_task_id} unassigned successfully."}
 
@@ -1030,10 +1084,12 @@ async def giveup_task(
             detail=f"Cannot give up task with status '{child_task.status.value}'. Task must be assigned or in progress."
         )
     
-    if child_task.status == ChildTaskStatus.ASSIGNED:
-        await child_task.set({"status": ChildTaskStatus.IN_PROGRESS})
-    
-    await child_task.set({"status": ChildTaskStatus.GIVEUP})
+    gave_up = await transition_child_task(child_task, ChildTaskStatus.GIVEUP)
+    if not gave_up:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Task status changed in the meantime. Please refresh and try again."
+        )
     
     return {"message": "Task marked as given up successfully.", "status": ChildTaskStatus.GIVEUP.value}
 
@@ -1042,7 +1098,8 @@ async def get_unassigned_tasks(
     child_id: str,
     child: Child = Depends(verify_child_ownership),
     current_user: User = Depends(verify_child_token),
-    category: Optional[str] = Query(None, description="Filter by task category")
+    category: Optional[str] = Query(None, description="Filter by task category"),
+    loader: LinkLoader = Depends(get_link_loader)
 ):
     """
     Get unassigned tasks for a child (CHILD ONLY).
@@ -1052,9 +1109,10 @@ async def get_unassigned_tasks(
     child_tasks = [ct for ct in all_child_tasks if ct.status == ChildTaskStatus.UNASSIGNED]
     child_tasks = sorted(child_tasks, key=lambda x: x.assigned_at, reverse=True)
     
+    tasks = await loader.load_task_templates(child_tasks)
+    
     results = []
-    for ct in child_tasks:
-        task = await fetch_link_or_get_object(ct.task, Task) if ct.task else None
+    for ct, task in zip(child_tasks, tasks):
         if not task:
             continue
         
@@ -1073,7 +1131,7 @@ async def get_unassigned_tasks(
                 notes=ct.notes,
                 unity_type=ct.unity_type.value if ct.unity_type else None,
                 task=TaskPublic(
-                    id=str(task.id),
+                    id=extract_id_from_link(ct.task),
                     title=task.title,
                     description=task.description,
                     category=task.category,
@@ -1093,7 +1151,8 @@ async def get_unassigned_tasks(
 async def get_giveup_tasks(
     child_id: str,
     child: Child = Depends(verify_child_ownership),
-    current_user: User = Depends(verify_parent_token)
+    current_user: User = Depends(verify_parent_token),
+    loader: LinkLoader = Depends(get_link_loader)
 ):
     """
     Get tasks that child has given up on (Parent endpoint).
@@ -1103,9 +1162,10 @@ async def get_giveup_tasks(
     child_tasks = [ct for ct in all_child_tasks if ct.status == ChildTaskStatus.GIVEUP]
     child_tasks = sorted(child_tasks, key=lambda x: x.assigned_at, reverse=True)
     
+    tasks = await loader.load_task_templates(child_tasks)
+    
     results = []
-    for ct in child_tasks:
-        task = await fetch_link_or_get_object(ct.task, Task) if ct.task else None
+    for ct, task in zip(child_tasks, tasks):
         if not task:
             continue
         
@@ -1124,7 +1184,7 @@ async def get_giveup_tasks(
                 custom_category=ct.custom_category,
                 unity_type=ct.unity_type.value if ct.unity_type else None,
                 task=TaskPublic(
-                    id=str(task.id),
+                    id=extract_id_from_link(ct.task),
                     title=task.title,
                     description=task.description,
                     category=task.category,
@@ -1146,7 +1206,8 @@ async def get_completed_tasks(
     child: Child = Depends(verify_child_ownership),
     current_user: User = Depends(verify_child_token),
     limit: Optional[int] = Query(None, description="Limit number of results"),
-    category: Optional[str] = Query(None, description="Filter by task category")
+    category: Optional[str] = Query(None, description="Filter by task category"),
+    loader: LinkLoader = Depends(get_link_loader)
 ):
     """
     Get completed tasks for a child (CHILD ONLY).
@@ -1156,9 +1217,10 @@ async def get_completed_tasks(
     child_tasks = [ct for ct in all_child_tasks if ct.status == ChildTaskStatus.COMPLETED]
     child_tasks = sorted(child_tasks, key=lambda x: x.completed_at or x.assigned_at, reverse=True)
     
+    tasks = await loader.load_task_templates(child_tasks)
+    
     results = []
-    for ct in child_tasks:
-        task = await fetch_link_or_get_object(ct.task, Task) if ct.task else None
+    for ct, task in zip(child_tasks, tasks):
         if not task:
             continue
         
@@ -1177,7 +1239,7 @@ async def get_completed_tasks(
                 notes=ct.notes,
                 unity_type=ct.unity_type.value if ct.unity_type else None,
                 task=TaskPublic(
-                    id=str(task.id),
+                    id=extract_id_from_link(ct.task),
                     title=task.title,
                     description=task.description,
                     category=task.category,
@@ -1,33 +1,117 @@
+"""
+Scheduled jobs.
+Every worker registers the same triggers, but a trigger only hands the run to
+the job coordinator (app/services/job_coordinator.py), so each run executes
+once across all workers and replicas; sharded jobs split their children into
+SCHEDULER_PARTITIONS ranges that idle workers pick up.
+The scheduler is started by main.py on application startup (never at import).
+"""
+
+from datetime import datetime, timedelta
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from app.config import settings
 from app.routers.reports import generate_weekly_reports
 from app.routers.generate import generate_auto_tasks_for_all_children
 from app.routers.dashboard import update_skills_for_all_children
+from app.services.job_coordinator import get_job_coordinator
+from app.services.jobs import resume_jobs, shutdown_jobs
+import app.services.cascade_delete  # noqa: F401 (registers the delete job kinds to resume)
+import app.services.task_snapshots  # noqa: F401 (registers the snapshot propagation job kind)
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Fires that start up to this long after their scheduled time still belong to that run
+# (must be shorter than the interval of every coordinated trigger)
+MISFIRE_GRACE_SECONDS = 15 * 60
 
 scheduler = AsyncIOScheduler()
+coordinator = get_job_coordinator()
+
+
+def run_key_for(trigger: CronTrigger) -> str:
+    """Scheduled fire time being executed now; identical on every worker."""
+    now = datetime.now(trigger.timezone)
+    fire_time = trigger.get_next_fire_time(None, now - timedelta(seconds=MISFIRE_GRACE_SECONDS))
+    return fire_time.isoformat(timespec="minutes")
+
+
+def add_coordinated_job(name: str, func, trigger: CronTrigger, partitions: int = 1):
+    coordinator.register(name, func, partitions)
+
+    async def fire():
+        await coordinator.run(name, run_key_for(trigger))
+
+    scheduler.add_job(
+        fire,
+        trigger=trigger,
+        id=name,
+        replace_existing=True,
+        misfire_grace_time=MISFIRE_GRACE_SECONDS,
+        coalesce=True,
+    )
+
 
 # Weekly report generation (Sunday at midnight)
-scheduler.add_job(
+add_coordinated_job(
+    "weekly_report_job",
     generate_weekly_reports,
-    trigger=CronTrigger(day_of_week="sun", hour=0),
-    id="weekly_report_job",
-    replace_existing=True
+    CronTrigger(day_of_week="sun", hour=0),
+    partitions=settings.SCHEDULER_PARTITIONS,
 )
 
 # Auto-generate tasks for all children (daily at 8:00 AM)
-scheduler.add_job(
+add_coordinated_job(
+    "auto_generate_tasks_job",
     generate_auto_tasks_for_all_children,
-    trigger=CronTrigger(hour=8, minute=0),  # 8:00 AM daily
-    id="auto_generate_tasks_job",
-    replace_existing=True
+    CronTrigger(hour=8, minute=0),  # 8:00 AM daily
+    partitions=settings.SCHEDULER_PARTITIONS,
 )
 
 # Update skills for all children (daily at 9:00 AM, after task generation)
-scheduler.add_job(
+add_coordinated_job(
+    "update_skills_job",
     update_skills_for_all_children,
-    trigger=CronTrigger(hour=9, minute=0),  # 9:00 AM daily
-    id="update_skills_job",
-    replace_existing=True
+    CronTrigger(hour=9, minute=0),  # 9:00 AM daily
+    partitions=settings.SCHEDULER_PARTITIONS,
+)
+
+# Take over partitions of dead workers and help with sharded runs
+scheduler.add_job(
+    coordinator.sweep,
+    trigger=IntervalTrigger(seconds=settings.SCHEDULER_SWEEP_SECONDS),
+    id="job_lease_sweep",
+    replace_existing=True,
+    max_instances=1,
+    coalesce=True,
 )
 
-scheduler.start()
\ No newline at end of file
+# Resume request-started background jobs (e.g. cascade deletes) whose worker stopped
+# (also once right after startup, see start_scheduler)
+scheduler.add_job(
+    resume_jobs,
+    trigger=IntervalTrigger(seconds=settings.SCHEDULER_SWEEP_SECONDS),
+    id="background_job_resume",
+    replace_existing=True,
+    max_instances=1,
+    coalesce=True,
+)
+
+
+def start_scheduler():
+    if not settings.SCHEDULER_ENABLED:
+        logger.info("Scheduler disabled on this worker (SCHEDULER_ENABLED=false)")
+        return
+    if not scheduler.running:
+        scheduler.start()
+        scheduler.add_job(resume_jobs, id="background_job_resume_startup", replace_existing=True)
+        logger.info(f"⏰ Scheduler started on {coordinator.worker_id}")
+
+
+async def shutdown_scheduler():
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
+    await coordinator.shutdown()
+    await shutdown_jobs()
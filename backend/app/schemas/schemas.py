@@ -7,6 +7,7 @@ import enum
 from app.models.task_models import TaskCategory, TaskType
 from app.models.childtask_models import ChildTaskStatus, ChildTaskPriority
 from app.models.reward_models import RewardType
+from app.models.job_models import JobStatus
 
 class UserBase(BaseModel):
     email: EmailStr
@@ -427,3 +428,25 @@ class ReportInDB(ReportBase):
 
 class ReportPublic(ReportInDB):
     pass
+
+# List view of a report: the full summary_text / insights are only returned by
+# GET /reports/{child_id}/{report_id}
+class ReportSummary(BaseModel):
+    id: str
+    period_start: datetime
+    period_end: datetime
+    generated_at: datetime
+    summary_preview: str
+    tasks_completed: Optional[int] = None
+
+class JobPublic(BaseModel):
+    id: str
+    kind: str
+    status: JobStatus
+    total_steps: int
+    completed_steps: int
+    progress: Dict[str, int]
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
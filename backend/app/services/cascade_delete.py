@@ -0,0 +1,132 @@
+"""
+Cascade delete for children and accounts.
+Dependent data is removed with one delete_many per collection, matched by the
+indexed child id ($in over all children being deleted) and by the legacy link
+formats not yet normalized, instead of loading and deleting documents one by one.
+Runs as a tracked background job (app.services.jobs) that is resumed on another
+worker if its worker stops. Children are marked deleted (Child.deleted_at) when
+the job is created, so they disappear from the API before their data is gone.
+"""
+
+from bson import ObjectId
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from app.db.migrations import link_in_query
+from app.services.jobs import JobProgress, create_job, new_status_token, register_job_kind, start_job
+from app.models.job_models import BackgroundJob
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _child_dependents() -> List[Tuple[str, Any, str]]:
+    """(step name, model, child link field) for every collection holding a child's data ("_id": keyed by the child id)."""
+    from app.models.childtask_models import ChildTask
+    from app.models.reward_models import ChildReward, RedemptionRequest
+    from app.models.child_models import ChildDevelopmentAssessment
+    from app.models.gamesession_models import GameSession
+    from app.models.interactionlog_models import InteractionLog
+    from app.models.report_models import Report
+    from app.models.childstats_models import ChildStats
+    from app.models.user_models import User
+
+    return [
+        ("child_tasks", ChildTask, "child"),
+        ("child_rewards", ChildReward, "child"),
+        ("redemption_requests", RedemptionRequest, "child"),
+        ("assessments", ChildDevelopmentAssessment, "child"),
+        ("game_sessions", GameSession, "child"),
+        ("interaction_logs", InteractionLog, "child"),
+        ("reports", Report, "child"),
+        ("child_stats", ChildStats, "_id"),
+        ("child_accounts", User, "child_profile"),  # child login accounts
+    ]
+
+
+async def _delete_many(model, query: Dict[str, Any]) -> int:
+    result = await model.get_motor_collection().delete_many(query)
+    return result.deleted_count
+
+
+async def delete_children_data(child_ids: List[ObjectId], progress: JobProgress, user_id: Optional[ObjectId] = None):
+    """
+    Delete all dependent data of the given children, then the children, then
+    optionally the parent's rewards and account (parents last, so an interrupted
+    job never leaves data without the document that leads to it).
+    Every step is idempotent, so an interrupted job is simply run again.
+    """
+    from app.models.child_models import Child
+    from app.models.reward_models import Reward
+    from app.models.user_models import User
+
+    for step, model, field in _child_dependents():
+        query = {"_id": {"$in": child_ids}} if field == "_id" else link_in_query(field, child_ids)
+        await progress.step_done(step, await _delete_many(model, query))
+
+    await progress.step_done("children", await _delete_many(Child, {"_id": {"$in": child_ids}}))
+
+    if user_id is not None:
+        await progress.step_done("rewards", await _delete_many(Reward, link_in_query("created_by", [user_id])))
+        await progress.step_done("user", await _delete_many(User, {"_id": user_id}))
+
+
+def _total_steps(delete_user: bool) -> int:
+    return 1 + len(_child_dependents()) + (2 if delete_user else 0)
+
+
+async def _run_child_delete(job: BackgroundJob, progress: JobProgress):
+    await delete_children_data([ObjectId(child_id) for child_id in job.params["child_ids"]], progress)
+
+
+async def _run_account_delete(job: BackgroundJob, progress: JobProgress):
+    await delete_children_data(
+        [ObjectId(child_id) for child_id in job.params["child_ids"]],
+        progress,
+        user_id=ObjectId(job.params.get("user_id") or job.owner_id),
+    )
+
+
+register_job_kind("delete_child", _run_child_delete)
+register_job_kind("delete_account", _run_account_delete)
+
+
+async def _mark_children_deleted(child_ids: List[ObjectId]):
+    """Hide the children from the API and the scheduled jobs while their data is deleted."""
+    from app.models.child_models import Child
+
+    await Child.get_motor_collection().update_many(
+        {"_id": {"$in": child_ids}, "deleted_at": None},
+        {"$set": {"deleted_at": datetime.utcnow()}},
+    )
+
+
+async def start_child_delete(child_id: ObjectId, owner_id: ObjectId) -> BackgroundJob:
+    """Start deleting one child and its data in the background."""
+    job = await create_job(
+        "delete_child",
+        owner_id=owner_id,
+        params={"child_ids": [str(child_id)]},
+        total_steps=_total_steps(delete_user=False),
+    )
+    await _mark_children_deleted([child_id])
+    start_job(job)
+    return job
+
+
+async def start_account_delete(user_id: ObjectId, child_ids: List[ObjectId]) -> Tuple[BackgroundJob, str]:
+    """
+    Start deleting a parent account, its children and all their data in the
+    background. Returns the job and a status token: the account is gone once the
+    job finishes, so its status is read with the token instead of a login.
+    """
+    status_token = new_status_token()
+    job = await create_job(
+        "delete_account",
+        owner_id=user_id,
+        params={"user_id": str(user_id), "child_ids": [str(child_id) for child_id in child_ids]},
+        total_steps=_total_steps(delete_user=True),
+        status_token=status_token,
+    )
+    await _mark_children_deleted(child_ids)
+    start_job(job)
+    return job, status_token
@@ -0,0 +1,301 @@
+"""
+ChildStats maintenance.
+Counters are updated with $inc on every task / reward state change, so read
+endpoints never recount a child's tasks. rebuild_child_stats() recomputes a
+child's document from scratch (one aggregation) to repair drift; every $inc
+bumps the document's version, and a rebuild only replaces the version it
+started from (retrying otherwise), so increments made meanwhile are not lost.
+"""
+
+from bson import ObjectId
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.models.childstats_models import ChildStats
+from app.models.childtask_models import ChildTask, ChildTaskStatus
+from app.models.task_models import Task
+from app.db.pipelines import child_task_stats_pipeline
+from app.dependencies import extract_id_from_link, fetch_link_or_get_object
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Legacy categories are counted under their current names
+LEGACY_CATEGORY_MAP = {"IQ": "Logic", "EQ": "Social"}
+
+# completions_by_day keeps today and the days before it (older buckets are pruned)
+COMPLETIONS_WINDOW_DAYS = 7
+
+# Rebuild attempts while counters keep changing under it
+REBUILD_MAX_ATTEMPTS = 5
+
+
+def completions_window_start(now: Optional[datetime] = None) -> str:
+    """First completions_by_day key inside the window."""
+    return ((now or datetime.utcnow()) - timedelta(days=COMPLETIONS_WINDOW_DAYS)).strftime("%Y-%m-%d")
+
+
+def normalize_category(category: Any) -> Optional[str]:
+    """Category value as a plain string, with IQ -> Logic and EQ -> Social."""
+    if category is None:
+        return None
+    value = category.value if hasattr(category, "value") else str(category)
+    return LEGACY_CATEGORY_MAP.get(value, value)
+
+
+def _status_value(task_status: Any) -> Optional[str]:
+    if task_status is None:
+        return None
+    return task_status.value if hasattr(task_status, "value") else str(task_status)
+
+
+def _transition_inc(
+    library_task: Optional[Task],
+    from_status: Optional[ChildTaskStatus],
+    to_status: Optional[ChildTaskStatus],
+    from_completed_at: Optional[datetime] = None,
+    to_completed_at: Optional[datetime] = None,
+) -> Dict[str, int]:
+    """
+    Build the $inc document for one ChildTask moving from_status -> to_status.
+    None means the task did not exist before / does not exist anymore.
+    """
+    inc: Dict[str, int] = {}
+
+    def add(path: str, value: int):
+        inc[path] = inc.get(path, 0) + value
+
+    category = normalize_category(library_task.category) if library_task else None
+    difficulty = library_task.difficulty if library_task else 0
+
+    for task_status, completed_at, sign in (
+        (from_status, from_completed_at, -1),
+        (to_status, to_completed_at, 1),
+    ):
+        status_value = _status_value(task_status)
+        if status_value is None:
+            continue
+        add(f"status_counts.{status_value}", sign)
+        if not category:
+            continue
+        add(f"category_status_counts.{category}.{status_value}", sign)
+        if status_value == ChildTaskStatus.COMPLETED.value:
+            add(f"category_completed_difficulty.{category}", sign * difficulty)
+            if completed_at:
+                add(f"completions_by_day.{completed_at.strftime('%Y-%m-%d')}.{category}", sign)
+
+    return {path: value for path, value in inc.items() if value != 0}
+
+
+async def _apply_inc(child_id, inc: Dict[str, int]):
+    """Apply counters to the child's stats document; build it first if it does not exist yet."""
+    if not inc:
+        return
+    collection = ChildStats.get_motor_collection()
+    stats = await collection.find_one_and_update(
+        {"_id": child_id},
+        {"$inc": {**inc, "version": 1}, "$set": {"updated_at": datetime.utcnow()}},
+        projection={"completions_by_day": 1},
+        return_document=ReturnDocument.AFTER,
+    )
+    if stats is None:
+        # No stats yet for this child: compute them from the current state,
+        # which already includes the change being recorded
+        await rebuild_child_stats(child_id)
+        return
+
+    window_start = completions_window_start()
+    stale_days = [day for day in stats.get("completions_by_day") or {} if day < window_start]
+    if stale_days:
+        await collection.update_one(
+            {"_id": child_id},
+            {"$unset": {f"completions_by_day.{day}": "" for day in stale_days}},
+        )
+
+
+async def _library_task_of(child_task: ChildTask) -> Optional[Task]:
+    if not child_task.task:
+        return None
+    if child_task.task_snapshot:
+        return child_task.task_snapshot  # type: ignore
+    return await fetch_link_or_get_object(child_task.task, Task)
+
+
+async def record_task_transition(
+    child_task: ChildTask,
+    from_status: Optional[ChildTaskStatus],
+    to_status: Optional[ChildTaskStatus],
+    library_task: Optional[Task] = None,
+    from_completed_at: Optional[datetime] = None,
+):
+    """
+    Record a ChildTask state change in ChildStats.
+    Use from_status=None for a newly inserted task and to_status=None for a deleted one.
+    child_task must already hold the new state (completed_at of the new status).
+    """
+    if from_status == to_status:
+        return
+    if library_task is None:
+        library_task = await _library_task_of(child_task)
+    child_id = ObjectId(extract_id_from_link(child_task.child))
+    inc = _transition_inc(
+        library_task,
+        from_status,
+        to_status,
+        from_completed_at=from_completed_at,
+        to_completed_at=child_task.completed_at if to_status else None,
+    )
+    try:
+        await _apply_inc(child_id, inc)
+    except Exception as e:
+        # Stats must never break the task flow; `manage.py rebuild-stats` repairs drift
+        logger.error(f"Failed to update stats for child {child_id}: {e}", exc_info=True)
+
+
+async def record_tasks_inserted(child_id, inserted: List[Tuple[ChildTask, Optional[Task]]]):
+    """Record several newly inserted ChildTasks of one child ((child_task, library_task) pairs) in one update."""
+    inc: Dict[str, int] = {}
+    for child_task, library_task in inserted:
+        for path, value in _transition_inc(library_task, None, child_task.status).items():
+            inc[path] = inc.get(path, 0) + value
+    try:
+        await _apply_inc(child_id, inc)
+    except Exception as e:
+        logger.error(f"Failed to update stats for child {child_id}: {e}", exc_info=True)
+
+
+async def transition_child_task(
+    child_task: ChildTask,
+    to_status: ChildTaskStatus,
+    fields: Optional[Dict[str, Any]] = None,
+    library_task: Optional[Task] = None,
+) -> bool:
+    """
+    Move a ChildTask to to_status only if its status is still the one loaded,
+    and record the change in ChildStats.
+    Returns False if the task was changed concurrently (nothing is written).
+    """
+    from_status = child_task.status
+    from_completed_at = child_task.completed_at
+    update = {"status": _status_value(to_status), **(fields or {})}
+
+    result = await ChildTask.get_motor_collection().update_one(
+        {"_id": child_task.id, "status": _status_value(from_status)},
+        {"$set": update},
+    )
+    if result.modified_count == 0:
+        return False
+
+    child_task.status = to_status
+    for field, value in (fields or {}).items():
+        setattr(child_task, field, value)
+
+    await record_task_transition(
+        child_task,
+        from_status,
+        to_status,
+        library_task=library_task,
+        from_completed_at=from_completed_at,
+    )
+    return True
+
+
+async def record_reward_granted(child_id, redemption: bool = False):
+    """Record a new ChildReward (task badge or approved redemption)."""
+    inc = {"badges_earned": 1}
+    if redemption:
+        inc["redemptions_approved"] = 1
+    try:
+        await _apply_inc(child_id, inc)
+    except Exception as e:
+        logger.error(f"Failed to update stats for child {child_id}: {e}", exc_info=True)
+
+
+async def _compute_child_stats(child_id) -> ChildStats:
+    """Stats of a child counted from ChildTask / ChildReward / RedemptionRequest (not saved)."""
+    from app.models.reward_models import ChildReward, RedemptionRequest
+
+    results = await ChildTask.get_motor_collection().aggregate(
+        child_task_stats_pipeline(child_id)
+    ).to_list(length=1)
+    facets = results[0] if results else {"by_status": [], "library": []}
+
+    stats = ChildStats(id=child_id)
+    window_start = completions_window_start()
+    stats.status_counts = {row["_id"]: row["count"] for row in facets["by_status"]}
+
+    for row in facets["library"]:
+        category = normalize_category(row["_id"]["category"])
+        task_status = row["_id"]["status"]
+        day = row["_id"].get("day")
+
+        status_counts = stats.category_status_counts.setdefault(category, {})
+        status_counts[task_status] = status_counts.get(task_status, 0) + row["count"]
+        if task_status == ChildTaskStatus.COMPLETED.value:
+            stats.category_completed_difficulty[category] = (
+                stats.category_completed_difficulty.get(category, 0) + row["difficulty"]
+            )
+            if day and day >= window_start:
+                day_counts = stats.completions_by_day.setdefault(day, {})
+                day_counts[category] = day_counts.get(category, 0) + row["count"]
+
+    stats.badges_earned = await ChildReward.find({"child.$id": child_id}).count()
+    stats.redemptions_approved = await RedemptionRequest.find(
+        {"child.$id": child_id, "status": "approved"}
+    ).count()
+    stats.updated_at = datetime.utcnow()
+    return stats
+
+
+async def rebuild_child_stats(child_id) -> ChildStats:
+    """
+    Recompute a child's stats document and replace the stored one.
+    The replacement only applies if no $inc landed since the recount started
+    (same version); otherwise the recount is repeated.
+    """
+    collection = ChildStats.get_motor_collection()
+    for attempt in range(REBUILD_MAX_ATTEMPTS):
+        current = await collection.find_one({"_id": child_id}, {"version": 1})
+        stats = await _compute_child_stats(child_id)
+        if current is None:
+            stats.version = 0
+            try:
+                await collection.insert_one(stats.model_dump(by_alias=True))
+                return stats
+            except DuplicateKeyError:
+                continue  # created concurrently (first $inc of the child); recount against it
+        version = current.get("version", 0)
+        stats.version = version + 1
+        result = await collection.replace_one(
+            # Documents written before versioning have no version field
+            {"_id": child_id, "version": version if "version" in current else None},
+            stats.model_dump(by_alias=True, exclude={"id"}),
+        )
+        if result.matched_count:
+            return stats
+    logger.warning(f"Stats of child {child_id} kept changing during {REBUILD_MAX_ATTEMPTS} rebuild attempts; kept the stored counters")
+    return await ChildStats.get(child_id) or stats
+
+
+async def get_child_stats(child_id) -> ChildStats:
+    """Read a child's stats (built on first access)."""
+    stats = await ChildStats.get(child_id)
+    if stats is None:
+        stats = await rebuild_child_stats(child_id)
+    return stats
+
+
+async def rebuild_all_child_stats(progress: Callable[[str], None] = print) -> int:
+    """Rebuild stats for every child. Returns the number of children processed."""
+    from app.models.child_models import Child
+
+    collection = Child.get_motor_collection()
+    total = await collection.count_documents({})
+    processed = 0
+    async for child in collection.find({}, {"_id": 1}):
+        await rebuild_child_stats(child["_id"])
+        processed += 1
+        if processed % 100 == 0 or processed == total:
+            progress(f"   {processed}/{total} children")
+    return processed
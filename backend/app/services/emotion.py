@@ -0,0 +1,257 @@
+"""
+Emotion detection for chat messages.
+Engines share one interface (async detect(text) -> EmotionResult) and are
+selected with Settings.EMOTION_ENGINE:
+- "lexicon": in-process keyword classifier, no network calls
+- "llm":     one LLM call per message
+- "local":   lexicon first, LLM only when the lexicon's confidence is below
+             EMOTION_LLM_FALLBACK_THRESHOLD (default)
+"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from app.config import settings
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+EMOTIONS = ["Happy", "Sad", "Angry", "Excited", "Scared", "Neutral", "Curious", "Frustrated", "Proud", "Worried"]
+DEFAULT_EMOTION = "Neutral"
+
+
+@dataclass
+class EmotionResult:
+    label: str
+    confidence: float  # 0..1
+    engine: str
+
+
+class EmotionEngine(ABC):
+    name = "base"
+
+    @abstractmethod
+    async def detect(self, text: str) -> EmotionResult:
+        """Label one message."""
+
+
+# (pattern, weight) per emotion. Patterns are matched on whole words of the
+# lowercased message; explicit emotion words weigh the most. Entries are general
+# emotion vocabulary, picked from the misses on DEV_EMOTION_FIXTURES: never add
+# phrases taken from the held-out messages (app/data/emotion_fixtures.py) or the seed data.
+EMOTION_LEXICON: Dict[str, List[Tuple[str, float]]] = {
+    "Happy": [
+        ("happy", 3), ("glad", 3), ("yay", 2.5), ("joy", 3), ("joyful", 3), ("cheerful", 3),
+        ("delighted", 3), ("good mood", 3), ("wonderful", 2), ("love", 1.5), ("favorite", 1.5),
+        ("favourite", 1.5), ("fun", 1.5), ("smile", 2), ("smiled", 2), ("smiling", 2), ("laugh", 2),
+        ("laughed", 2), ("laughing", 2), ("funny", 1.5), ("cute", 1.5), ("haha", 2), ("hehe", 2),
+        ("feel good", 2.5), ("feel great", 2.5), ("nice", 1), ("thank you", 2), ("thanks", 2),
+        ("great", 1), ("hi", 1), ("hello", 1),
+        ("vui", 3), ("cảm ơn", 2),
+    ],
+    "Sad": [
+        ("sad", 3), ("unhappy", 3), ("cry", 2.5), ("crying", 2.5), ("cried", 2.5), ("tears", 2.5),
+        ("lonely", 3), ("alone", 2), ("miserable", 3), ("heartbroken", 3), ("feel down", 3),
+        ("left out", 2.5), ("miss", 2), ("missing", 2), ("upset", 2), ("nobody", 1.5), ("no one", 1.5),
+        ("forgot", 1), ("lost", 1), ("buồn", 3),
+    ],
+    "Angry": [
+        ("angry", 3), ("mad", 2.5), ("furious", 3), ("hate", 2.5), ("grr", 2.5), ("annoyed", 2),
+        ("annoying", 2), ("unfair", 2.5), ("not fair", 2.5), ("leave me alone", 2.5), ("stop it", 2),
+        ("lied", 1.5), ("pushed", 1.5), ("hit me", 2), ("stupid", 1.5),
+        ("giận", 3), ("tức", 2.5),
+    ],
+    "Excited": [
+        ("excited", 3), ("thrilled", 3), ("pumped", 3), ("can't wait", 3), ("omg", 2), ("yes", 1.5),
+        ("awesome", 1.5), ("amazing", 1.5), ("cool", 1), ("wow", 1.5), ("soon", 1), ("tomorrow", 1),
+        ("want to play", 2), ("let's", 1), ("play", 1),
+        ("háo hức", 3), ("thích quá", 2),
+    ],
+    "Scared": [
+        ("scared", 3), ("scary", 3), ("afraid", 3), ("frightened", 3), ("frightens", 3), ("fear", 2.5),
+        ("terrified", 3), ("creepy", 3), ("spooky", 3), ("nightmare", 2.5), ("bad dream", 3),
+        ("ghost", 2), ("ghosts", 2), ("monster", 1.5), ("dark", 1.5), ("hid", 1.5), ("hide", 1.5),
+        ("spider", 1.5), ("lightning", 1.5), ("thunder", 1.5), ("noise", 1), ("sợ", 3),
+    ],
+    "Curious": [
+        ("curious", 3), ("wonder", 2), ("why", 2), ("how", 1), ("what", 1), ("where", 1), ("explain", 2),
+        ("tell me", 1.5), ("interesting", 2), ("tại sao", 2), ("là gì", 2),
+    ],
+    "Frustrated": [
+        ("frustrated", 3), ("frustrating", 3), ("ugh", 2.5), ("don't understand", 3), ("don't get", 2.5),
+        ("doesn't work", 2.5), ("can't do", 2.5), ("impossible", 2.5), ("hard", 2), ("difficult", 2),
+        ("don't want to", 2.5), ("give up", 2.5), ("stuck", 2.5), ("confusing", 2),
+        ("again and again", 2), ("wrong", 1.5), ("won't", 1), ("khó", 2),
+    ],
+    "Proud": [
+        ("proud", 3), ("i did it", 3), ("by myself", 2.5), ("without help", 2.5), ("gold star", 3),
+        ("first place", 3), ("medal", 2.5), ("award", 2.5), ("prize", 2), ("scored", 2),
+        ("built", 2), ("solved", 2), ("won", 2.5), ("learned", 2), ("can do", 1.5), ("finished", 1.5),
+        ("tự hào", 3),
+    ],
+    "Worried": [
+        ("worried", 3), ("worry", 3), ("worrying", 3), ("nervous", 3), ("anxious", 3), ("stressed", 3),
+        ("concerned", 3), ("what if", 3.5), ("hope", 1.5), ("keep thinking", 2), ("lo lắng", 3),
+    ],
+    "Neutral": [
+        ("ok", 1.5), ("okay", 1.5), ("fine", 1),
+    ],
+}
+
+# Positive words preceded by a negation ("not happy") count towards Sad
+_NEGATIONS = {"not", "don't", "dont", "never", "no", "isn't", "wasn't", "không"}
+_NEGATED_TO = {"Happy": "Sad", "Excited": "Sad", "Proud": "Sad"}
+
+# Punctuation cues: questions lean Curious, exclamations lean Excited
+_QUESTION_WEIGHT = 1.0
+_EXCLAMATION_WEIGHT = 0.5
+
+_STRETCHED = re.compile(r"([a-z])\1{2,}")
+
+# A best score at or above this is a confident match (single explicit emotion word)
+_STRONG_SCORE = 2.0
+
+
+def _compile_lexicon() -> List[Tuple[str, re.Pattern, float]]:
+    compiled = []
+    for emotion, entries in EMOTION_LEXICON.items():
+        for phrase, weight in entries:
+            # Apostrophes count as word characters, so "won" does not match "won't"
+            compiled.append((emotion, re.compile(rf"(?<![\w']){re.escape(phrase)}(?![\w'])"), weight))
+    return compiled
+
+
+class LexiconEmotionEngine(EmotionEngine):
+    """Keyword classifier over EMOTIONS; microseconds per message, no I/O."""
+
+    name = "lexicon"
+
+    def __init__(self):
+        self._patterns = _compile_lexicon()
+
+    def classify(self, text: str) -> EmotionResult:
+        normalized = text.lower().replace("’", "'")
+        # Stretched words ("yesss", "sooo") are matched as their plain spelling
+        normalized = _STRETCHED.sub(r"\1", normalized)
+        scores: Dict[str, float] = {}
+
+        for emotion, pattern, weight in self._patterns:
+            for match in pattern.finditer(normalized):
+                preceding = normalized[:match.start()].split()[-2:]
+                if emotion in _NEGATED_TO and _NEGATIONS.intersection(preceding):
+                    emotion_hit = _NEGATED_TO[emotion]
+                else:
+                    emotion_hit = emotion
+                scores[emotion_hit] = scores.get(emotion_hit, 0.0) + weight
+
+        if "?" in normalized:
+            scores["Curious"] = scores.get("Curious", 0.0) + _QUESTION_WEIGHT
+        if "!" in normalized:
+            scores["Excited"] = scores.get("Excited", 0.0) + _EXCLAMATION_WEIGHT
+
+        if not scores:
+            return EmotionResult(DEFAULT_EMOTION, 0.0, self.name)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        label, best = ranked[0]
+        second = ranked[1][1] if len(ranked) > 1 else 0.0
+        # Clear winner and a strong cue -> high confidence
+        confidence = ((best - second) / best) * min(1.0, best / _STRONG_SCORE)
+        return EmotionResult(label, round(confidence, 3), self.name)
+
+    async def detect(self, text: str) -> EmotionResult:
+        return self.classify(text)
+
+
+class LLMEmotionEngine(EmotionEngine):
+    """One short LLM call per message."""
+
+    name = "llm"
+
+    SYSTEM_INSTRUCTION = (
+        "You are an emotion detection expert. "
+        "Analyze the text and return ONLY the primary emotion as a single word. "
+        f"Choose from: {', '.join(EMOTIONS)}. "
+        "Return ONLY the emotion word, no explanations, no punctuation, no extra text."
+    )
+    # Repeated messages ("hi", "ok", ...) are answered from the LLM cache
+    CACHE_TTL = 24 * 60 * 60
+
+    async def detect(self, text: str) -> EmotionResult:
+        from app.services.llm import generate_openai_response
+
+        prompt = f"""
+Analyze this child's message and detect the primary emotion:
+"{text}"
+
+Return ONLY one word: {', '.join(EMOTIONS[:-1])}, or {EMOTIONS[-1]}.
+"""
+        try:
+            emotion = await generate_openai_response(
+                prompt,
+                self.SYSTEM_INSTRUCTION,
+                max_tokens=20,
+                timeout=10,
+                cache_ttl=self.CACHE_TTL,
+                call_site="emotion",
+                validate=self._parse_label,
+            )
+        except ValueError as e:
+            logger.warning(f"{e}, defaulting to {DEFAULT_EMOTION}")
+            return EmotionResult(DEFAULT_EMOTION, 0.0, self.name)
+        return EmotionResult(self._parse_label(emotion), 1.0, self.name)
+
+    @staticmethod
+    def _parse_label(text: str) -> str:
+        """The emotion named by the reply; ValueError (and no caching) if it is not one of EMOTIONS."""
+        emotion = text.strip().capitalize()
+        if emotion not in EMOTIONS:
+            raise ValueError(f"Invalid emotion detected: {emotion}")
+        return emotion
+
+
+class FallbackEmotionEngine(EmotionEngine):
+    """Use the primary engine; ask the fallback only when the primary is not confident."""
+
+    name = "local"
+
+    def __init__(self, primary: EmotionEngine, fallback: EmotionEngine, threshold: float):
+        self.primary = primary
+        self.fallback = fallback
+        self.threshold = threshold
+
+    async def detect(self, text: str) -> EmotionResult:
+        result = await self.primary.detect(text)
+        if result.confidence >= self.threshold:
+            return result
+        try:
+            return await self.fallback.detect(text)
+        except Exception as e:
+            logger.warning(f"Emotion fallback ({self.fallback.name}) failed, using {result.label}: {e}")
+            return result
+
+
+def build_emotion_engine(name: str) -> EmotionEngine:
+    if name == "lexicon":
+        return LexiconEmotionEngine()
+    if name == "llm":
+        return LLMEmotionEngine()
+    if name == "local":
+        return FallbackEmotionEngine(
+            LexiconEmotionEngine(),
+            LLMEmotionEngine(),
+            settings.EMOTION_LLM_FALLBACK_THRESHOLD,
+        )
+    raise ValueError(f"Unknown emotion engine: {name}")
+
+
+_engine: Optional[EmotionEngine] = None
+
+
+def get_emotion_engine() -> EmotionEngine:
+    """Engine configured by Settings.EMOTION_ENGINE (created once)."""
+    global _engine
+    if _engine is None:
+        _engine = build_emotion_engine(settings.EMOTION_ENGINE)
+    return _engine
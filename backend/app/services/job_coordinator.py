@@ -0,0 +1,560 @@
+"""
+Cluster-wide coordination of scheduled jobs.
+Every worker runs the same APScheduler triggers; the job_leases collection
+makes each run happen once across all of them:
+- The first worker to reach a run (job name + scheduled fire time) plans it:
+  the children are split into contiguous _id ranges (partitions, 1 for
+  unsharded jobs), each stored as a lease document.
+- Workers claim partitions atomically and keep their lease alive with
+  heartbeats while they process it; a worker that loses its lease stops.
+- Every SCHEDULER_SWEEP_SECONDS each worker looks for partitions whose lease
+  expired (worker died or was restarted) and takes them over, so a run always
+  finishes, and idle workers join sharded runs.
+- Jobs walk their partition in pages of children ordered by _id
+  (iterate_child_pages) and checkpoint after each page: the cursor (last child
+  _id), counters and per-child errors are stored on the partition, so a
+  takeover resumes after the last checkpoint instead of starting over. Jobs
+  ordering children by another key also store its value at the cursor.
+- Each run is recorded as a BackgroundJob (kind "scheduled:<job>") with its
+  status, per-counter totals and errors: the run history.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app.config import settings
+import asyncio
+import logging
+import os
+import socket
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Lease expiry of partitions nobody holds yet
+_UNCLAIMED = datetime(1970, 1, 1)
+# Per-child errors kept on a partition (most recent)
+MAX_PARTITION_ERRORS = 50
+
+
+class PartitionStatus:
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class LeaseLost(Exception):
+    """The partition's lease was taken over by another worker."""
+
+
+@dataclass
+class ChildPartition:
+    """
+    A contiguous range of child _ids (lower <= _id < upper, open-ended when None)
+    and its checkpoint: children up to `cursor` are done, with `counts` so far.
+    Jobs walking the children by another key than _id also checkpoint the key's
+    value at the cursor (`cursor_key`); they are done up to (cursor_key, cursor).
+    `since` is the start of the job's previous completed run (the watermark of
+    incremental jobs; None if there is none).
+    The default partition covers all children and keeps its checkpoint in memory.
+    """
+
+    index: int = 0
+    count: int = 1
+    lower: Optional[ObjectId] = None
+    upper: Optional[ObjectId] = None
+    cursor: Optional[ObjectId] = None
+    cursor_key: Optional[Any] = None
+    counts: Dict[str, int] = field(default_factory=dict)
+    since: Optional[datetime] = None
+    _save: Optional[Callable[["ChildPartition", List[Dict[str, Any]]], Awaitable[None]]] = field(default=None, repr=False)
+    _errors: List[Dict[str, Any]] = field(default_factory=list, repr=False)
+
+    def query(self, after: Optional[ObjectId] = None) -> Dict[str, Any]:
+        """Filter on the children collection selecting this partition (past `after` if given)."""
+        bounds: Dict[str, Any] = {}
+        if after is not None:
+            bounds["$gt"] = after
+        elif self.lower is not None:
+            bounds["$gte"] = self.lower
+        if self.upper is not None:
+            bounds["$lt"] = self.upper
+        return {"_id": bounds} if bounds else {}
+
+    def record_error(self, child_id: Any, error: Any):
+        """Remember a per-child failure; stored with the next checkpoint."""
+        self._errors.append({"child_id": child_id, "error": str(error)[:300], "at": datetime.utcnow()})
+
+    async def checkpoint(self, cursor: ObjectId, cursor_key: Optional[Any] = None, **counts: int):
+        """
+        Mark every child up to `cursor` (and `cursor_key`) as done and add `counts` to the counters.
+        Raises LeaseLost if another worker has taken the partition over.
+        """
+        self.cursor = cursor
+        self.cursor_key = cursor_key
+        for name, value in counts.items():
+            self.counts[name] = self.counts.get(name, 0) + value
+        errors, self._errors = self._errors, []
+        if self._save is not None:
+            await self._save(self, errors)
+
+
+async def iterate_child_pages(
+    partition: ChildPartition,
+    query: Dict[str, Any],
+    page_size: int,
+    projection: Optional[Dict[str, Any]] = None,
+    model: Optional[Any] = None,
+) -> AsyncIterator[List[Any]]:
+    """
+    Children of the partition matching `query`, in _id order after the partition's
+    checkpoint, one page at a time (keyset pagination: no server cursor is held
+    open while a page is processed). Call partition.checkpoint() after each page.
+    Pages hold Child documents, or raw dicts with only the `projection` fields.
+    `model` reads another collection keyed by child _id instead (e.g. ChildStats).
+    """
+    if model is None:
+        from app.models.child_models import Child
+        model = Child
+
+    after = partition.cursor
+    while True:
+        page_query = {**query, **partition.query(after)}
+        if projection is None:
+            page = await model.find(page_query).sort("+_id").limit(page_size).to_list()
+        else:
+            page = await model.get_motor_collection().find(page_query, projection).sort("_id", 1).limit(page_size).to_list(length=page_size)
+        if not page:
+            return
+        yield page
+        if len(page) < page_size:
+            return
+        after = page[-1].id if projection is None else page[-1]["_id"]
+
+
+@dataclass
+class CoordinatedJob:
+    name: str
+    func: Callable[[ChildPartition], Awaitable[Any]]
+    partitions: int = 1
+
+
+class JobCoordinator:
+    def __init__(self, lease_seconds: float, sweep_seconds: float, max_attempts: int):
+        self.lease_seconds = lease_seconds
+        self.sweep_seconds = sweep_seconds
+        self.max_attempts = max_attempts
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.jobs: Dict[str, CoordinatedJob] = {}
+        self._indexes_ready = False
+        self._running: Dict[asyncio.Task, str] = {}  # work task -> partition id
+
+    def _collection(self):
+        from app.db.database import db
+        return db["job_leases"]
+
+    async def _ensure_indexes(self):
+        if not self._indexes_ready:
+            from app.db.indexes import INDEX_CATALOG
+            await self._collection().create_indexes(INDEX_CATALOG["job_leases"])
+            self._indexes_ready = True
+
+    def register(self, name: str, func: Callable[[ChildPartition], Awaitable[Any]], partitions: int = 1):
+        self.jobs[name] = CoordinatedJob(name, func, max(1, partitions))
+
+    # ---------- planning ----------
+
+    async def _partition_bounds(self, count: int) -> List[Optional[ObjectId]]:
+        """count - 1 child _ids splitting the children into ranges of about equal size."""
+        from app.db.database import db
+        children = db["children"]
+        total = await children.count_documents({})
+        bounds: List[Optional[ObjectId]] = []
+        for i in range(1, count):
+            doc = await children.find({}, {"_id": 1}).sort("_id", 1).skip(total * i // count).limit(1).to_list(length=1)
+            bound = doc[0]["_id"] if doc else None
+            if bound is not None and (not bounds or bounds[-1] != bound):
+                bounds.append(bound)
+        return bounds
+
+    async def plan_run(self, name: str, run_key: str) -> bool:
+        """
+        Create the partitions of a run unless another worker already did.
+        Returns True if this worker planned it.
+        """
+        await self._ensure_indexes()
+        collection = self._collection()
+        now = datetime.utcnow()
+        try:
+            # Only one worker can move the job's plan document to a new run key;
+            # a stale "planning" state (planner died) can be taken over after the lease time
+            await collection.find_one_and_update(
+                {"_id": name, "$or": [
+                    {"run_key": {"$ne": run_key}},
+                    {"status": "planning", "planned_at": {"$lt": now - timedelta(seconds=self.lease_seconds)}},
+                ]},
+                {"$set": {
+                    "run_key": run_key,
+                    "status": "planning",
+                    "planned_by": self.worker_id,
+                    "planned_at": now,
+                    "finished_partitions": 0,
+                    "failed_partitions": 0,
+                    "completed_at": None,
+                }},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            return False
+
+        job = self.jobs[name]
+        bounds = await self._partition_bounds(job.partitions) if job.partitions > 1 else []
+        edges = [None, *bounds, None]
+        count = len(edges) - 1
+        run = await self._run_record(name, run_key, count)
+        since = await self._previous_run_start(name, run_key)
+        for index in range(count):
+            # Deterministic ids: a planner taking over a stale plan rewrites the same partitions
+            await collection.update_one(
+                {"_id": f"{name}:{run_key}:{index}"},
+                {"$setOnInsert": {
+                    "job": name,
+                    "run_key": run_key,
+                    "run_id": run.id,
+                    "index": index,
+                    "count": count,
+                    "lower": edges[index],
+                    "upper": edges[index + 1],
+                    "status": PartitionStatus.PENDING,
+                    "owner": None,
+                    "expires_at": _UNCLAIMED,
+                    "attempts": 0,
+                    "cursor": None,
+                    "cursor_key": None,
+                    "counts": {},
+                    "errors": [],
+                    "since": since,
+                }},
+                upsert=True,
+            )
+        await collection.update_one(
+            {"_id": name, "run_key": run_key},
+            {"$set": {"status": "planned", "partitions": count, "run_id": run.id}},
+        )
+        logger.info(f"🗓️ Planned {name} run {run_key} in {count} partition(s) on {self.worker_id}")
+        return True
+
+    async def _run_record(self, name: str, run_key: str, partitions: int):
+        """The run's BackgroundJob (reused when a stale plan is taken over)."""
+        from app.models.job_models import BackgroundJob, JobStatus
+        from app.services.jobs import create_job
+
+        kind = f"scheduled:{name}"
+        run = await BackgroundJob.find_one({"kind": kind, "params.run_key": run_key})
+        if run is None:
+            run = await create_job(kind, params={"run_key": run_key}, total_steps=partitions)
+        await run.set({"status": JobStatus.RUNNING, "started_at": datetime.utcnow(), "total_steps": partitions})
+        return run
+
+    async def _previous_run_start(self, name: str, run_key: str) -> Optional[datetime]:
+        """Start of the job's most recent completed run before this one."""
+        from app.models.job_models import BackgroundJob, JobStatus
+
+        previous = await BackgroundJob.find({
+            "kind": f"scheduled:{name}",
+            "status": JobStatus.COMPLETED,
+            "params.run_key": {"$ne": run_key},
+        }).sort("-started_at").first_or_none()
+        return previous.started_at if previous else None
+
+    async def _wait_until_planned(self, name: str, run_key: str) -> bool:
+        deadline = asyncio.get_running_loop().time() + self.lease_seconds
+        while asyncio.get_running_loop().time() < deadline:
+            plan = await self._collection().find_one({"_id": name})
+            if not plan or plan.get("run_key") != run_key:
+                # A newer run replaced it
+                return False
+            if plan.get("status") != "planning":
+                return True
+            await asyncio.sleep(1)
+        return False
+
+    # ---------- partitions ----------
+
+    async def claim_partition(self, name: str, run_key: str) -> Optional[Dict[str, Any]]:
+        """Atomically take one unfinished partition whose lease is free or expired."""
+        now = datetime.utcnow()
+        return await self._collection().find_one_and_update(
+            {
+                "job": name,
+                "run_key": run_key,
+                "status": {"$in": [PartitionStatus.PENDING, PartitionStatus.RUNNING]},
+                "expires_at": {"$lt": now},
+                "attempts": {"$lt": self.max_attempts},
+            },
+            {
+                "$set": {
+                    "status": PartitionStatus.RUNNING,
+                    "owner": self.worker_id,
+                    "expires_at": now + timedelta(seconds=self.lease_seconds),
+                    "heartbeat_at": now,
+                    "started_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("index", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _heartbeat(self, partition_id: str, work: asyncio.Task):
+        """Renew the lease every third of its duration; cancel the work if it was lost."""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            now = datetime.utcnow()
+            try:
+                result = await self._collection().update_one(
+                    {"_id": partition_id, "owner": self.worker_id},
+                    {"$set": {"expires_at": now + timedelta(seconds=self.lease_seconds), "heartbeat_at": now}},
+                )
+            except Exception as e:
+                # Keep working through a brief database outage; the lease may still be valid
+                logger.warning(f"Heartbeat of {partition_id} failed: {e}")
+                continue
+            if result.matched_count == 0:
+                logger.warning(f"⚠️ Lost lease on {partition_id}, stopping")
+                work.cancel()
+                return
+
+    async def _save_checkpoint(self, partition_id: str, partition: ChildPartition, errors: List[Dict[str, Any]]):
+        now = datetime.utcnow()
+        update: Dict[str, Any] = {"$set": {
+            "cursor": partition.cursor,
+            "cursor_key": partition.cursor_key,
+            "counts": partition.counts,
+            "checkpoint_at": now,
+            # A checkpoint also proves the worker is alive
+            "expires_at": now + timedelta(seconds=self.lease_seconds),
+            "heartbeat_at": now,
+        }}
+        if errors:
+            update["$push"] = {"errors": {"$each": errors, "$slice": -MAX_PARTITION_ERRORS}}
+        result = await self._collection().update_one({"_id": partition_id, "owner": self.worker_id}, update)
+        if result.matched_count == 0:
+            raise LeaseLost(f"Lease on {partition_id} was taken over")
+
+    async def _finish_partition(
+        self,
+        doc: Dict[str, Any],
+        status: str,
+        error: Optional[str] = None,
+        counts: Optional[Dict[str, int]] = None,
+    ):
+        """Record a partition as done / failed and close the run once all partitions are finished."""
+        from app.models.job_models import BackgroundJob, JobStatus
+
+        now = datetime.utcnow()
+        result = await self._collection().update_one(
+            {"_id": doc["_id"], "owner": doc["owner"]},
+            {"$set": {"status": status, "error": error, "finished_at": now, "expires_at": now}},
+        )
+        if result.matched_count == 0:
+            return
+        failed = status == PartitionStatus.FAILED
+        counts = counts if counts is not None else doc.get("counts") or {}
+        if doc.get("run_id"):
+            await BackgroundJob.get_motor_collection().update_one(
+                {"_id": doc["run_id"]},
+                {"$inc": {"completed_steps": 1, **{f"progress.{name}": value for name, value in counts.items()}}},
+            )
+        plan = await self._collection().find_one_and_update(
+            {"_id": doc["job"], "run_key": doc["run_key"]},
+            {"$inc": {"finished_partitions": 1, "failed_partitions": int(failed)}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if not plan or plan.get("finished_partitions") != plan.get("partitions"):
+            return
+        run_failed = plan.get("failed_partitions", 0) > 0
+        await self._collection().update_one(
+            {"_id": doc["job"], "run_key": doc["run_key"]},
+            {"$set": {"status": "failed" if run_failed else "completed", "completed_at": now}},
+        )
+        if doc.get("run_id"):
+            run_error = None
+            if run_failed:
+                run_error = f"{plan['failed_partitions']}/{plan['partitions']} partition(s) failed"
+            await BackgroundJob.get_motor_collection().update_one(
+                {"_id": doc["run_id"]},
+                {"$set": {
+                    "status": JobStatus.FAILED if run_failed else JobStatus.COMPLETED,
+                    "error": run_error,
+                    "finished_at": now,
+                }},
+            )
+        if run_failed:
+            logger.error(f"❌ {doc['job']} run {doc['run_key']} finished with failed partitions")
+        else:
+            logger.info(f"✅ {doc['job']} run {doc['run_key']} completed")
+
+    async def run_partition(self, doc: Dict[str, Any]):
+        """Process one claimed partition under its lease."""
+        job = self.jobs[doc["job"]]
+
+        async def save(partition: ChildPartition, errors: List[Dict[str, Any]]):
+            await self._save_checkpoint(doc["_id"], partition, errors)
+
+        partition = ChildPartition(
+            doc["index"], doc["count"], doc.get("lower"), doc.get("upper"),
+            cursor=doc.get("cursor"), cursor_key=doc.get("cursor_key"), counts=dict(doc.get("counts") or {}), since=doc.get("since"), _save=save,
+        )
+        label = f"{doc['job']} run {doc['run_key']} partition {partition.index + 1}/{partition.count}"
+        resumed = f", resuming after {partition.cursor}" if partition.cursor else ""
+        logger.info(f"▶️ {label} started on {self.worker_id} (attempt {doc['attempts']}{resumed})")
+        work = asyncio.ensure_future(job.func(partition))
+        heartbeat = asyncio.create_task(self._heartbeat(doc["_id"], work))
+        self._running[work] = doc["_id"]
+        try:
+            await work
+        except asyncio.CancelledError:
+            if not heartbeat.done():
+                # Shutdown (the lease is released by shutdown())
+                raise
+            logger.warning(f"{label} abandoned (lease lost)")
+            return
+        except LeaseLost:
+            logger.warning(f"{label} abandoned (lease lost)")
+            return
+        except Exception as e:
+            logger.error(f"❌ {label} failed: {e}", exc_info=True)
+            # Let another attempt retry it until max_attempts is reached
+            failed = doc["attempts"] >= self.max_attempts
+            if failed:
+                await self._finish_partition(doc, PartitionStatus.FAILED, str(e)[:500], partition.counts)
+            else:
+                await self._release(doc["_id"], str(e)[:500])
+            return
+        finally:
+            heartbeat.cancel()
+            self._running.pop(work, None)
+        await self._finish_partition(doc, PartitionStatus.DONE, counts=partition.counts)
+        logger.info(f"✅ {label} done: {partition.counts}")
+
+    async def _release(self, partition_id: str, error: Optional[str] = None):
+        await self._collection().update_one(
+            {"_id": partition_id, "owner": self.worker_id},
+            {"$set": {"owner": None, "expires_at": _UNCLAIMED, "error": error}},
+        )
+
+    async def work_on(self, name: str, run_key: str) -> int:
+        """Claim and process partitions of a run until none is left. Returns how many were processed."""
+        processed = 0
+        while True:
+            doc = await self.claim_partition(name, run_key)
+            if doc is None:
+                return processed
+            await self.run_partition(doc)
+            processed += 1
+
+    # ---------- entry points ----------
+
+    async def run(self, name: str, run_key: str):
+        """Scheduled fire: plan the run (or wait for the planner), then help process it."""
+        try:
+            if not await self.plan_run(name, run_key) and not await self._wait_until_planned(name, run_key):
+                logger.warning(f"{name} run {run_key} was not planned in time, leaving it to the sweep")
+                return
+            await self.work_on(name, run_key)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Scheduled job {name} ({run_key}) failed: {e}", exc_info=True)
+
+    async def sweep(self):
+        """Take over expired partitions of the current run of every job."""
+        for name in self.jobs:
+            try:
+                plan = await self._collection().find_one({"_id": name})
+                if not plan or plan.get("status") != "planned":
+                    continue
+                # Partitions whose last attempt died with its worker are given up
+                abandoned = await self._collection().find({
+                    "job": name,
+                    "run_key": plan["run_key"],
+                    "status": PartitionStatus.RUNNING,
+                    "expires_at": {"$lt": datetime.utcnow()},
+                    "attempts": {"$gte": self.max_attempts},
+                }).to_list(length=None)
+                for doc in abandoned:
+                    await self._finish_partition(doc, PartitionStatus.FAILED, "Lease expired on the last attempt")
+                processed = await self.work_on(name, plan["run_key"])
+                if processed:
+                    logger.info(f"🔁 Took over {processed} partition(s) of {name} run {plan['run_key']}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Sweep of {name} failed: {e}", exc_info=True)
+
+    async def shutdown(self):
+        """Stop running partitions and release their leases so another worker resumes them right away."""
+        running = dict(self._running)
+        for work in running:
+            work.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+        for partition_id in running.values():
+            try:
+                await self._release(partition_id)
+            except Exception as e:
+                logger.warning(f"Could not release {partition_id}: {e}")
+
+    async def status(self) -> List[Dict[str, Any]]:
+        """Current plan and partitions of every registered job."""
+        collection = self._collection()
+        result = []
+        for name in self.jobs:
+            plan = await collection.find_one({"_id": name}) or {}
+            partitions = await collection.find(
+                {"job": name, "run_key": plan.get("run_key")}
+            ).sort("index", 1).to_list(length=None) if plan else []
+            result.append({
+                "job": name,
+                "run_key": plan.get("run_key"),
+                "status": plan.get("status"),
+                "partitions": [
+                    {
+                        "index": p["index"],
+                        "status": p["status"],
+                        "owner": p.get("owner"),
+                        "attempts": p.get("attempts", 0),
+                        "heartbeat_at": p.get("heartbeat_at"),
+                        "cursor": p.get("cursor"),
+                        "counts": p.get("counts") or {},
+                        "errors": len(p.get("errors") or []),
+                        "error": p.get("error"),
+                    }
+                    for p in partitions
+                ],
+            })
+        return result
+
+    async def history(self, name: str, limit: int = 10) -> List[Any]:
+        """Most recent runs of a job (BackgroundJob documents), newest first."""
+        from app.models.job_models import BackgroundJob
+
+        return await BackgroundJob.find({"kind": f"scheduled:{name}"}).sort("-created_at").limit(limit).to_list()
+
+
+_coordinator: Optional[JobCoordinator] = None
+
+
+def get_job_coordinator() -> JobCoordinator:
+    global _coordinator
+    if _coordinator is None:
+        _coordinator = JobCoordinator(
+            lease_seconds=settings.SCHEDULER_LEASE_SECONDS,
+            sweep_seconds=settings.SCHEDULER_SWEEP_SECONDS,
+            max_attempts=settings.SCHEDULER_MAX_ATTEMPTS,
+        )
+    return _coordinator
@@ -0,0 +1,241 @@
+"""
+Tracked background jobs.
+A request creates a BackgroundJob document and starts the work with
+start_job(); the runner reports progress through JobProgress and the job's
+final status / error is recorded for GET /jobs/{id}.
+Runners are registered per job kind and must be idempotent. The worker running
+a job holds a lease on it (renewed while it runs); resume_jobs() restarts
+pending / running jobs whose lease expired, e.g. after a restart or crash.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+from pymongo import ReturnDocument
+from app.config import settings
+from app.models.job_models import BackgroundJob, JobStatus
+import asyncio
+import hashlib
+import hmac
+import logging
+import secrets
+
+logger = logging.getLogger(__name__)
+
+JobRunner = Callable[[BackgroundJob, "JobProgress"], Awaitable[None]]
+
+# kind -> runner, filled by the modules defining jobs (see register_job_kind)
+_runners: Dict[str, JobRunner] = {}
+
+# Running jobs of this worker (asyncio task -> job id), also keeps them from being garbage collected
+_running: Dict[asyncio.Task, Any] = {}
+
+
+class JobProgress:
+    """Progress reporter handed to job runners."""
+
+    def __init__(self, job: BackgroundJob):
+        self.job = job
+
+    async def step_done(self, step: str, processed: int):
+        """
+        Record one finished step and the number of documents it processed
+        (added to the count of an interrupted earlier attempt of the step).
+        """
+        self.job.progress[step] = self.job.progress.get(step, 0) + processed
+        self.job.completed_steps = len(self.job.progress)
+        await self.job.set({
+            "completed_steps": self.job.completed_steps,
+            f"progress.{step}": self.job.progress[step],
+        })
+        logger.info(
+            f"Job {self.job.id} ({self.job.kind}): {step} done ({processed}) "
+            f"- {self.job.completed_steps}/{self.job.total_steps}"
+        )
+
+
+def register_job_kind(kind: str, runner: JobRunner):
+    """Declare the runner of a job kind, so its jobs can be started and resumed."""
+    _runners[kind] = runner
+
+
+def new_status_token() -> str:
+    """One-time secret that lets its holder read a job's status without logging in."""
+    return secrets.token_urlsafe(32)
+
+
+def _token_hash(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def status_token_matches(job: BackgroundJob, token: Optional[str]) -> bool:
+    return bool(token and job.status_token_hash and hmac.compare_digest(_token_hash(token), job.status_token_hash))
+
+
+async def create_job(
+    kind: str,
+    owner_id=None,
+    params: Optional[Dict[str, Any]] = None,
+    total_steps: int = 0,
+    status_token: Optional[str] = None,
+) -> BackgroundJob:
+    job = BackgroundJob(
+        kind=kind,
+        owner_id=owner_id,
+        params=params or {},
+        total_steps=total_steps,
+        status_token_hash=_token_hash(status_token) if status_token else None,
+        created_at=datetime.utcnow(),
+    )
+    await job.insert()
+    return job
+
+
+def _worker_id() -> str:
+    from app.services.job_coordinator import get_job_coordinator
+    return get_job_coordinator().worker_id
+
+
+async def _claim(job_id) -> Optional[BackgroundJob]:
+    """Take the lease of a pending job, or of a running one whose worker is gone."""
+    now = datetime.utcnow()
+    doc = await BackgroundJob.get_motor_collection().find_one_and_update(
+        {
+            "_id": job_id,
+            "status": {"$in": [JobStatus.PENDING.value, JobStatus.RUNNING.value]},
+            "attempts": {"$not": {"$gte": settings.SCHEDULER_MAX_ATTEMPTS}},
+            "$or": [{"lease_expires_at": None}, {"lease_expires_at": {"$lt": now}}],
+        },
+        {
+            "$set": {
+                "status": JobStatus.RUNNING.value,
+                "lease_owner": _worker_id(),
+                "lease_expires_at": now + timedelta(seconds=settings.SCHEDULER_LEASE_SECONDS),
+            },
+            "$inc": {"attempts": 1},
+        },
+        return_document=ReturnDocument.AFTER,
+    )
+    if doc is None:
+        return None
+    job = BackgroundJob.model_validate(doc)
+    if job.started_at is None:
+        await job.set({"started_at": now})
+    return job
+
+
+async def _heartbeat(job_id, work: asyncio.Task):
+    """Renew the lease every third of its duration; cancel the work if it was lost."""
+    while True:
+        await asyncio.sleep(settings.SCHEDULER_LEASE_SECONDS / 3)
+        try:
+            result = await BackgroundJob.get_motor_collection().update_one(
+                {"_id": job_id, "lease_owner": _worker_id()},
+                {"$set": {"lease_expires_at": datetime.utcnow() + timedelta(seconds=settings.SCHEDULER_LEASE_SECONDS)}},
+            )
+        except Exception as e:
+            # Keep working through a brief database outage; the lease may still be valid
+            logger.warning(f"Heartbeat of job {job_id} failed: {e}")
+            continue
+        if result.matched_count == 0:
+            logger.warning(f"⚠️ Lost lease on job {job_id}, stopping")
+            work.cancel()
+            return
+
+
+async def _finish(job: BackgroundJob, status: JobStatus, error: Optional[str] = None):
+    await BackgroundJob.get_motor_collection().update_one(
+        {"_id": job.id, "lease_owner": _worker_id()},
+        {"$set": {
+            "status": status.value,
+            "error": error,
+            "finished_at": datetime.utcnow(),
+            "lease_owner": None,
+            "lease_expires_at": None,
+        }},
+    )
+
+
+async def _release(job_id):
+    await BackgroundJob.get_motor_collection().update_one(
+        {"_id": job_id, "lease_owner": _worker_id()},
+        {"$set": {"lease_owner": None, "lease_expires_at": None}},
+    )
+
+
+async def run_job(job_id):
+    """Claim a job and run it to completion, recording its status. Errors are stored on the job, not raised."""
+    job = await _claim(job_id)
+    if job is None:
+        return  # finished, or running on another worker
+    runner = _runners[job.kind]
+    logger.info(f"▶️ Job {job.id} ({job.kind}) started (attempt {job.attempts})")
+
+    work = asyncio.ensure_future(runner(job, JobProgress(job)))
+    heartbeat = asyncio.create_task(_heartbeat(job.id, work))
+    try:
+        await work
+    except asyncio.CancelledError:
+        if not heartbeat.done():
+            # Shutdown: let another worker resume it right away
+            await asyncio.shield(_release(job.id))
+            raise
+        logger.warning(f"Job {job.id} ({job.kind}) abandoned (lease lost)")
+        return
+    except Exception as e:
+        logger.error(f"Job {job.id} ({job.kind}) failed: {e}", exc_info=True)
+        await _finish(job, JobStatus.FAILED, str(e))
+        return
+    finally:
+        heartbeat.cancel()
+    await _finish(job, JobStatus.COMPLETED)
+    logger.info(f"✅ Job {job.id} ({job.kind}) completed")
+
+
+def _spawn(job_id):
+    background = asyncio.create_task(run_job(job_id))
+    _running[background] = job_id
+    background.add_done_callback(lambda task: _running.pop(task, None))
+
+
+def start_job(job: BackgroundJob):
+    """Run a job in the background (the calling request does not wait for it)."""
+    _spawn(job.id)
+
+
+async def resume_jobs() -> int:
+    """
+    Start the pending / running jobs whose lease expired (their worker stopped);
+    the ones that used up their attempts are marked failed. Returns how many were started.
+    """
+    collection = BackgroundJob.get_motor_collection()
+    now = datetime.utcnow()
+    base_query = {
+        "kind": {"$in": list(_runners)},
+        "status": {"$in": [JobStatus.PENDING.value, JobStatus.RUNNING.value]},
+        "$or": [{"lease_expires_at": None}, {"lease_expires_at": {"$lt": now}}],
+    }
+    await collection.update_many(
+        {**base_query, "attempts": {"$gte": settings.SCHEDULER_MAX_ATTEMPTS}},
+        {"$set": {
+            "status": JobStatus.FAILED.value,
+            "error": f"Interrupted {settings.SCHEDULER_MAX_ATTEMPTS} times",
+            "finished_at": now,
+        }},
+    )
+    running = set(_running.values())
+    started = 0
+    async for doc in collection.find({**base_query, "attempts": {"$not": {"$gte": settings.SCHEDULER_MAX_ATTEMPTS}}}, {"kind": 1}):
+        if doc["_id"] in running:
+            continue
+        logger.info(f"🔁 Resuming job {doc['_id']} ({doc['kind']})")
+        _spawn(doc["_id"])
+        started += 1
+    return started
+
+
+async def shutdown_jobs():
+    """Stop this worker's jobs; their leases are released so another worker resumes them."""
+    running = list(_running)
+    for task in running:
+        task.cancel()
+    await asyncio.gather(*running, return_exceptions=True)
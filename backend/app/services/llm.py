@@ -1,8 +1,16 @@
+import asyncio
 import logging
 import json
-from typing import Optional, Dict, Any
+import time
+from contextlib import aclosing
+from typing import Optional, Dict, Any, AsyncIterator, Callable, List, NoReturn
 
 from app.config import settings
+from app.services.llm_cache import cache_key, get_llm_cache
+from app.services.rate_limit import current_llm_rate_limiter, estimate_tokens
+from app.services.llm_resilience import LLMUnavailableError, call_with_resilience
+from app.services.llm_providers import get_llm_provider
+from app.services.prompt_budget import count_tokens
 
 DEFAULT_SYSTEM_INSTRUCTION = (
     "You are a friendly Vietnamese assistant named Dat, helping children. "
@@ -10,10 +18,220 @@ DEFAULT_SYSTEM_INSTRUCTION = (
     "When asked who you are, briefly introduce yourself (name is Dat)."
 )
 
-DEFAULT_TIMEOUT = 30.0
+DEFAULT_TIMEOUT = settings.LLM_TIMEOUT_SECONDS
 
+# Re-submitting the same assessment answers reuses the previous analysis
+ASSESSMENT_CACHE_TTL = 24 * 60 * 60
 
-def generate_openai_response(prompt: str, system_instruction: Optional[str] = None, max_tokens: int = 1024) -> str:
+# The semaphore caps concurrent LLM requests per worker
+_semaphore: Optional[asyncio.Semaphore] = None
+# Streams are read at the client's pace, so they have their own cap and never
+# hold a request slot
+_stream_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+    return _semaphore
+
+
+def _get_stream_semaphore() -> asyncio.Semaphore:
+    global _stream_semaphore
+    if _stream_semaphore is None:
+        _stream_semaphore = asyncio.Semaphore(settings.LLM_MAX_STREAMS)
+    return _stream_semaphore
+
+
+async def close_llm_client():
+    """Close the provider's connections (application shutdown)."""
+    await get_llm_provider().close()
+
+
+def _log_usage(call_site: str, model: str, started: float, prompt_tokens: int, completion_tokens: int, estimated: bool = False):
+    """Log latency, token usage and cost of one LLM call."""
+    cost = (
+        prompt_tokens * settings.LLM_PRICE_PER_1K_INPUT_TOKENS
+        + completion_tokens * settings.LLM_PRICE_PER_1K_OUTPUT_TOKENS
+    ) / 1000
+    logging.info(
+        f"LLM [{call_site}] {model}: {(time.perf_counter() - started) * 1000:.0f} ms, "
+        f"{'~' if estimated else ''}{prompt_tokens} prompt + {completion_tokens} completion tokens, ${cost:.5f}"
+    )
+
+
+def _raise_api_error(e: Exception) -> NoReturn:
+    """Translate an OpenAI client error into the RuntimeError messages callers expect."""
+    if isinstance(e, LLMUnavailableError):
+        raise e
+    error_msg = str(e)
+    if "401" in error_msg or "Invalid API key" in error_msg:
+        raise RuntimeError(f"Invalid OpenAI API key. Please check your NAVER_API_KEY in .env file.") from e
+    elif "429" in error_msg or "quota" in error_msg.lower() or "rate limit" in error_msg.lower():
+        raise RuntimeError(f"OpenAI API quota/rate limit exceeded. Please check your billing/quota settings.") from e
+    elif isinstance(e, asyncio.TimeoutError) or "timed out" in error_msg.lower():
+        raise RuntimeError(f"OpenAI API request timed out") from e
+    else:
+        logging.error(f"OpenAI API error: {error_msg[:200]}")
+        raise RuntimeError(f"Failed to call OpenAI API: {error_msg[:200]}") from e
+
+
+async def chat_completion(
+    messages: List[Dict[str, str]],
+    max_tokens: int = 1024,
+    temperature: float = 0.7,
+    timeout: Optional[float] = None,
+    response_format: Optional[Dict[str, Any]] = None,
+    cache_ttl: Optional[int] = None,
+    call_site: str = "default",
+    validate: Optional[Callable[[str], Any]] = None,
+) -> str:
+    """
+    Run one chat completion on the shared client.
+    At most LLM_MAX_CONCURRENCY calls are in flight; timeout (seconds) applies to the request.
+    With cache_ttl (seconds), identical requests within the TTL are answered from the
+    LLM cache (app.services.llm_cache); call_site labels the call in cache metrics and usage logs.
+    validate(text) runs before the response is cached: if it raises, the error
+    propagates and nothing is cached, so a malformed answer is not replayed.
+    """
+    provider = get_llm_provider()
+    
+    cache = get_llm_cache() if cache_ttl else None
+    if cache is not None:
+        params: Dict[str, Any] = {"max_tokens": max_tokens, "temperature": temperature}
+        if response_format:
+            params["response_format"] = response_format
+        key = cache_key(f"{provider.name}:{provider.model}", messages, params)
+        cached = await cache.get(key, call_site)
+        if cached is not None:
+            return cached
+    
+    limiter = current_llm_rate_limiter()
+    
+    async def _create():
+        # Every attempt (retries included) is paced by the caller's rate limiter
+        if limiter is not None:
+            await limiter.acquire(estimate_tokens(messages, max_tokens))
+        async with _get_semaphore():
+            return await provider.complete(
+                messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                timeout=timeout or DEFAULT_TIMEOUT,
+                response_format=response_format,
+            )
+    
+    started = time.perf_counter()
+    try:
+        # Retries back off outside the semaphore; fails fast while the model's circuit is open
+        completion = await call_with_resilience(f"{provider.name}:{provider.model}", _create)
+    except Exception as e:
+        _raise_api_error(e)
+    _log_usage(call_site, provider.model, started, completion.prompt_tokens, completion.completion_tokens)
+    
+    text = completion.text
+    if not text:
+        raise RuntimeError("Empty response from OpenAI API")
+    if validate is not None:
+        validate(text)
+    if cache is not None:
+        await cache.set(key, text, cache_ttl)
+    return text
+
+
+async def stream_chat_completion(
+    messages: List[Dict[str, str]],
+    max_tokens: int = 1024,
+    temperature: float = 0.7,
+    timeout: Optional[float] = None,
+    call_site: str = "default",
+) -> AsyncIterator[str]:
+    """
+    Stream a chat completion, yielding text deltas as they arrive.
+    The next chunk is only read from upstream when the consumer asks for it; if
+    the consumer stops early (aclose / cancellation) the upstream request is closed.
+    At most LLM_MAX_STREAMS streams are open per worker.
+    """
+    provider = get_llm_provider()
+    semaphore = _get_stream_semaphore()
+    
+    async def _open_stream():
+        # The stream slot is held for the whole stream once it is open
+        await semaphore.acquire()
+        try:
+            return await provider.open_stream(
+                messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                timeout=timeout or DEFAULT_TIMEOUT,
+            )
+        except BaseException:
+            semaphore.release()
+            raise
+    
+    started = time.perf_counter()
+    try:
+        stream = await call_with_resilience(f"{provider.name}:{provider.model}", _open_stream)
+    except Exception as e:
+        _raise_api_error(e)
+    
+    parts: List[str] = []
+    try:
+        async for delta in stream:
+            parts.append(delta)
+            yield delta
+    except Exception as e:
+        _raise_api_error(e)
+    finally:
+        try:
+            await stream.close()
+        finally:
+            semaphore.release()
+            # Streams report no usage; estimate it from the text
+            _log_usage(
+                call_site,
+                provider.model,
+                started,
+                sum(count_tokens(message.get("content") or "") for message in messages),
+                count_tokens("".join(parts)),
+                estimated=True,
+            )
+
+
+async def stream_openai_response(
+    prompt: str,
+    system_instruction: Optional[str] = None,
+    max_tokens: int = 1024,
+    timeout: Optional[float] = None,
+    call_site: str = "default",
+) -> AsyncIterator[str]:
+    """Streaming variant of generate_openai_response: yields text deltas."""
+    instruction = system_instruction or DEFAULT_SYSTEM_INSTRUCTION
+    deltas = stream_chat_completion(
+        [
+            {"role": "system", "content": instruction},
+            {"role": "user", "content": prompt},
+        ],
+        max_tokens=max_tokens,
+        timeout=timeout,
+        call_site=call_site,
+    )
+    # aclosing: stopping this generator closes the upstream stream right away
+    async with aclosing(deltas):
+        async for delta in deltas:
+            yield delta
+
+
+async def generate_openai_response(
+    prompt: str,
+    system_instruction: Optional[str] = None,
+    max_tokens: int = 1024,
+    timeout: Optional[float] = None,
+    cache_ttl: Optional[int] = None,
+    call_site: str = "default",
+    validate: Optional[Callable[[str], Any]] = None,
+) -> str:
     """
     Generate a response using OpenAI API.
     
@@ -21,59 +239,48 @@ def generate_openai_response(prompt: str, system_instruction: Optional[str] = No
         prompt: User prompt
         system_instruction: System instruction (optional)
         max_tokens: Maximum tokens in response (default: 1024)
+        timeout: Request timeout in seconds (default: LLM_TIMEOUT_SECONDS)
+        cache_ttl: Reuse identical responses for this many seconds (default: no caching)
+        call_site: Label of the calling feature for cache metrics and usage logs
+        validate: Check of the response text; only responses passing it are cached
     
     Returns:
         Generated text response
     """
-    api_key = settings.NAVER_API_KEY
-    if not api_key:
-        raise RuntimeError("NAVER_API_KEY is not configured in environment variables")
-    
     instruction = system_instruction or DEFAULT_SYSTEM_INSTRUCTION
     
-    try:
-        from openai import OpenAI
-        
-        client = OpenAI(api_key=api_key)
-        
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",  # Use cheaper model, can change to "gpt-4o" for better quality
-            messages=[
-                {
-                    "role": "system",
-                    "content": instruction
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            temperature=0.7,
-            max_tokens=max_tokens
-        )
-        
-        text = response.choices[0].message.content
-        if not text:
-            raise RuntimeError("Empty response from OpenAI API")
-        
-        logging.info("Successfully called OpenAI API")
-        return text.strip()
-        
-    except ImportError:
-        raise RuntimeError("openai package not installed. Run: pip install openai")
-    except Exception as e:
-        error_msg = str(e)
-        if "401" in error_msg or "Invalid API key" in error_msg:
-            raise RuntimeError(f"Invalid OpenAI API key. Please check your NAVER_API_KEY in .env file.") from e
-        elif "429" in error_msg or "quota" in error_msg.lower() or "rate limit" in error_msg.lower():
-            raise RuntimeError(f"OpenAI API quota/rate limit exceeded. Please check your billing/quota settings.") from e
-        else:
-            logging.error(f"OpenAI API error: {error_msg[:200]}")
-            raise RuntimeError(f"Failed to call OpenAI API: {error_msg[:200]}") from e
+    text = await chat_completion(
+        [
+            {
+                "role": "system",
+                "content": instruction
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ],
+        max_tokens=max_tokens,
+        timeout=timeout,
+        cache_ttl=cache_ttl,
+        call_site=call_site,
+        validate=validate,
+    )
+    
+    logging.info("Successfully called OpenAI API")
+    return text.strip()
 
 
 # Alias for backward compatibility (keep old function name)
-def generate_gemini_response(prompt: str, system_instruction: Optional[str] = None, max_tokens: int = 1024) -> str:
+async def generate_gemini_response(
+    prompt: str,
+    system_instruction: Optional[str] = None,
+    max_tokens: int = 1024,
+    timeout: Optional[float] = None,
+    cache_ttl: Optional[int] = None,
+    call_site: str = "default",
+    validate: Optional[Callable[[str], Any]] = None,
+) -> str:
     """
     Generate a response using OpenAI API.
     This function is kept for backward compatibility.
@@ -83,11 +290,21 @@ def generate_gemini_response(prompt: str, system_instruction: Optional[str] = No
         prompt: User prompt
         system_instruction: System instruction (optional)
         max_tokens: Maximum tokens in response (default: 1024)
+        timeout: Request timeout in seconds (default: LLM_TIMEOUT_SECONDS)
+        cache_ttl / call_site / validate: see generate_openai_response
     """
-    return generate_openai_response(prompt, system_instruction, max_tokens)
+    return await generate_openai_response(
+        prompt,
+        system_instruction,
+        max_tokens,
+        timeout=timeout,
+        cache_ttl=cache_ttl,
+        call_site=call_site,
+        validate=validate,
+    )
 
 
-def analyze_assessment_with_chatgpt(
+async def analyze_assessment_with_chatgpt(
     child_info: Dict[str, Any],
     assessment_answers: Dict[str, Dict[str, Optional[str]]],
     questions_data: Dict[str, Dict[str, str]]
@@ -104,51 +321,32 @@ def analyze_assessment_with_chatgpt(
     Returns:
         Dictionary with overall_traits, explanations, and recommended_focus
     """
-    api_key = settings.NAVER_API_KEY
-    if not api_key:
-        raise RuntimeError("NAVER_API_KEY is not configured in environment variables")
-    
     # Build the prompt for OpenAI
     prompt = _build_assessment_prompt(child_info, assessment_answers, questions_data)
     
-    try:
-        from openai import OpenAI
-        
-        client = OpenAI(api_key=api_key)
-        
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",  # Use cheaper model, can change to "gpt-4o" for better quality
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert child development analyst. Analyze assessment data and return ONLY valid JSON, no markdown, no extra text."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            temperature=0.7,
-            max_tokens=2000,
-            response_format={"type": "json_object"}  # Force JSON response
-        )
-        
-        text = response.choices[0].message.content
-        logging.info("Successfully called OpenAI API for assessment analysis")
-        
-    except ImportError:
-        raise RuntimeError("openai package not installed. Run: pip install openai")
-    except Exception as e:
-        error_msg = str(e)
-        if "401" in error_msg or "Invalid API key" in error_msg:
-            raise RuntimeError(f"Invalid OpenAI API key. Please check your NAVER_API_KEY in .env file.") from e
-        elif "429" in error_msg or "quota" in error_msg.lower() or "rate limit" in error_msg.lower():
-            raise RuntimeError(f"OpenAI API quota/rate limit exceeded. Please check your billing/quota settings.") from e
-        else:
-            logging.error(f"OpenAI API error: {error_msg[:200]}")
-            raise RuntimeError(f"Failed to call OpenAI API: {error_msg[:200]}") from e
-    
-    # Parse JSON from response
+    text = await chat_completion(
+        [
+            {
+                "role": "system",
+                "content": "You are an expert child development analyst. Analyze assessment data and return ONLY valid JSON, no markdown, no extra text."
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ],
+        max_tokens=2000,
+        response_format={"type": "json_object"},  # Force JSON response
+        cache_ttl=ASSESSMENT_CACHE_TTL,
+        call_site="assessment",
+        validate=_parse_assessment_response,
+    )
+    logging.info("Successfully called OpenAI API for assessment analysis")
+    return _parse_assessment_response(text)
+
+
+def _parse_assessment_response(text: str) -> Dict[str, Any]:
+    """Parse and validate the assessment JSON; raises RuntimeError if it is malformed."""
     try:
         text = text.strip()
         # Remove markdown code blocks if present
@@ -185,7 +383,7 @@ def analyze_assessment_with_chatgpt(
         logging.error(f"Failed to parse JSON from OpenAI response: {exc}")
         logging.error(f"Response text: {text[:500] if text else 'No text'}")
         raise RuntimeError(f"Failed to parse JSON response: {exc}") from exc
-    except (KeyError, ValueError) as exc:
+    except (KeyError, ValueError, TypeError) as exc:
         logging.error(f"Invalid response structure from OpenAI: {exc}")
         raise RuntimeError(f"Invalid response structure: {exc}") from exc
 
@@ -0,0 +1,224 @@
+"""
+Content-addressed cache for LLM completions.
+Entries are keyed by a SHA-256 of (model, messages, params), so identical
+requests share one answer regardless of call site. Call sites opt in by passing
+a TTL (see chat_completion(cache_ttl=...)). Backends (Settings.LLM_CACHE_BACKEND):
+- "memory": per-process LRU (LLM_CACHE_MAX_ENTRIES)
+- "mongo":  per-process LRU in front of the shared llm_cache collection, so all
+            workers reuse each other's answers
+- "none":   caching disabled
+"""
+
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from app.config import settings
+import hashlib
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(model: str, messages: List[Dict[str, str]], params: Dict[str, Any]) -> str:
+    """Stable hash of everything that determines the completion."""
+    payload = json.dumps(
+        {"model": model, "messages": messages, "params": params},
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CacheBackend:
+    name = "base"
+
+    async def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: str, ttl: float):
+        raise NotImplementedError
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process LRU with per-entry expiry."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self.evictions = 0
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: str, ttl: float):
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class MongoCacheBackend(CacheBackend):
+    """
+    Shared cache in the llm_cache collection. Expired entries are removed by a TTL
+    index on expires_at; the collection is trimmed to max_entries by least recent use.
+    """
+
+    name = "mongo"
+    TRIM_EVERY = 100  # writes between size checks
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._indexes_ready = False
+        self._writes = 0
+
+    def _collection(self):
+        from app.db.database import db
+        return db["llm_cache"]
+
+    async def _ensure_indexes(self):
+        if not self._indexes_ready:
+            from app.db.indexes import INDEX_CATALOG
+            await self._collection().create_indexes(INDEX_CATALOG["llm_cache"])
+            self._indexes_ready = True
+
+    async def get(self, key: str) -> Optional[str]:
+        now = datetime.utcnow()
+        doc = await self._collection().find_one_and_update(
+            {"_id": key, "expires_at": {"$gt": now}},
+            {"$set": {"last_used_at": now}},
+            projection={"value": 1},
+        )
+        return doc["value"] if doc else None
+
+    async def set(self, key: str, value: str, ttl: float):
+        await self._ensure_indexes()
+        now = datetime.utcnow()
+        await self._collection().update_one(
+            {"_id": key},
+            {"$set": {"value": value, "expires_at": now + timedelta(seconds=ttl), "last_used_at": now}},
+            upsert=True,
+        )
+        self._writes += 1
+        if self._writes % self.TRIM_EVERY == 0:
+            await self._trim()
+
+    async def _trim(self):
+        collection = self._collection()
+        excess = await collection.estimated_document_count() - self.max_entries
+        if excess <= 0:
+            return
+        oldest = await collection.find({}, {"_id": 1}).sort("last_used_at", 1).limit(excess).to_list(length=excess)
+        await collection.delete_many({"_id": {"$in": [doc["_id"] for doc in oldest]}})
+
+
+class TieredCacheBackend(CacheBackend):
+    """Local LRU in front of a shared backend."""
+
+    def __init__(self, local: MemoryCacheBackend, shared: CacheBackend):
+        self.local = local
+        self.shared = shared
+        self.name = f"{local.name}+{shared.name}"
+
+    async def get(self, key: str) -> Optional[str]:
+        value = await self.local.get(key)
+        if value is None:
+            value = await self.shared.get(key)
+            if value is not None:
+                # The shared entry's exact expiry is unknown here; keep it locally for a short while
+                await self.local.set(key, value, settings.LLM_CACHE_LOCAL_TTL_SECONDS)
+        return value
+
+    async def set(self, key: str, value: str, ttl: float):
+        await self.local.set(key, value, min(ttl, settings.LLM_CACHE_LOCAL_TTL_SECONDS))
+        await self.shared.set(key, value, ttl)
+
+
+class LLMCache:
+    """Cache front-end with hit/miss counters per namespace (call site)."""
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        self.errors = 0
+
+    async def get(self, key: str, namespace: str) -> Optional[str]:
+        try:
+            value = await self.backend.get(key)
+        except Exception as e:
+            # A cache outage must not fail the LLM call
+            self.errors += 1
+            logger.warning(f"LLM cache read failed ({self.backend.name}): {e}")
+            value = None
+        counter = self.hits if value is not None else self.misses
+        counter[namespace] = counter.get(namespace, 0) + 1
+        return value
+
+    async def set(self, key: str, value: str, ttl: float):
+        try:
+            await self.backend.set(key, value, ttl)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"LLM cache write failed ({self.backend.name}): {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        namespaces = sorted(set(self.hits) | set(self.misses))
+        per_namespace = {}
+        for namespace in namespaces:
+            hits, misses = self.hits.get(namespace, 0), self.misses.get(namespace, 0)
+            per_namespace[namespace] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            }
+        local = self.backend.local if isinstance(self.backend, TieredCacheBackend) else self.backend
+        return {
+            "backend": self.backend.name,
+            "hits": sum(self.hits.values()),
+            "misses": sum(self.misses.values()),
+            "errors": self.errors,
+            "local_entries": len(local) if isinstance(local, MemoryCacheBackend) else None,
+            "local_evictions": local.evictions if isinstance(local, MemoryCacheBackend) else None,
+            "namespaces": per_namespace,
+        }
+
+
+def build_llm_cache(backend: str) -> Optional[LLMCache]:
+    if backend == "none":
+        return None
+    local = MemoryCacheBackend(settings.LLM_CACHE_MAX_ENTRIES)
+    if backend == "memory":
+        return LLMCache(local)
+    if backend == "mongo":
+        return LLMCache(TieredCacheBackend(local, MongoCacheBackend(settings.LLM_CACHE_MONGO_MAX_ENTRIES)))
+    raise ValueError(f"Unknown LLM cache backend: {backend}")
+
+
+_cache: Optional[LLMCache] = None
+_cache_built = False
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """Cache configured by Settings.LLM_CACHE_BACKEND (None when disabled)."""
+    global _cache, _cache_built
+    if not _cache_built:
+        _cache = build_llm_cache(settings.LLM_CACHE_BACKEND)
+        _cache_built = True
+    return _cache
@@ -0,0 +1,335 @@
+"""
+LLM providers.
+app.services.llm (cache, rate limiting, retries, circuit breaker, error
+messages) sends the raw requests through the provider selected with
+Settings.LLM_PROVIDER:
+- "openai": OpenAI-compatible chat completions API (NAVER_API_KEY, LLM_MODEL)
+- "stub":   offline and deterministic; returns schema-valid JSON for every
+            prompt the app sends (tasks, reports, assessments, scores,
+            emotions) with configurable latency and error injection, for
+            benchmarks and load tests without network access or API cost
+"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional
+from app.config import settings
+from app.services.prompt_budget import count_tokens
+from app.services.llm_resilience import TransientLLMError
+import asyncio
+import hashlib
+import json
+import random
+import re
+
+
+@dataclass
+class Completion:
+    text: Optional[str]
+    prompt_tokens: int
+    completion_tokens: int
+
+
+class LLMStream(ABC):
+    """An open streaming completion: iterate for text deltas, close() to stop early."""
+
+    @abstractmethod
+    def __aiter__(self) -> AsyncIterator[str]:
+        """Text deltas as they arrive."""
+
+    async def close(self):
+        pass
+
+
+class LLMProvider(ABC):
+    name = "base"
+    model = "base"
+
+    @abstractmethod
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        temperature: float,
+        timeout: float,
+        response_format: Optional[Dict[str, Any]] = None,
+    ) -> Completion:
+        """One chat completion (text None / empty if the model returned nothing) and its token usage."""
+
+    @abstractmethod
+    async def open_stream(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        temperature: float,
+        timeout: float,
+    ) -> LLMStream:
+        """Start a streaming completion."""
+
+    async def close(self):
+        """Release connections (application shutdown)."""
+
+
+# ============== OPENAI ==============
+
+class _OpenAIStream(LLMStream):
+    def __init__(self, stream):
+        self._stream = stream
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+
+    async def close(self):
+        await self._stream.close()
+
+
+class OpenAIProvider(LLMProvider):
+    """One shared AsyncOpenAI client (and its HTTP connection pool) for all calls."""
+
+    name = "openai"
+
+    def __init__(self):
+        self.model = settings.LLM_MODEL
+        self._client = None
+
+    def client(self):
+        if self._client is None:
+            api_key = settings.NAVER_API_KEY
+            if not api_key:
+                raise RuntimeError("NAVER_API_KEY is not configured in environment variables")
+            try:
+                import httpx
+                from openai import AsyncOpenAI
+            except ImportError:
+                raise RuntimeError("openai package not installed. Run: pip install openai")
+
+            self._client = AsyncOpenAI(
+                api_key=api_key,
+                timeout=settings.LLM_TIMEOUT_SECONDS,
+                max_retries=0,  # retries are done by app.services.llm_resilience
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=settings.LLM_MAX_CONNECTIONS,
+                        max_keepalive_connections=settings.LLM_MAX_CONNECTIONS,
+                    ),
+                    timeout=settings.LLM_TIMEOUT_SECONDS,
+                ),
+            )
+        return self._client
+
+    async def complete(self, messages, max_tokens, temperature, timeout, response_format=None):
+        kwargs: Dict[str, Any] = {}
+        if response_format:
+            kwargs["response_format"] = response_format
+        response = await self.client().chat.completions.create(
+            model=self.model,
+            messages=messages,  # type: ignore
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=timeout,
+            **kwargs,
+        )
+        usage = response.usage
+        return Completion(
+            text=response.choices[0].message.content,
+            prompt_tokens=usage.prompt_tokens if usage else 0,
+            completion_tokens=usage.completion_tokens if usage else 0,
+        )
+
+    async def open_stream(self, messages, max_tokens, temperature, timeout):
+        stream = await self.client().chat.completions.create(
+            model=self.model,
+            messages=messages,  # type: ignore
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=timeout,
+            stream=True,
+        )
+        return _OpenAIStream(stream)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+# ============== STUB ==============
+
+_CATEGORIES = ["Independence", "Logic", "Physical", "Creativity", "Social", "Academic"]
+_TRAITS = ["independence", "emotional", "discipline", "social", "logic"]
+_ACTIVITIES = ["Build a block tower", "Water the plants", "Draw your family", "Count the stairs",
+               "Tidy up the toy box", "Invent a short story", "Help set the table", "Do ten jumping jacks"]
+
+
+class _StubStream(LLMStream):
+    def __init__(self, text: str, delay: float):
+        self._words = text.split(" ")
+        self._delay = delay
+
+    async def __aiter__(self):
+        for i, word in enumerate(self._words):
+            await asyncio.sleep(self._delay)
+            yield word if i == 0 else " " + word
+
+
+class StubProvider(LLMProvider):
+    """
+    Offline provider. The answer depends only on the prompt (same prompt, same
+    answer); latency and injected failures are drawn from a seeded RNG.
+    """
+
+    name = "stub"
+    model = "stub"
+
+    def __init__(
+        self,
+        latency_ms: float = 0,
+        jitter_ms: float = 0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self.calls = 0
+
+    async def _simulate(self):
+        self.calls += 1
+        latency = max(0.0, self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms))
+        await asyncio.sleep(latency / 1000)
+        if self._random.random() < self.error_rate:
+            raise TransientLLMError("Stub provider injected failure (503)")
+
+    async def complete(self, messages, max_tokens, temperature, timeout, response_format=None):
+        await self._simulate()
+        text = stub_response(messages)
+        return Completion(
+            text=text,
+            prompt_tokens=sum(count_tokens(m.get("content") or "") for m in messages),
+            completion_tokens=count_tokens(text),
+        )
+
+    async def open_stream(self, messages, max_tokens, temperature, timeout):
+        await self._simulate()
+        # Spread a tenth of the configured latency over the tokens
+        return _StubStream(stub_response(messages), self.latency_ms / 10000)
+
+
+def _rng_for(text: str) -> random.Random:
+    return random.Random(int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:16], 16))
+
+
+def _stub_task(rng: random.Random, category: str, index: int = 0) -> Dict[str, Any]:
+    activity = rng.choice(_ACTIVITIES)
+    return {
+        "title": f"{activity} ({category} #{rng.randint(1000, 9999)}-{index})",
+        "description": f"{activity}. Take your time and tell a grown-up when you are done.",
+        "category": category,
+        "type": "emotion" if category == "Social" else "logic",
+        "difficulty": rng.randint(1, 5),
+        "suggested_age_range": "6-10",
+        "reward_coins": rng.choice([20, 30, 50, 80, 100]),
+        "unity_type": rng.choice(["life", "choice", "talk"]),
+    }
+
+
+def _stub_traits(rng: random.Random) -> Dict[str, int]:
+    return {trait: rng.randint(30, 90) for trait in _TRAITS}
+
+
+def stub_response(messages: List[Dict[str, str]]) -> str:
+    """Deterministic answer in the format the app's prompt asks for."""
+    system = next((m.get("content") or "" for m in messages if m.get("role") == "system"), "")
+    prompt = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+    rng = _rng_for(system + "\n" + prompt)
+
+    if "detect the primary emotion" in prompt:
+        from app.services.emotion import LexiconEmotionEngine
+        text = re.search(r'"(.*)"', prompt, re.S)
+        return LexiconEmotionEngine().classify(text.group(1) if text else prompt).label
+
+    if "TASKS TO CREATE" in prompt:
+        requested = re.findall(r"^- (\w+): EXACTLY (\d+) task", prompt, re.M)
+        return json.dumps({"tasks": [
+            _stub_task(rng, category, i) for category, count in requested for i in range(int(count))
+        ]})
+
+    target = re.search(r"TARGET CATEGORY: (\w+)", prompt)
+    if target:
+        return json.dumps(_stub_task(rng, target.group(1)))
+
+    if "recommended_focus" in prompt and "overall_traits" in prompt:
+        traits = _stub_traits(rng)
+        return json.dumps({
+            "overall_traits": traits,
+            "explanations": {trait: f"Stub estimate for {trait}." for trait in traits},
+            "recommended_focus": [trait.capitalize() for trait, _ in sorted(traits.items(), key=lambda t: t[1])[:2]],
+        })
+
+    if "Evaluate and score 5 aspects" in prompt:
+        return json.dumps(_stub_traits(rng))
+
+    if '"summary_text"' in system + prompt:
+        completed = re.search(r"- Completed: (\d+)", prompt)
+        emotion = rng.choice(["Happy", "Proud", "Curious", "Excited"])
+        return json.dumps({
+            "summary_text": "This period the child stayed engaged with their tasks and showed steady progress.",
+            "insights": {
+                "tasks_completed": int(completed.group(1)) if completed else 0,
+                "tasks_verified": int(completed.group(1)) if completed else 0,
+                "emotion_trends": {emotion: 50, "Neutral": 30, "Curious": 20},
+                "most_common_emotion": emotion,
+                "emotional_analysis": "Task patterns suggest a generally positive mood.",
+                "task_performance": "Completion is balanced across categories.",
+                "strengths": ["Consistency"],
+                "areas_for_improvement": ["Trying harder tasks"],
+            },
+            "suggestions": {
+                "focus": rng.choice(_CATEGORIES),
+                "recommended_activities": [rng.choice(_ACTIVITIES)],
+                "parenting_tips": ["Praise effort, not only results."],
+                "emotional_support": "Talk about the day's highlights at bedtime.",
+            },
+        })
+
+    if "JSON array" in prompt or "Return a JSON array" in prompt:
+        count = 1 if "EXACTLY 1" in prompt else 3
+        return json.dumps([_stub_task(rng, rng.choice(_CATEGORIES), i) for i in range(count)])
+
+    return "That's a great question! Let's think about it together step by step. You are doing really well."
+
+
+def build_llm_provider(name: str) -> LLMProvider:
+    if name == "openai":
+        return OpenAIProvider()
+    if name == "stub":
+        return StubProvider(
+            latency_ms=settings.LLM_STUB_LATENCY_MS,
+            jitter_ms=settings.LLM_STUB_LATENCY_JITTER_MS,
+            error_rate=settings.LLM_STUB_ERROR_RATE,
+            seed=settings.LLM_STUB_SEED,
+        )
+    raise ValueError(f"Unknown LLM provider: {name}")
+
+
+_provider: Optional[LLMProvider] = None
+
+
+def get_llm_provider() -> LLMProvider:
+    """Provider configured by Settings.LLM_PROVIDER (created once)."""
+    global _provider
+    if _provider is None:
+        _provider = build_llm_provider(settings.LLM_PROVIDER)
+    return _provider
+
+
+def set_llm_provider(provider: Optional[LLMProvider]):
+    """Replace the provider (benchmarks); None goes back to Settings.LLM_PROVIDER."""
+    global _provider
+    _provider = provider
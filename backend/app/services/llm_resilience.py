@@ -0,0 +1,208 @@
+"""
+Retry, backoff and circuit breaking for LLM calls.
+- Transient failures (rate limits, timeouts, connection errors, 5xx) are retried
+  with full-jitter exponential backoff, waiting at least as long as the
+  provider's Retry-After / retry-after-ms header asks for.
+- One circuit breaker per provider model ("<provider>:<model>") counts
+  consecutive transient failures; once open, calls fail immediately with
+  LLMUnavailableError (a RuntimeError, so the existing fallbacks of the call
+  sites apply) until a probe call succeeds.
+"""
+
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+from app.config import settings
+import asyncio
+import logging
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class LLMUnavailableError(RuntimeError):
+    """The model's circuit is open; the call was not sent."""
+
+
+class TransientLLMError(RuntimeError):
+    """A provider failure worth retrying that is not an OpenAI client error (e.g. injected by the stub)."""
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"        # calls pass
+    OPEN = "open"            # calls fail fast
+    HALF_OPEN = "half_open"  # one probe call is let through
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.rejected_calls = 0
+        self._probe_in_flight = False
+
+    def before_call(self):
+        """Raise LLMUnavailableError unless a call may be sent now."""
+        if self.state == CircuitState.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                self.rejected_calls += 1
+                raise LLMUnavailableError(f"LLM model {self.name} is temporarily unavailable (circuit open)")
+            self.state = CircuitState.HALF_OPEN
+            logger.info(f"LLM circuit for {self.name} half-open, probing")
+        if self.state == CircuitState.HALF_OPEN:
+            if self._probe_in_flight:
+                self.rejected_calls += 1
+                raise LLMUnavailableError(f"LLM model {self.name} is temporarily unavailable (probing)")
+            self._probe_in_flight = True
+
+    def record_success(self):
+        if self.state != CircuitState.CLOSED:
+            logger.info(f"✅ LLM circuit for {self.name} closed")
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self, error: Exception):
+        self.consecutive_failures += 1
+        self.last_error = str(error)[:200]
+        self._probe_in_flight = False
+        if self.state == CircuitState.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != CircuitState.OPEN:
+                logger.warning(
+                    f"⚠️ LLM circuit for {self.name} opened after {self.consecutive_failures} failures: {self.last_error}"
+                )
+            self.state = CircuitState.OPEN
+            self.opened_at = time.monotonic()
+
+    def record_ignored(self):
+        """The call failed for a reason unrelated to upstream health (e.g. bad request)."""
+        self._probe_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        retry_in = None
+        if self.state == CircuitState.OPEN:
+            retry_in = max(0.0, round(self.reset_timeout - (time.monotonic() - self.opened_at), 1))
+        return {
+            "state": self.state.value,
+            "consecutive_failures": self.consecutive_failures,
+            "rejected_calls": self.rejected_calls,
+            "last_error": self.last_error,
+            "retry_in_seconds": retry_in,
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(upstream: str) -> CircuitBreaker:
+    """Breaker of an upstream, named "<provider>:<model>"."""
+    breaker = _breakers.get(upstream)
+    if breaker is None:
+        breaker = _breakers[upstream] = CircuitBreaker(
+            upstream,
+            settings.LLM_BREAKER_FAILURE_THRESHOLD,
+            settings.LLM_BREAKER_RESET_SECONDS,
+        )
+    return breaker
+
+
+def circuit_breaker_states() -> Dict[str, Dict[str, Any]]:
+    """State of every provider model's breaker in this worker, by "<provider>:<model>"."""
+    return {upstream: breaker.snapshot() for upstream, breaker in _breakers.items()}
+
+
+def is_transient(error: Exception) -> bool:
+    """Whether an upstream error is worth retrying (and counts against the breaker)."""
+    if isinstance(error, (asyncio.TimeoutError, TransientLLMError)):
+        return True
+    try:
+        import openai
+    except ImportError:
+        return False
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        if getattr(error, "code", None) == "insufficient_quota":
+            # Billing problem, retrying will not help
+            return False
+        return error.status_code in (408, 409, 429) or error.status_code >= 500
+    return False
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Delay requested by the provider's rate-limit headers, if any."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+    retry_after = headers.get("retry-after")
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            try:
+                retry_at = parsedate_to_datetime(retry_after)
+                return max(0.0, (retry_at - datetime.now(retry_at.tzinfo)).total_seconds())
+            except (TypeError, ValueError):
+                pass
+    return None
+
+
+def backoff_delay(attempt: int, error: Exception) -> float:
+    """Full-jitter exponential backoff, but never shorter than Retry-After."""
+    delay = random.uniform(0, min(settings.LLM_RETRY_MAX_DELAY_SECONDS, settings.LLM_RETRY_BASE_DELAY_SECONDS * 2 ** attempt))
+    retry_after = retry_after_seconds(error)
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, settings.LLM_RETRY_MAX_DELAY_SECONDS))
+    return delay
+
+
+async def call_with_resilience(upstream: str, call: Callable[[], Awaitable[T]]) -> T:
+    """
+    Run call() (one upstream request) with retries and the circuit breaker of
+    upstream ("<provider>:<model>", so the same model name on two providers
+    does not share one).
+    Raises LLMUnavailableError while the circuit is open, else the last upstream error.
+    """
+    breaker = get_circuit_breaker(upstream)
+    attempt = 0
+    while True:
+        breaker.before_call()
+        try:
+            result = await call()
+        except Exception as e:
+            if not is_transient(e):
+                breaker.record_ignored()
+                raise
+            breaker.record_failure(e)
+            if attempt >= settings.LLM_MAX_RETRIES or breaker.state == CircuitState.OPEN:
+                raise
+            delay = backoff_delay(attempt, e)
+            attempt += 1
+            logger.warning(
+                f"LLM call to {upstream} failed ({type(e).__name__}), retry {attempt}/{settings.LLM_MAX_RETRIES} in {delay:.2f}s"
+            )
+            await asyncio.sleep(delay)
+            continue
+        except BaseException:
+            # Cancelled (client gone, shutdown): says nothing about upstream health,
+            # but a half-open probe must not stay in flight forever
+            breaker.record_ignored()
+            raise
+        breaker.record_success()
+        return result
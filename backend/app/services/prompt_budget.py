@@ -0,0 +1,137 @@
+"""
+Token budgeting for LLM prompts.
+PromptBuilder assembles a prompt from fixed text and trimmable item lists
+(task history, interaction logs, ...). If the prompt exceeds its call site's
+budget (PROMPT_BUDGETS, in prompt tokens), the oldest items of the largest
+list are dropped first until it fits. Context is serialized compactly.
+Token counts use tiktoken when installed, else ~4 characters per token.
+"""
+
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Prompt token budget per PromptBuilder call site
+PROMPT_BUDGETS: Dict[str, int] = {
+    "report": 2500,
+    "score": 1500,
+}
+DEFAULT_PROMPT_BUDGET = 2000
+
+_encoding = None
+_encoding_loaded = False
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens of `text` (tiktoken's o200k_base if available, else an estimate)."""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            _encoding = None
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+def compact_json(value: Any) -> str:
+    """JSON without indentation or spaces after separators."""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def summarize_task_history(
+    tasks: Sequence[Dict[str, Any]],
+    empty_text: str,
+    detailed: int = 5,
+) -> List[str]:
+    """
+    Prompt lines for a task history (newest first): the `detailed` newest tasks
+    one per line, the rest as counts per category.
+    """
+    if not tasks:
+        return [empty_text]
+    lines = [
+        f"- {task.get('title', 'N/A')} ({task.get('category', 'N/A')}, difficulty {task.get('difficulty', 'N/A')})"
+        for task in tasks[:detailed]
+    ]
+    older = Counter(task.get("category", "N/A") for task in tasks[detailed:])
+    if older:
+        lines.append("- Earlier: " + ", ".join(f"{category} x{count}" for category, count in older.most_common()))
+    return lines
+
+
+class _ItemList:
+    def __init__(self, items: List[Any], render: Callable[[Any], str], empty_text: str, min_items: int):
+        self.items = items
+        self.render = render
+        self.empty_text = empty_text
+        self.min_items = min_items
+        self.dropped = 0
+
+    def text(self) -> str:
+        if not self.items:
+            return self.empty_text
+        return "\n".join(self.render(item) for item in self.items)
+
+
+class PromptBuilder:
+    """
+    Ordered prompt parts; add_items() lists are trimmed (oldest items last in
+    the list are dropped first) to keep the prompt within the budget.
+    """
+
+    def __init__(self, call_site: str, budget: Optional[int] = None):
+        self.call_site = call_site
+        self.budget = budget or PROMPT_BUDGETS.get(call_site, DEFAULT_PROMPT_BUDGET)
+        self._parts: List[Union[str, _ItemList]] = []
+        self.tokens = 0
+
+    def add(self, text: str) -> "PromptBuilder":
+        self._parts.append(text)
+        return self
+
+    def add_items(
+        self,
+        items: Sequence[Any],
+        render: Callable[[Any], str] = compact_json,
+        empty_text: str = "None",
+        min_items: int = 0,
+    ) -> "PromptBuilder":
+        """Trimmable list, newest item first; each item is rendered on its own line."""
+        self._parts.append(_ItemList(list(items), render, empty_text, min_items))
+        return self
+
+    def _render(self) -> str:
+        return "".join(part if isinstance(part, str) else part.text() for part in self._parts)
+
+    def build(self) -> str:
+        lists = [part for part in self._parts if isinstance(part, _ItemList)]
+        prompt = self._render()
+        self.tokens = count_tokens(prompt)
+        while self.tokens > self.budget:
+            trimmable = [part for part in lists if len(part.items) > part.min_items]
+            if not trimmable:
+                break
+            largest = max(trimmable, key=lambda part: count_tokens(part.text()))
+            # Drop about as many items as needed to cover the excess (at least one)
+            per_item = max(1.0, count_tokens(largest.text()) / len(largest.items))
+            drop = min(
+                len(largest.items) - largest.min_items,
+                max(1, int((self.tokens - self.budget) / per_item)),
+            )
+            del largest.items[len(largest.items) - drop:]
+            largest.dropped += drop
+            prompt = self._render()
+            self.tokens = count_tokens(prompt)
+        dropped = sum(part.dropped for part in lists)
+        if dropped:
+            logger.info(f"✂️ {self.call_site} prompt trimmed to {self.tokens}/{self.budget} tokens ({dropped} items dropped)")
+        elif self.tokens > self.budget:
+            logger.warning(f"{self.call_site} prompt is {self.tokens} tokens, over its {self.budget} budget")
+        return prompt
@@ -0,0 +1,76 @@
+"""
+Token-bucket rate limiting for LLM calls.
+Bulk jobs install an LLMRateLimiter with use_llm_rate_limiter(); every
+chat_completion started inside it (including calls made from tasks it spawns)
+first takes one request and its estimated tokens from the buckets, so the job
+stays under the provider's requests/min and tokens/min quotas.
+Interactive requests run without a limiter.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+import asyncio
+import time
+
+
+class TokenBucket:
+    """Refills `rate_per_minute` units per minute, holding at most `capacity`."""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self._available = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._available = min(self.capacity, self._available + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self, amount: float = 1.0):
+        """Wait until `amount` units are available and take them (FIFO among waiters)."""
+        # A request larger than the bucket would never fit; let it drain the bucket instead
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            self._refill()
+            while self._available < amount:
+                await asyncio.sleep((amount - self._available) / self.rate)
+                self._refill()
+            self._available -= amount
+
+
+class LLMRateLimiter:
+    """Requests/min and tokens/min buckets for one stream of LLM calls."""
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+
+    async def acquire(self, estimated_tokens: int):
+        await self.requests.acquire(1)
+        await self.tokens.acquire(estimated_tokens)
+
+
+_current_limiter: ContextVar[Optional[LLMRateLimiter]] = ContextVar("llm_rate_limiter", default=None)
+
+
+def current_llm_rate_limiter() -> Optional[LLMRateLimiter]:
+    return _current_limiter.get()
+
+
+@contextmanager
+def use_llm_rate_limiter(limiter: LLMRateLimiter) -> Iterator[LLMRateLimiter]:
+    """Apply `limiter` to the LLM calls made in this context (and the tasks it creates)."""
+    token = _current_limiter.set(limiter)
+    try:
+        yield limiter
+    finally:
+        _current_limiter.reset(token)
+
+
+def estimate_tokens(messages, max_tokens: int) -> int:
+    """Rough token cost of a call: ~4 characters per prompt token plus the completion budget."""
+    prompt_chars = sum(len(message.get("content") or "") for message in messages)
+    return prompt_chars // 4 + max_tokens
@@ -0,0 +1,93 @@
+"""
+Task snapshot reconciliation.
+Every library ChildTask embeds a TaskSnapshot of its Task, so list / report /
+skill reads need no join. When a library Task is edited, the change is pushed
+to all ChildTasks that reference it (one update_many) by a tracked background
+job (app.services.jobs, resumed elsewhere if its worker stops), and the
+affected children's stats are rebuilt since category/difficulty may move.
+"""
+
+from bson import ObjectId
+from typing import Callable, Optional
+from app.models.childtask_models import ChildTask, TaskSnapshot
+from app.models.job_models import BackgroundJob
+from app.models.task_models import Task
+from app.services.child_stats import rebuild_child_stats
+from app.services.jobs import JobProgress, create_job, register_job_kind, start_job
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+async def propagate_task_snapshot(task: Task, progress: Optional[JobProgress] = None) -> int:
+    """Write the task's current fields into every ChildTask linked to it. Returns the number updated."""
+    collection = ChildTask.get_motor_collection()
+    query = {"task.$id": task.id}
+    snapshot = TaskSnapshot.from_task(task).model_dump(mode="json")
+
+    result = await collection.update_many(query, {"$set": {"task_snapshot": snapshot}})
+    if progress:
+        await progress.step_done("child_tasks", result.modified_count)
+
+    child_ids = await collection.distinct("child.$id", query)
+    for child_id in child_ids:
+        await rebuild_child_stats(child_id)
+    if progress:
+        await progress.step_done("child_stats", len(child_ids))
+
+    logger.info(f"🔄 Task {task.id} snapshot propagated to {result.modified_count} child tasks")
+    return result.modified_count
+
+
+async def _run_snapshot_propagation(job: BackgroundJob, progress: JobProgress):
+    # The task is read when the job runs, so a resumed job writes its latest fields
+    task = await Task.get(ObjectId(job.params["task_id"]))
+    if task is None:
+        return  # deleted since the edit
+    await propagate_task_snapshot(task, progress)
+
+
+register_job_kind("propagate_task_snapshot", _run_snapshot_propagation)
+
+
+async def start_task_snapshot_propagation(task: Task, owner_id=None) -> BackgroundJob:
+    """Propagate a library edit in the background (the edit request does not wait for it)."""
+    job = await create_job(
+        "propagate_task_snapshot",
+        owner_id=owner_id,
+        params={"task_id": str(task.id)},
+        total_steps=2,
+    )
+    start_job(job)
+    return job
+
+
+async def backfill_task_snapshots(
+    refresh_all: bool = False,
+    progress: Callable[[str], None] = print,
+) -> int:
+    """
+    Embed snapshots in ChildTasks that don't have one (or refresh every snapshot
+    with refresh_all). Runs one update_many per library task. Returns the number
+    of library tasks processed.
+    """
+    collection = ChildTask.get_motor_collection()
+    query = {"task": {"$type": "object"}}
+    if not refresh_all:
+        query["task_snapshot"] = None
+
+    task_ids = [task_id for task_id in await collection.distinct("task.$id", query) if isinstance(task_id, ObjectId)]
+    total = len(task_ids)
+    processed = 0
+    updated = 0
+    async for task in Task.find({"_id": {"$in": task_ids}}):
+        snapshot = TaskSnapshot.from_task(task).model_dump(mode="json")
+        result = await collection.update_many(
+            {**query, "task.$id": task.id},
+            {"$set": {"task_snapshot": snapshot}},
+        )
+        updated += result.modified_count
+        processed += 1
+        if processed % 100 == 0 or processed == total:
+            progress(f"   {processed}/{total} tasks ({updated} child tasks updated)")
+    return processed
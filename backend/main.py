@@ -1,8 +1,9 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import auth, child_auth, children, tasks, task_library, rewards, games, interact, reports, dashboard, assessments, onboarding, generate
+from app.routers import auth, child_auth, children, tasks, task_library, rewards, games, interact, reports, dashboard, assessments, onboarding, generate, jobs, llm_status
 from app.db.database import init_database
-from app.scheduler import scheduler
+from app.services.llm import close_llm_client
+from app.scheduler import start_scheduler, shutdown_scheduler
 
 app = FastAPI()
 
@@ -17,6 +18,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 app.include_router(auth.router, prefix="/auth", tags=["Auth"])
@@ -37,6 +39,8 @@ app.include_router(assessments.router, prefix="/children", tags=["Assessments"])
 app.include_router(reports.router, prefix="/reports", tags=["Reports"])
 app.include_router(dashboard.router, prefix="/dashboard", tags=["Dashboard"])
 app.include_router(generate.router, tags=["LLM Generation"])
+app.include_router(jobs.router, prefix="/jobs", tags=["Jobs"])
+app.include_router(llm_status.router, prefix="/llm", tags=["LLM"])
 
 @app.get("/")
 def read_root():
@@ -45,9 +49,9 @@ def read_root():
 @app.on_event("startup")
 async def startup_event():
     await init_database()
-    if not scheduler.running:
-        scheduler.start()
+    start_scheduler()
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    scheduler.shutdown()
\ No newline at end of file
+    await shutdown_scheduler()
+    await close_llm_client()
\ No newline at end of file
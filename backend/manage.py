@@ -0,0 +1,242 @@
+"""
+Maintenance commands for the Kiddy-Mate database.
+
+Usage:
+    python manage.py normalize-links [--batch-size N]
+    python manage.py check-links
+    python manage.py rebuild-stats [--child CHILD_ID]
+    python manage.py backfill-snapshots [--all]
+    python manage.py benchmark-emotion [--engine lexicon|llm|local] [--dataset holdout|dev|seed] [--repeat N]
+    python manage.py benchmark-llm [--calls N] [--concurrency N]   (LLM_PROVIDER=stub runs offline)
+    python manage.py scheduled-jobs [--history N]
+"""
+
+import argparse
+import asyncio
+from bson import ObjectId
+from app.db.database import db, init_database
+from app.db.migrations import count_legacy_links, normalize_link_formats
+from app.services.child_stats import rebuild_all_child_stats, rebuild_child_stats
+from app.services.task_snapshots import backfill_task_snapshots
+from typing import Optional
+import time
+
+
+async def normalize_links(batch_size: int):
+    """Rewrite legacy link formats to DBRefs (resumable)"""
+    print("🔧 Normalizing link formats...")
+    summary = await normalize_link_formats(db, batch_size=batch_size)
+
+    converted = sum(entry["converted"] for entry in summary.values())
+    skipped = sum(entry["skipped"] for entry in summary.values())
+    print(f"\n✅ Done: {converted} links converted, {skipped} skipped")
+    for key, entry in summary.items():
+        if entry["skipped"]:
+            print(f"   ⚠️  {key}: {entry['skipped']} values could not be converted")
+
+    await check_links()
+
+
+async def check_links():
+    """Report remaining legacy links; STRICT_LINK_QUERIES is safe when all are 0"""
+    counts = await count_legacy_links(db)
+    remaining = {key: count for key, count in counts.items() if count}
+    if not remaining:
+        print("✅ All links are stored as DBRefs - STRICT_LINK_QUERIES can be enabled")
+        return
+    print("⚠️  Legacy links remaining:")
+    for key, count in remaining.items():
+        print(f"   {key}: {count}")
+
+
+async def rebuild_stats(child_id: Optional[str] = None):
+    """Recompute ChildStats documents from the source collections"""
+    await init_database()
+    if child_id:
+        stats = await rebuild_child_stats(ObjectId(child_id))
+        print(f"✅ Rebuilt stats for child {child_id}: {stats.status_counts}")
+        return
+    print("🔧 Rebuilding stats for all children...")
+    count = await rebuild_all_child_stats()
+    print(f"✅ Rebuilt stats for {count} children")
+
+
+async def backfill_snapshots(refresh_all: bool):
+    """Embed library task snapshots in ChildTasks assigned before snapshots existed"""
+    await init_database()
+    print("🔧 Backfilling task snapshots...")
+    count = await backfill_task_snapshots(refresh_all=refresh_all)
+    print(f"✅ Snapshots written for {count} library tasks")
+
+
+async def benchmark_emotion(engine_name: str, dataset: str, repeat: int):
+    """
+    Accuracy and latency of an emotion engine on labelled messages: the held-out
+    evaluation set (default), the lexicon tuning set (dev) or the seed.py interactions
+    """
+    from app.config import settings
+    from app.data.emotion_fixtures import DEV_EMOTION_FIXTURES, HOLDOUT_EMOTION_FIXTURES, load_seed_emotion_fixtures
+    from app.services.emotion import build_emotion_engine
+
+    fixtures = {
+        "holdout": HOLDOUT_EMOTION_FIXTURES,
+        "dev": DEV_EMOTION_FIXTURES,
+    }.get(dataset) or load_seed_emotion_fixtures()
+    engine = build_emotion_engine(engine_name)
+    print(f"🔬 Benchmarking '{engine_name}' emotion engine on {len(fixtures)} {dataset} messages (x{repeat})...")
+
+    correct = 0
+    confident = confident_correct = 0
+    latencies = []
+    misses = []
+    for text, expected in fixtures:
+        for run in range(repeat):
+            started = time.perf_counter()
+            result = await engine.detect(text)
+            latencies.append((time.perf_counter() - started) * 1000)
+        if result.label == expected:
+            correct += 1
+        else:
+            misses.append((text, expected, result))
+        # Lexicon answers the "local" engine keeps without asking the LLM
+        if result.engine == "lexicon" and result.confidence >= settings.EMOTION_LLM_FALLBACK_THRESHOLD:
+            confident += 1
+            confident_correct += result.label == expected
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"\n✅ Accuracy: {correct}/{len(fixtures)} ({correct / len(fixtures):.1%})")
+    print(f"   Latency: p50 {p50:.3f} ms, p95 {p95:.3f} ms, max {latencies[-1]:.3f} ms")
+    if confident:
+        print(
+            f"   Lexicon confident (>= {settings.EMOTION_LLM_FALLBACK_THRESHOLD}) on {confident}/{len(fixtures)} messages, "
+            f"{confident_correct / confident:.1%} of them correct"
+        )
+    for text, expected, result in misses:
+        print(f"   ✗ {text!r}: expected {expected}, got {result.label} ({result.engine}, confidence {result.confidence})")
+
+
+async def benchmark_llm(calls: int, concurrency: int):
+    """Throughput, latency and output validity of batch task generation through the LLM layer"""
+    from app.config import settings
+    from app.routers.generate import (
+        ALL_CATEGORIES, _batch_task_items, _parse_llm_json_response, _validate_task_schema,
+        build_batch_generation_prompt,
+    )
+    from app.services.llm import generate_gemini_response
+    from app.services.llm_resilience import circuit_breaker_states
+
+    print(f"🔬 {calls} batch generation calls via '{settings.LLM_PROVIDER}' provider, concurrency {concurrency}...")
+    categories = {category: 1 for category in ALL_CATEGORIES}
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    valid_tasks = 0
+    failures = 0
+
+    async def one_call(i: int):
+        nonlocal valid_tasks, failures
+        context = {"child_info": {"name": f"Child {i}", "age": 5 + i % 8, "interests": ["drawing"]}}
+        prompt = build_batch_generation_prompt(context, categories, {})
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await generate_gemini_response(prompt, "Return ONLY valid JSON.", max_tokens=2048)
+                items = _batch_task_items(_parse_llm_json_response(response))
+                valid_tasks += sum(1 for item in items if _validate_task_schema(item))
+            except Exception as e:
+                failures += 1
+                print(f"   ✗ call {i}: {e}")
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one_call(i) for i in range(calls)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"\n✅ {calls - failures}/{calls} calls succeeded in {elapsed:.2f}s ({calls / elapsed:.1f} calls/s)")
+    print(f"   Valid tasks: {valid_tasks}/{calls * len(categories)}")
+    print(f"   Latency: p50 {p50:.1f} ms, p95 {p95:.1f} ms, max {latencies[-1]:.1f} ms")
+    print(f"   Circuit breakers: {circuit_breaker_states()}")
+
+
+async def scheduled_jobs(history: int):
+    """Current run, partition leases and recent runs of every scheduled job"""
+    await init_database()
+    from app.scheduler import coordinator
+
+    for job in await coordinator.status():
+        print(f"📋 {job['job']}: run {job['run_key'] or '-'} ({job['status'] or 'never run'})")
+        for partition in job["partitions"]:
+            line = f"   #{partition['index']} {partition['status']}, attempts {partition['attempts']}"
+            if partition["owner"]:
+                line += f", owner {partition['owner']} (heartbeat {partition['heartbeat_at']})"
+            if partition["cursor"]:
+                line += f", checkpoint {partition['cursor']}"
+            if partition["counts"]:
+                line += f", {partition['counts']}"
+            if partition["errors"]:
+                line += f", {partition['errors']} child error(s)"
+            if partition["error"]:
+                line += f", error: {partition['error']}"
+            print(line)
+        runs = await coordinator.history(job["job"], limit=history)
+        if runs:
+            print("   History:")
+        for run in runs:
+            duration = f"{(run.finished_at - run.started_at).total_seconds():.0f}s" if run.finished_at and run.started_at else "-"
+            line = f"   {run.params.get('run_key')}: {run.status.value}, {duration}, {run.progress}"
+            if run.error:
+                line += f", {run.error}"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kiddy-Mate maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    normalize_parser = subparsers.add_parser("normalize-links", help="Convert legacy link formats to DBRefs")
+    normalize_parser.add_argument("--batch-size", type=int, default=500)
+
+    subparsers.add_parser("check-links", help="Count documents with legacy link formats")
+
+    stats_parser = subparsers.add_parser("rebuild-stats", help="Recompute per-child statistics")
+    stats_parser.add_argument("--child", dest="child_id", default=None)
+
+    snapshots_parser = subparsers.add_parser("backfill-snapshots", help="Embed task snapshots in assigned tasks")
+    snapshots_parser.add_argument("--all", dest="refresh_all", action="store_true", help="Refresh existing snapshots too")
+
+    emotion_parser = subparsers.add_parser("benchmark-emotion", help="Benchmark emotion detection on labelled messages")
+    emotion_parser.add_argument("--engine", choices=["lexicon", "llm", "local"], default="lexicon")
+    emotion_parser.add_argument("--dataset", choices=["holdout", "dev", "seed"], default="holdout")
+    emotion_parser.add_argument("--repeat", type=int, default=100)
+
+    llm_parser = subparsers.add_parser("benchmark-llm", help="Benchmark batch task generation through the LLM layer")
+    llm_parser.add_argument("--calls", type=int, default=50)
+    llm_parser.add_argument("--concurrency", type=int, default=8)
+
+    scheduled_parser = subparsers.add_parser("scheduled-jobs", help="Show runs and partition leases of scheduled jobs")
+    scheduled_parser.add_argument("--history", type=int, default=5, help="Recent runs to list per job")
+
+    args = parser.parse_args()
+
+    if args.command == "normalize-links":
+        asyncio.run(normalize_links(args.batch_size))
+    elif args.command == "check-links":
+        asyncio.run(check_links())
+    elif args.command == "rebuild-stats":
+        asyncio.run(rebuild_stats(args.child_id))
+    elif args.command == "backfill-snapshots":
+        asyncio.run(backfill_snapshots(args.refresh_all))
+    elif args.command == "benchmark-emotion":
+        asyncio.run(benchmark_emotion(args.engine, args.dataset, args.repeat))
+    elif args.command == "benchmark-llm":
+        asyncio.run(benchmark_llm(args.calls, args.concurrency))
+    elif args.command == "scheduled-jobs":
+        asyncio.run(scheduled_jobs(args.history))
+
+
+if __name__ == "__main__":
+    main()
@@ -15,10 +15,11 @@ from app.models.beanie_models import (
 from app.models.reward_models import RedemptionRequest
 from app.models.user_models import UserRole
 from app.models.task_models import TaskCategory, TaskType, UnityType as TaskUnityType
-from app.models.childtask_models import ChildTaskStatus, ChildTaskPriority, UnityType as ChildTaskUnityType
+from app.models.childtask_models import ChildTaskStatus, ChildTaskPriority, TaskSnapshot, UnityType as ChildTaskUnityType
 from app.models.reward_models import RewardType
 from app.config import settings
 from app.services.auth import hash_password
+from app.dependencies import extract_id_from_link
 
 async def init_db():
     """Initialize database connection and Beanie models"""
@@ -738,6 +739,11 @@ async def seed_database():
     ]
     child_tasks.extend(alex_tasks)
     
+    # Embed the library task fields, as the API does on assignment
+    tasks_by_id = {str(t.id): t for t in tasks}
+    for ct in child_tasks:
+        ct.task_snapshot = TaskSnapshot.from_task(tasks_by_id[extract_id_from_link(ct.task)])
+    
     await ChildTask.insert_many(child_tasks)
     print(f"   ✓ Created {len(child_tasks)} assigned tasks across all children\n")
 
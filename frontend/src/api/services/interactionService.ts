@@ -59,16 +59,18 @@ export const getEmotionData = async (
 };
 
 /**
- * Get full chat history (interaction logs) for a child
+ * Get chat history (interaction logs) for a child, newest first
  * Returns list of conversations with user input, avatar response, timestamp, and emotion
+ * Pass the previous page's X-Next-Cursor header as `before` to load older messages (max 100 per page)
  */
 export const getChatHistory = async (
   childId: string,
-  limit: number = 20
+  limit: number = 20,
+  before?: string
 ): Promise<ChatHistoryItem[]> => {
   const response = await axiosClient.get<ChatHistoryItem[]>(
     `/children/${childId}/interact/history`,
-    { params: { limit } }
+    { params: { limit, before } }
   );
   return response.data;
 };
@@ -16,13 +16,50 @@ export interface Report {
 }
 
 /**
- * Get all reports for a child
+ * Report list item (full text and insights come from getReport)
  */
-export const getReports = async (childId: string): Promise<Report[]> => {
-  const response = await axiosClient.get<Report[]>(`/reports/${childId}`);
+export interface ReportSummary {
+  id: string;
+  period_start: string;
+  period_end: string;
+  generated_at: string;
+  summary_preview: string;
+  tasks_completed?: number | null;
+}
+
+/**
+ * Get a child's reports, newest first (first page unless a cursor is given)
+ */
+export const getReports = async (
+  childId: string,
+  params?: { limit?: number; cursor?: string }
+): Promise<ReportSummary[]> => {
+  const response = await axiosClient.get<ReportSummary[]>(`/reports/${childId}`, { params });
   return response.data;
 };
 
+/**
+ * One page of a child's reports; nextCursor is null on the last page
+ */
+export interface ReportPage {
+  reports: ReportSummary[];
+  nextCursor: string | null;
+}
+
+/**
+ * Get a page of a child's reports, newest first, with the cursor of the next (older) page
+ */
+export const getReportsPage = async (
+  childId: string,
+  params?: { limit?: number; cursor?: string }
+): Promise<ReportPage> => {
+  const response = await axiosClient.get<ReportSummary[]>(`/reports/${childId}`, { params });
+  return {
+    reports: response.data,
+    nextCursor: (response.headers['x-next-cursor'] as string | undefined) ?? null,
+  };
+};
+
 /**
  * Get single report by ID
  */
@@ -38,8 +75,8 @@ export const getReport = async (
  * Get latest report for a child
  */
 export const getLatestReport = async (childId: string): Promise<Report | null> => {
-  const reports = await getReports(childId);
-  return reports.length > 0 ? reports[0] : null;
+  const reports = await getReports(childId, { limit: 1 });
+  return reports.length > 0 ? getReport(childId, reports[0].id) : null;
 };
 
 /**
@@ -53,6 +90,7 @@ export const generateReport = async (childId: string): Promise<Report> => {
 
 export default {
   getReports,
+  getReportsPage,
   getReport,
   getLatestReport,
   generateReport,
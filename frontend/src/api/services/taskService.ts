@@ -101,10 +101,14 @@ export interface ChildTaskUpdate {
 
 export interface GetChildTasksParams {
   limit?: number;
+  cursor?: string;
   category?: string;
   status?: ChildTaskStatus;
 }
 
+// Largest page the assigned task list serves (the backend default is 50)
+const CHILD_TASKS_MAX_PAGE_SIZE = 500;
+
 // ============================================================================
 // TASK LIBRARY MANAGEMENT
 // ============================================================================
@@ -160,17 +164,33 @@ export const getSuggestedTasks = async (childId: string): Promise<Task[]> => {
 // ============================================================================
 
 /**
- * Get child's assigned tasks with full details (supports filtering)
+ * Get child's assigned tasks with full details (supports filtering), newest first.
+ * With a limit, only the newest `limit` tasks are returned; without one, every
+ * page is fetched by following the X-Next-Cursor header.
  */
 export const getChildTasks = async (
   childId: string,
   params?: GetChildTasksParams
 ): Promise<ChildTaskWithDetails[]> => {
-  const response = await axiosClient.get<ChildTaskWithDetails[]>(
-    `/children/${childId}/tasks`,
-    { params }
-  );
-  return response.data;
+  if (params?.limit) {
+    const response = await axiosClient.get<ChildTaskWithDetails[]>(
+      `/children/${childId}/tasks`,
+      { params }
+    );
+    return response.data;
+  }
+
+  const tasks: ChildTaskWithDetails[] = [];
+  let cursor: string | undefined = params?.cursor;
+  do {
+    const response = await axiosClient.get<ChildTaskWithDetails[]>(
+      `/children/${childId}/tasks`,
+      { params: { ...params, limit: CHILD_TASKS_MAX_PAGE_SIZE, cursor } }
+    );
+    tasks.push(...response.data);
+    cursor = response.headers['x-next-cursor'] as string | undefined;
+  } while (cursor);
+  return tasks;
 };
 
 /**
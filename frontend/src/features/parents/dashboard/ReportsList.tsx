@@ -1,6 +1,6 @@
 import { useState, useRef, useEffect } from 'react';
-import { useQuery } from '@tanstack/react-query';
-import { getReports, type Report } from '../../../api/services/reportService';
+import { useInfiniteQuery } from '@tanstack/react-query';
+import { getReport, getReportsPage, type Report, type ReportSummary } from '../../../api/services/reportService';
 import { useChild } from '../../../providers/ChildProvider';
 import { FileText, Calendar, ChevronRight, ChevronDown, ChevronUp } from 'lucide-react';
 import { Loading } from '../../../components/ui';
@@ -20,14 +20,21 @@ const ReportsList = ({ onReportGenerated, onViewReport }: ReportsListProps) => {
   const [hasNewReport, setHasNewReport] = useState(false);
 
   const {
-    data: reports,
+    data,
     isLoading,
-  } = useQuery({
+    fetchNextPage,
+    hasNextPage,
+    isFetchingNextPage,
+  } = useInfiniteQuery({
     queryKey: ['reports', selectedChildId],
-    queryFn: () => getReports(selectedChildId!),
+    queryFn: ({ pageParam }) => getReportsPage(selectedChildId!, { cursor: pageParam }),
+    initialPageParam: undefined as string | undefined,
+    // Older reports are loaded page by page with the X-Next-Cursor of the last page
+    getNextPageParam: (lastPage) => lastPage.nextCursor ?? undefined,
     enabled: !!selectedChildId,
     staleTime: 30000,
   });
+  const reports = data?.pages.flatMap((page) => page.reports);
 
   // Sort reports by generated_at (newest first)
   const sortedReports = reports 
@@ -99,9 +106,11 @@ const ReportsList = ({ onReportGenerated, onViewReport }: ReportsListProps) => {
     // This will be called from parent
   }
 
-  const handleViewReport = (report: Report) => {
-    if (onViewReport) {
-      onViewReport(report);
+  const handleViewReport = async (report: ReportSummary) => {
+    if (onViewReport && selectedChildId) {
+      // The list only carries previews; load the full report for the modal
+      const fullReport = await getReport(selectedChildId, report.id);
+      onViewReport(fullReport);
     }
   };
 
@@ -143,7 +152,7 @@ const ReportsList = ({ onReportGenerated, onViewReport }: ReportsListProps) => {
         <div className="flex items-center gap-2">
           {sortedReports && sortedReports.length > 0 && (
             <span className="text-xs text-gray-500 bg-gray-100 px-2 py-1 rounded-full">
-              {sortedReports.length}
+              {sortedReports.length}{hasNextPage ? '+' : ''}
             </span>
           )}
           {isExpanded ? (
@@ -202,11 +211,11 @@ const ReportsList = ({ onReportGenerated, onViewReport }: ReportsListProps) => {
                           )}
                         </div>
                         <p className="text-sm font-medium text-gray-900 line-clamp-2 group-hover:text-primary-600 transition-colors">
-                          {report.summary_text?.substring(0, 60) || 'Report'}...
+                          {report.summary_preview?.substring(0, 60) || 'Report'}...
                         </p>
-                        {report.insights?.tasks_completed !== undefined && (
+                        {report.tasks_completed != null && (
                           <div className="mt-1 flex items-center gap-2 text-xs text-gray-500">
-                            <span>✓ {report.insights.tasks_completed} tasks completed</span>
+                            <span>✓ {report.tasks_completed} tasks completed</span>
                           </div>
                         )}
                       </div>
@@ -214,6 +223,15 @@ const ReportsList = ({ onReportGenerated, onViewReport }: ReportsListProps) => {
                     </div>
                   </button>
                 ))}
+                {hasNextPage && (
+                  <button
+                    onClick={() => fetchNextPage()}
+                    disabled={isFetchingNextPage}
+                    className="w-full py-2 text-xs font-medium text-primary-600 hover:text-primary-700 disabled:text-gray-400 transition-colors"
+                  >
+                    {isFetchingNextPage ? 'Loading...' : 'Load older reports'}
+                  </button>
+                )}
               </div>
               {/* Scroll Indicator */}
               {showScrollIndicator && (